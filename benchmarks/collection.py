@@ -0,0 +1,33 @@
+"""
+Discovery + loading time of ExperimentCollection (profiles, topology, capacities) with one worker
+(serial) and the default thread pool, plus building the aligned fade table.
+
+    python -m benchmarks.collection [--root data]
+"""
+import sys
+import time
+from src.collection import ExperimentCollection, discover
+
+
+def argument(flag: str, default=None):
+    return sys.argv[sys.argv.index(flag) + 1] if flag in sys.argv else default
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    root = argument("--root", "data")
+
+    names, seconds = timed(lambda: discover(root))
+    print(f"discover: {len(names)} runs in {seconds:.3f}s")
+
+    for label, workers in [("serial", 1), ("concurrent", None)]:
+        runs, seconds = timed(lambda: ExperimentCollection(root, names, workers=workers))
+        print(f"load ({label}): {len(runs)} runs in {seconds:.3f}s ({len(runs.errors)} failed)")
+
+    fade, seconds = timed(lambda: runs.fade())
+    print(f"fade table: {fade.shape[0]} cycles x {fade.shape[1]} runs in {seconds:.3f}s")
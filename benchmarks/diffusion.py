@@ -0,0 +1,48 @@
+"""
+Per-cycle solve time and end-of-run capacity of each particle diffusion submodel (object engine).
+
+    python -m benchmarks.diffusion [--cycles N]
+"""
+import sys
+import json
+import pandas as pd
+from src.runner import make_config, run_pack
+from src.single_particle import SingleParticle
+
+SIZES = [(1, 1), (3, 3)]
+DISCRETE_PTS = 100
+
+
+def profile(experiment: str) -> dict:
+    with open(f"data/{experiment}/profile.json", 'r') as f:
+        return json.load(f)
+
+
+def measure(diffusion: str, series, parallel, cycles) -> dict:
+    experiment = f"bench/diffusion_{diffusion}_{series}x{parallel}"
+    run_pack(make_config(
+        NUM_SERIES=series, NUM_PARALLEL=parallel, NUM_CYCLES=cycles, C_RATE=1.0, DISCRETE_PTS=DISCRETE_PTS,
+        DIFFUSION=diffusion, EXPERIMENT=experiment, OVERWRITE=True, OVERRIDE=True, SEED=0
+    ))
+
+    data = profile(experiment)
+    caps = pd.read_csv(f"data/{experiment}/capacities.csv", index_col=0)["Pack Capacity"]
+    return {
+        "time": data["Mean Cycle Solve Time (s)"],
+        "capacity": caps.iloc[-1],
+        "failure": data["Failure"],
+    }
+
+
+if __name__ == '__main__':
+    cycles = int(sys.argv[sys.argv.index("--cycles") + 1]) if "--cycles" in sys.argv else 3
+
+    print(f"{'pack':>6} {'diffusion':>10} {'s/cycle':>9} {'vs full':>8} {'capacity':>9} {'vs full':>9}")
+    for series, parallel in SIZES:
+        results = {d: measure(d, series, parallel, cycles) for d in SingleParticle.DIFFUSION_MODELS}
+        full = results["full"]
+
+        for diffusion, result in results.items():
+            failed = "" if result["failure"] is None else "  FAILED"
+            print(f"{series}x{parallel:<4} {diffusion:>10} {result['time']:>9.3f} {result['time'] / full['time']:>7.2f}x "
+                  f"{result['capacity']:>9.3f} {result['capacity'] / full['capacity'] - 1:>+9.2%}{failed}")
@@ -0,0 +1,59 @@
+"""
+Import time budget of the post-processing reader: `import experiment` in a fresh interpreter must stay
+under BUDGET seconds and must not pull in any of the HEAVY modules (they load only on demand).
+
+    python -m benchmarks.import_time [--budget SECONDS] [--repeat N]
+
+Exits non-zero when over budget or when a heavy module is imported.
+"""
+import sys
+import json
+import subprocess
+
+BUDGET = 1.0
+REPEAT = 5
+
+MODULES = ["src.results", "experiment"]
+HEAVY = ["pybamm", "matplotlib", "casadi", "src.pack"]
+
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"Seconds": elapsed, "Heavy": [m for m in {heavy} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> dict:
+    ## best of `repeat` fresh interpreters (the first one also pays for cold .pyc / disk caches)
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    return {"Seconds": min(r["Seconds"] for r in runs), "Heavy": sorted(set(sum((r["Heavy"] for r in runs), [])))}
+
+
+def argument(flag: str, default=None):
+    return sys.argv[sys.argv.index(flag) + 1] if flag in sys.argv else default
+
+
+if __name__ == '__main__':
+    budget = float(argument("--budget", BUDGET))
+    repeat = int(argument("--repeat", REPEAT))
+
+    failed = False
+    for module in MODULES:
+        result = measure(module, repeat)
+        flag = ""
+        if result["Seconds"] > budget:
+            flag = "  OVER BUDGET"
+            failed = True
+        if len(result["Heavy"]) != 0:
+            flag += f"  IMPORTS {result['Heavy']}"
+            failed = True
+        print(f"{module:<16} {result['Seconds']:>8.3f}s (budget {budget:.3f}s){flag}")
+
+    sys.exit(1 if failed else 0)
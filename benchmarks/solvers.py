@@ -0,0 +1,57 @@
+"""
+Per-cycle solve time and failure rate of each solver backend across pack sizes.
+
+    python -m benchmarks.solvers [--repeats N]
+"""
+import sys
+import json
+import numpy as np
+from src.runner import make_config, run_job
+from src.solvers import SOLVERS
+
+SIZES = [(1, 1), (2, 2), (5, 5)]
+CYCLES = 5
+
+
+def profile(experiment: str) -> dict:
+    with open(f"data/{experiment}/profile.json", 'r') as f:
+        return json.load(f)
+
+
+def measure(backend: str, series, parallel, repeats) -> dict:
+    times = []
+    failures = 0
+    for k in range(repeats):
+        experiment = f"bench/solvers_{backend}_{series}x{parallel}_{k}"
+        ## different parameter draw per repeat, so the failure rate isn't one lucky pack
+        result = run_job(make_config(
+            NUM_SERIES=series, NUM_PARALLEL=parallel, NUM_CYCLES=CYCLES, C_RATE=1.0, DISCRETE_PTS=30,
+            SOLVER=backend, EXPERIMENT=experiment, OVERWRITE=True, OVERRIDE=False, SEED=[0, k]
+        ))
+        if result["Status"] != "done":
+            failures += 1
+            continue
+
+        data = profile(experiment)
+        if data["Failure"] is not None:
+            failures += 1
+        if data["Mean Cycle Solve Time (s)"] is not None:
+            times.append(data["Mean Cycle Solve Time (s)"])
+
+    return {
+        "time": np.mean(times) if len(times) != 0 else np.nan,
+        "failure rate": failures / repeats,
+    }
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[sys.argv.index("--repeats") + 1]) if "--repeats" in sys.argv else 3
+
+    print(f"{'pack':>6} {'backend':>8} {'s/cycle':>9} {'failed':>7}")
+    for series, parallel in SIZES:
+        results = {backend: measure(backend, series, parallel, repeats) for backend in SOLVERS}
+        fastest = min(results, key=lambda b: (results[b]["failure rate"], results[b]["time"]))
+
+        for backend, result in results.items():
+            mark = " *" if backend == fastest else ""
+            print(f"{series}x{parallel:<4} {backend:>8} {result['time']:>9.3f} {result['failure rate']:>7.0%}{mark}")
@@ -0,0 +1,54 @@
+"""
+Per-cycle solve time of Pack.cycler with and without stepping.
+Both runs must reach the same capacities (same cycles, rtol CAPACITY_RTOL) before a saving is reported.
+
+    python -m benchmarks.stepping
+"""
+import json
+import numpy as np
+import pandas as pd
+from src.runner import make_config, run_pack
+
+SIZES = [(1, 1), (2, 2), (5, 5)]
+CYCLES = 5
+CAPACITY_RTOL = 1e-3
+
+
+def profile(experiment: str) -> dict:
+    with open(f"data/{experiment}/profile.json", 'r') as f:
+        return json.load(f)
+
+
+def capacities(experiment: str) -> pd.DataFrame:
+    return pd.read_csv(f"data/{experiment}/capacities.csv", index_col=0)
+
+
+def check_same_capacities(solve: pd.DataFrame, step: pd.DataFrame, name: str):
+    ## a stepped run that stops integrating early shows up as missing / zero capacities here
+    assert list(step.index) == list(solve.index), \
+        f"{name}: stepping completed cycles {list(step.index)}, solve {list(solve.index)}"
+    assert np.allclose(step.to_numpy(), solve.to_numpy(), rtol=CAPACITY_RTOL), \
+        f"{name}: capacities differ\nsolve:\n{solve}\nstep:\n{step}"
+
+
+if __name__ == '__main__':
+    rows = []
+    for series, parallel in SIZES:
+        times = {}
+        caps = {}
+        for stepping in [False, True]:
+            experiment = f"bench/stepping_{series}x{parallel}_{'step' if stepping else 'solve'}"
+            run_pack(make_config(
+                NUM_SERIES=series, NUM_PARALLEL=parallel, NUM_CYCLES=CYCLES, C_RATE=1.0,
+                DISCRETE_PTS=30, STEPPING=stepping, EXPERIMENT=experiment, OVERWRITE=True, OVERRIDE=True, SEED=0
+            ))
+            times[stepping] = profile(experiment)["Mean Cycle Solve Time (s)"]
+            caps[stepping] = capacities(experiment)
+
+        check_same_capacities(caps[False], caps[True], f"{series}x{parallel}")
+        saving = 1 - times[True] / times[False]
+        rows.append((f"{series}x{parallel}", times[False], times[True], saving))
+
+    print(f"{'pack':>6} {'solve (s/cycle)':>16} {'step (s/cycle)':>16} {'saving':>8}")
+    for name, solve, step, saving in rows:
+        print(f"{name:>6} {solve:>16.3f} {step:>16.3f} {saving:>8.1%}")
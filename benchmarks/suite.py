@@ -0,0 +1,148 @@
+"""
+Benchmark suite: build time, per-segment solve/extraction time, peak RSS and output bytes per cycle
+across pack size, DISCRETE_PTS and C-rate. Fixed seeds, few cycles, every case in a fresh process.
+
+    python -m benchmarks.suite [--suite quick|full] [--save benchmarks/baselines/NAME.json]
+    python -m benchmarks.suite --compare benchmarks/baselines/NAME.json [--threshold 0.10]
+
+--compare re-runs the baseline's suite and exits non-zero if any metric got worse than the
+threshold (relative), so it can gate a change.
+"""
+import os
+import sys
+import json
+import platform
+import multiprocessing
+import concurrent.futures
+import numpy as np
+
+CYCLES = 3
+SEED = 1234
+
+## (series, parallel, DISCRETE_PTS, C_RATE)
+SUITES = {
+    "quick": [(s, s, 30, 1.0) for s in [1, 2, 5]]
+            + [(2, 2, pts, 1.0) for pts in [10, 100]]
+            + [(2, 2, 30, c) for c in [0.5, 2.0]],
+    "full":  [(s, s, 30, 1.0) for s in [1, 2, 3, 5, 7, 10]]
+            + [(5, 5, pts, 1.0) for pts in [10, 50, 100]]
+            + [(5, 5, 30, c) for c in [0.5, 2.0, 3.0]],
+}
+
+## metric -> larger is worse
+METRICS = ["Build (s)", "Solve per Segment (s)", "Extract per Segment (s)", "Peak RSS (MB)", "Output Bytes per Cycle"]
+
+
+def case_name(case) -> str:
+    series, parallel, pts, crate = case
+    return f"{series}x{parallel}_pts{pts}_C{crate}"
+
+
+def folder_bytes(folder: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(folder) for f in files)
+
+
+def run_case(case) -> dict:
+    ## runs in its own process: peak RSS is this case's alone
+    import resource
+    from src.runner import make_config, run_pack
+
+    series, parallel, pts, crate = case
+    experiment = f"bench/suite/{case_name(case)}"
+    pack = run_pack(make_config(
+        NUM_SERIES=series, NUM_PARALLEL=parallel, NUM_CYCLES=CYCLES, C_RATE=crate, DISCRETE_PTS=pts,
+        EXPERIMENT=experiment, OVERWRITE=True, OVERRIDE=False, SEED=SEED, METRICS=True,
+    ))
+
+    with open(f"data/{experiment}/metrics.json", 'r') as f:
+        metrics = json.load(f)
+
+    phases = metrics["Phases"]
+    segments = metrics["Segments"]
+    build = sum(p["Seconds"] for name, p in phases.items() if name.startswith("build"))
+
+    return {
+        "Build (s)": build,
+        "Solve per Segment (s)": float(np.mean([s.get("solve (s)", np.nan) for s in segments])),
+        "Extract per Segment (s)": float(np.mean([s.get("extract (s)", np.nan) for s in segments])),
+        ## ru_maxrss is KiB on Linux
+        "Peak RSS (MB)": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "Output Bytes per Cycle": folder_bytes(f"data/{experiment}") / max(pack.cycles, 1),
+        "Cycles": pack.cycles,
+        "Failure": pack.failure,
+    }
+
+
+def run_suite(suite: str) -> dict:
+    import pybamm
+
+    cases = SUITES[suite]
+    results = {}
+    ## one case at a time (timings), each in a fresh interpreter
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context, max_tasks_per_child=1) as executor:
+        for case, result in zip(cases, executor.map(run_case, cases)):
+            results[case_name(case)] = result
+            print(case_name(case), {k: round(v, 4) for k, v in result.items() if k in METRICS})
+
+    return {
+        "Suite": suite,
+        "Cycles": CYCLES,
+        "Seed": SEED,
+        "Environment": {
+            "Python": platform.python_version(),
+            "pybamm": pybamm.__version__,
+            "Platform": platform.platform(),
+            "CPUs": os.cpu_count(),
+        },
+        "Cases": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    regressions = []
+    print(f"{'case':<24} {'metric':<26} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, base in baseline["Cases"].items():
+        now = current["Cases"].get(name)
+        if now is None:
+            continue
+        for metric in METRICS:
+            old, new = base[metric], now[metric]
+            if not old or np.isnan(old) or np.isnan(new):
+                continue
+            change = new / old - 1
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append((name, metric, change))
+            print(f"{name:<24} {metric:<26} {old:>12.4g} {new:>12.4g} {change:>+8.1%}{flag}")
+
+    return regressions
+
+
+def argument(flag: str, default=None):
+    return sys.argv[sys.argv.index(flag) + 1] if flag in sys.argv else default
+
+
+if __name__ == '__main__':
+    baseline_path = argument("--compare")
+    threshold = float(argument("--threshold", 0.10))
+
+    baseline = None
+    if baseline_path is not None:
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)
+
+    suite = argument("--suite", baseline["Suite"] if baseline is not None else "quick")
+    results = run_suite(suite)
+
+    save_path = argument("--save")
+    if save_path is not None:
+        os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+        with open(save_path, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if baseline is not None:
+        regressions = compare(baseline, results, threshold)
+        print(f"{len(regressions)} regression(s) above {threshold:.0%}")
+        sys.exit(1 if len(regressions) != 0 else 0)
@@ -0,0 +1,53 @@
+"""
+Build (and one-cycle solve) time of the per-object Pack vs the stacked VectorPack.
+
+    python -m benchmarks.vectorised [--solve]
+"""
+import sys
+import time
+import pybamm
+
+from src.pack import Pack
+from src.vector_pack import VectorPack
+from src.runner import make_config, reset_globals
+
+SIZES = [(1, 1), (2, 2), (3, 3), (5, 5), (7, 7), (10, 10)]
+DISCRETE_PTS = 30
+
+
+def measure(engine, series, parallel, solve=False) -> dict:
+    reset_globals()
+    config = make_config(NUM_SERIES=series, NUM_PARALLEL=parallel, NUM_CYCLES=1, DISCRETE_PTS=DISCRETE_PTS)
+    model = pybamm.BaseModel()
+
+    start = time.perf_counter()
+    pack = engine(f"bench/vectorised_{engine.__name__}_{series}x{parallel}", parallel, series, model, {}, {}, overwrite=True)
+    pack.set_charge_protocol(config["NUM_CYCLES"], config["C_RATE"])
+    pack.set_cutoffs(config["VOLTAGE_WINDOW"], config["CURRENT_CUT_FACTOR"], config["CAPACITY_CUT_FACTOR"])
+    pack.build(DISCRETE_PTS)
+    result = {
+        "build": time.perf_counter() - start,
+        "states": pack.model.len_rhs_and_alg,
+    }
+
+    if solve:
+        start = time.perf_counter()
+        pack.cycler(config["HOURS"], config["TIME_PTS"])
+        result["cycle"] = time.perf_counter() - start
+
+    return result
+
+
+if __name__ == '__main__':
+    solve = "--solve" in sys.argv
+    pybamm.set_logging_level("WARNING")
+
+    print(f"{'pack':>6} {'states':>8} {'Pack build':>11} {'Vector build':>13} {'speed-up':>9}" + (f" {'Pack cycle':>11} {'Vector cycle':>13}" if solve else ""))
+    for series, parallel in SIZES:
+        obj = measure(Pack, series, parallel, solve)
+        vec = measure(VectorPack, series, parallel, solve)
+
+        line = f"{series}x{parallel:<4} {vec['states']:>8} {obj['build']:>10.2f}s {vec['build']:>12.2f}s {obj['build']/vec['build']:>8.1f}x"
+        if solve:
+            line += f" {obj['cycle']:>10.2f}s {vec['cycle']:>12.2f}s"
+        print(line)
@@ -1,85 +1,126 @@
 import numpy as np
 import pandas as pd 
-from matplotlib import pyplot as plt
-import json
-from src.pack import Pack
-from src.cell import Cell
-import sys
-import os
-import pickle
-
-DISCHARGE = "CC-discharge"
-CV_CHARGE = "CV-charge"
-CC_CHARGE = "CC-charge"
-CHARGE = "CV-charge|CC-charge"
-
-class Experiment:
-    def __init__(self, experiment: str):
-        self.path = f"data/{experiment}/"
-
-        sys.path.append(os.path.join(os.getcwd(), "src"))
+from src.results import Results, Topology, Query, TableIndex, DISCHARGE, CV_CHARGE, CC_CHARGE, CHARGE
+from src.decimate import choose_level, envelope, joined
+from src.collection import ExperimentCollection
 
-        self.pack = None
-        with open(self.path+"model.pkl", 'rb') as f:
-            self.pack = pickle.load(f)
+## numpy + pandas only: matplotlib is imported by the plotting methods, pybamm/Pack by get_pack()
 
-        self.profile = None
-        with open(self.path+"profile.json", 'r') as f:
-            self.profile = json.load(f)
+def pyplot():
+    from matplotlib import pyplot as plt
+    return plt
 
-        self.profile_str =json.dumps(self.profile, indent=4)
+## legends beyond this many lines are unreadable (and slow): skipped
+MAX_LEGEND = 20
 
-        self.data = pd.read_csv(self.path+"data.csv", index_col=[0,1,2])
-        self.caps = pd.read_csv(self.path+"capacities.csv", index_col=0)
-        self.CYCLE = self.data.index.get_level_values(0)
-        self.PROTOCOL = self.data.index.get_level_values(1)
+class Experiment(Results):
+    def __init__(self, experiment: str):
+        super().__init__(experiment)
 
-    def __str__(self):
-        return self.profile_str
+        self.profile_str = str(self)
+        self._selection = None
 
-    def select_cycles(self, cycles=[], protocols=[]):
-        CYCLE = self.data.index.get_level_values(0)
-        PROTOCOL = self.data.index.get_level_values(1)
+    @property
+    def selection(self) -> Query:
+        ## current selection (select_* narrow it, reset() drops it -- the cached table is never re-read).
+        ## select_cycles() first: built from only the selected segments; otherwise the whole table is loaded
+        if self._selection is None:
+            self._selection = self.query()
+        return self._selection
 
-        flts = [True, True]
-        if len(cycles) != 0:
-            flts[0] = CYCLE.isin(cycles)
-            #self.data = self.data.loc[self.CYCLE.isin(cycles)]
+    @property
+    def data(self) -> pd.DataFrame:
+        return self.selection.frame()
 
-        if len(protocols) != 0:
-            flts[1] = PROTOCOL.str.contains("|".join(protocols))
-            # print("|".join(protocols))
-            # self.data = self.data.loc[
-                # self.PROTOCOL.str.contains("|".join(protocols))
-            # ]
+    def select_cycles(self, cycles=[], protocols=[]):
+        if self._selection is None and self._base is None and self.index is not None and self.reader is not None:
+            ## nothing loaded yet: read only these segments through the sidecar index (Results.seek)
+            table = TableIndex(self.seek(cycles, protocols), (self.topology.series, self.topology.parallel))
+            self._selection = Query(table)
+            return
 
-        self.data = self.data.loc[flts[0] & flts[1]]
+        self._selection = self.selection.cycles(cycles).protocols(protocols)
 
     def select_attributes(self, attrs: list):
+        ## 'fuzzy' regex search over the column names (exact names: self.query().attributes(...))
         joined = '|'.join(attrs)
-        self.data = self.data.filter(regex=f'Time|{joined}')
+        self._selection = self.selection.match(joined)
+
+    def plotter(self, isolate_cycles=True, decimate="minmax", width=2000, envelope=None):
+        """
+        Plot every column of the current selection against 'Time' per cycle (isolate_cycles) or 'Global Time'.
+
+            decimate: 'minmax' / 'lttb' -- at most ~`width` (screen pixels) points per line, from the
+                      summaries cached in decimated/; every column is one line artist across all cycles.
+                      None -- full resolution, one line per column per cycle
+            envelope: a per-cell attribute ("Voltage", "Anode SEI Length"): draw the min / median / max
+                      across cells instead of one line per cell
+        """
+        plt = pyplot()
+        t = 'Time' if isolate_cycles else 'Global Time'
+
+        if envelope is not None:
+            self.__plot_envelope(plt, envelope, isolate_cycles, width)
+        elif decimate is None:
+            self.__plot_full(plt, t, isolate_cycles)
+        else:
+            selection = self.selection
+            columns = [c for c in selection.frame().columns if c not in ['Time', 'Global Time']]
+            segments = selection.segments
+
+            ## isolated: every segment spans the plot; global: they share the width
+            needed = width if isolate_cycles else width // max(len(segments), 1)
+            decimated = self.decimated(decimate, choose_level(needed))
+            lines = decimated.lines(columns, segments, selection.segment_rows(), global_time=not isolate_cycles)
+            for column, (x, y) in zip(columns, lines):
+                plt.plot(x, y, label=column, linewidth=0.8)
+
+        plt.xlabel(t)
+        if len(plt.gca().get_lines()) <= MAX_LEGEND:
+            plt.legend()
+        plt.show()
 
-    def plotter(self, isolate_cycles=True):
+    def __plot_full(self, plt, t, isolate_cycles):
         # Helper function to encapsulate the plotting logic
         def plot_columns(data, t, label_prefix=''):
             """Helper function to plot columns."""
             for col in data.columns.drop(['Time', 'Global Time']):
                 label = f'{label_prefix}{col}' if label_prefix else col
                 plt.plot(data[t], data[col], label=label)
-        
+
         if isolate_cycles:
-            t = 'Time'
             for cnum, group in self.data.groupby(level=0):
                 plot_columns(group, t, label_prefix=f'C{cnum}_')
         else:
-            t = 'Global Time'
             plot_columns(self.data, t)
 
-        plt.xlabel(t)
-        plt.legend()
-        plt.show()
+    def __plot_envelope(self, plt, attribute, isolate_cycles, width):
+        selection = self.selection
+        cube = selection.cube(attribute)
+        flat = cube.reshape(len(cube), -1)
+        bands = np.column_stack([np.nanmin(flat, axis=1), np.nanmedian(flat, axis=1), np.nanmax(flat, axis=1)])
+
+        table = selection.table
+        rows = selection.rows if selection.rows is not None else np.arange(len(table.frame))
+        t = table.times['Time' if isolate_cycles else 'Global Time'][rows]
+
+        ## split at segment boundaries: each segment is decimated on its own, then all are joined into one artist
+        segment = np.searchsorted(table.segments["Start"].to_numpy(), rows, side='right') - 1
+        splits = np.flatnonzero(np.diff(segment)) + 1
+        points = width if isolate_cycles else max(width // (len(splits) + 1), 2)
+
+        pieces = [envelope(t_s, b_s, points) for t_s, b_s in zip(np.split(t, splits), np.split(bands, splits))]
+        x, lower = joined([(p[0], p[1]) for p in pieces])
+        _, median = joined([(p[0], p[2]) for p in pieces])
+        _, upper = joined([(p[0], p[3]) for p in pieces])
+
+        plt.fill_between(x, lower, upper, alpha=0.3, label=f'{attribute} (min-max across cells)')
+        plt.plot(x, median, label=f'{attribute} (median)')
+
+    def plot_capacities(self, cycles=[], strings=[], envelope=False):
+        ## envelope=True: min / median / max across the cells instead of one scatter per cell
+        plt = pyplot()
 
-    def plot_capacities(self, cycles=[], strings=[]):
         cyc = self.caps.index
         cap_data = self.caps
         if len(cycles) != 0:
@@ -88,13 +129,18 @@ class Experiment:
 
         cell_list = self.caps.columns
         if len(strings) != 0:
-            cell_list = [self.pack.cells[0,i] for i in strings]
+            cell_list = [self.topology.names[0,i] for i in strings]
 
         fig, ax = plt.subplots()
 
-        # Plot data with a legend
-        for column in cell_list:
-            ax.scatter(cyc, cap_data[column], label=column)
+        if envelope:
+            cells = cap_data[[c for c in cell_list if c != 'Pack Capacity']].to_numpy(dtype=float)
+            ax.fill_between(cyc, np.nanmin(cells, axis=1), np.nanmax(cells, axis=1), alpha=0.3, label='min-max across cells')
+            ax.plot(cyc, np.nanmedian(cells, axis=1), label='median')
+        else:
+            # Plot data with a legend
+            for column in cell_list:
+                ax.scatter(cyc, cap_data[column], label=column)
 
         # Customize labels and title
         ax.set_xlabel('Cycle #')
@@ -106,27 +152,16 @@ class Experiment:
         ax.set_position([box.x0, box.y0 + box.height * 0.2,
                         box.width, box.height * 0.8])
 
-        ax.legend(loc='lower center', bbox_to_anchor=(0.5, -0.4), 
-                ncol=self.pack.series, fancybox=True, shadow=True)
+        if envelope or len(cell_list) <= MAX_LEGEND:
+            ax.legend(loc='lower center', bbox_to_anchor=(0.5, -0.4),
+                    ncol=self.topology.series, fancybox=True, shadow=True)
 
         # Add grid and show plot
         ax.grid()
         plt.show()
 
-    def get_capacities(self) -> pd.DataFrame:
-        return self.caps
-
-    def get_data(self) -> pd.DataFrame:
-        return self.data
-
-    def get_pack(self) -> Pack:
-        return self.pack
-
-    def get_profile(self) -> dict:
-        return self.profile
-
     def reset(self) -> None:
-        self.data = pd.read_csv(self.path+"data.csv", index_col=[0,1,2])
+        self._selection = None
 
     def to_csv(self, filename: str) -> None:
         self.data.to_csv(self.path+filename, index=True)
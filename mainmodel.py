@@ -6,6 +6,13 @@ NUM_SERIES = 1
 NUM_PARALLEL = 1
 NUM_CYCLES = 300
 
+## 'object' (one pybamm domain per particle) or 'vector' (stacked cells, for large packs)
+ENGINE = "object"
+
+## None, "exact" (simulate identical cells once) or a relative tolerance such as 0.01
+LUMPING = None
+DIFFUSION = "full"
+
 ### disable this flag and use I_INPUT to directly apply desired current
 USE_C_RATE = True
 C_RATE = 0.1
@@ -26,11 +33,56 @@ CAPACITY_CUT_FACTOR = 0.80
 ### Change 'time_pts' for more/fewer time outputs
 HOURS = (1./C_RATE) * 2.0 
 TIME_PTS = 100
+## None: TIME_PTS evenly spaced points. Adaptive: src/time_grid.py AdaptiveGrid arguments, e.g. {"tolerance": 1e-3}
+TIME_GRID = None
 DISCRETE_PTS = 100
 
+## Continue integration across protocol switches instead of re-initialising every segment
+STEPPING = False
+
+## DAE solver backend ('casadi' or 'idaklu') and overrides of its defaults (src/solvers.py)
+SOLVER = "casadi"
+SOLVER_OPTIONS = {}
+
 # Data is outputted to this subfolder of 'data/'.
 EXPERIMENT = "Single_0.1C_3.0_simpler"
 
+## Phase timings (build / solve / extract / write) and solver statistics -> metrics.json
+METRICS = True
+
+## Extrapolate SEI / lithium inventory over many cycles between simulated ones: None or CycleJumper arguments
+##   e.g. {"max_jump": 50, "tolerance": 2e-3}
+CYCLE_JUMPING = None
+
+## Checkpoint every N cycles / T minutes (None: off); RESUME continues EXPERIMENT from its last checkpoint
+CHECKPOINT_CYCLES = None
+CHECKPOINT_MINUTES = None
+RESUME = False
+
+## Seed of the parameter variators: an int (or [root, k]) makes the sampled pack reproducible.
+## None draws a fresh pack every run -- RESUME needs the SEED of the run being resumed
+SEED = None
+
+## Reuse discretised models of identical earlier builds (None to disable)
+BUILD_CACHE = "cache"
+
+## 'csv', 'parquet' (needs pyarrow) or 'hdf5' (needs pytables)
+OUTPUT_FORMAT = "csv"
+FLOAT32 = False
+
+## Background writer queue/batching/fsync, e.g. {"batch": 8, "fsync": "batch"} (src/background_writer.py)
+WRITER_OPTIONS = {}
+
+## Also write per-cell attributes as memory-mappable (time, series, parallel) arrays in cube/ (src/cube.py)
+CUBE = False
+
+## Which columns are written and how densely: None (everything) or src/output_spec.py OutputSpec arguments
+##   e.g. {"cell_variables": ["Voltage", "Anode SEI Length"], "every": 5, "profiles": ["Anode"]}
+OUTPUT_SPEC = None
+
+## Integrate Ah/Wh throughput as model states for the per-cycle summary.csv (else trapezoid rule on the output)
+SUMMARY_STATES = False
+
 #--------------------
 
 
@@ -38,20 +90,43 @@ EXPERIMENT = "Single_0.1C_3.0_simpler"
 ### DON'T CHANGE BELOW THIS!
 
 import pybamm
-from src.pack import Pack
+from src.runner import make_config, run_pack
 pybamm.set_logging_level("WARNING")
 
-model = pybamm.BaseModel()
-geo = {}
-parameters = {}
-
-pack = Pack(EXPERIMENT, NUM_PARALLEL, NUM_SERIES, model, geo, parameters)
-if USE_C_RATE:
-      pack.set_charge_protocol(NUM_CYCLES, C_RATE, use_c_rate=True)
-else:
-      pack.set_charge_protocol(NUM_CYCLES, I_INPUT, use_c_rate=False)
-pack.set_cutoffs(VOLTAGE_WINDOW, CURRENT_CUT_FACTOR, CAPACITY_CUT_FACTOR)
-
-pack.build(DISCRETE_PTS)
-pack.cycler(HOURS, TIME_PTS)
+config = make_config(
+      NUM_SERIES=NUM_SERIES,
+      NUM_PARALLEL=NUM_PARALLEL,
+      NUM_CYCLES=NUM_CYCLES,
+      ENGINE=ENGINE,
+      LUMPING=LUMPING,
+      DIFFUSION=DIFFUSION,
+      USE_C_RATE=USE_C_RATE,
+      C_RATE=C_RATE,
+      I_INPUT=I_INPUT,
+      VOLTAGE_WINDOW=VOLTAGE_WINDOW,
+      CURRENT_CUT_FACTOR=CURRENT_CUT_FACTOR,
+      CAPACITY_CUT_FACTOR=CAPACITY_CUT_FACTOR,
+      HOURS=HOURS,
+      TIME_PTS=TIME_PTS,
+      TIME_GRID=TIME_GRID,
+      DISCRETE_PTS=DISCRETE_PTS,
+      STEPPING=STEPPING,
+      SOLVER=SOLVER,
+      SOLVER_OPTIONS=SOLVER_OPTIONS,
+      EXPERIMENT=EXPERIMENT,
+      METRICS=METRICS,
+      CYCLE_JUMPING=CYCLE_JUMPING,
+      CHECKPOINT_CYCLES=CHECKPOINT_CYCLES,
+      CHECKPOINT_MINUTES=CHECKPOINT_MINUTES,
+      RESUME=RESUME,
+      SEED=SEED,
+      BUILD_CACHE=BUILD_CACHE,
+      OUTPUT_FORMAT=OUTPUT_FORMAT,
+      FLOAT32=FLOAT32,
+      WRITER_OPTIONS=WRITER_OPTIONS,
+      CUBE=CUBE,
+      OUTPUT_SPEC=OUTPUT_SPEC,
+      SUMMARY_STATES=SUMMARY_STATES,
+)
 
+pack = run_pack(config)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.query import TableIndex, Query
+
+
+def frame(columns: dict, rows=4) -> pd.DataFrame:
+    ## results table as the writers produce it: (Cycle, Protocol, Stamps) index, time columns first
+    index = pd.MultiIndex.from_tuples([(1, "CC-discharge", k) for k in range(rows)], names=["Cycle", "Protocol", "Stamps"])
+    data = {"Time": np.arange(rows, dtype=float), "Global Time": np.arange(rows, dtype=float)}
+    data.update(columns)
+    return pd.DataFrame(data, index=index)
+
+
+def test_cube_single_cell():
+    table = TableIndex(frame({"Cell 1,1 Voltage": [4.0, 3.9, 3.8, 3.7]}), (1, 1))
+    cube = Query(table).cube("Voltage")
+    assert cube.shape == (4, 1, 1)
+    assert cube.flags.writeable
+    np.testing.assert_allclose(cube[:, 0, 0], [4.0, 3.9, 3.8, 3.7])
+
+
+def test_cube_unrecorded_position_is_nan():
+    ## 1x2 pack with only Cell 1,1 recorded (OutputSpec.cells)
+    table = TableIndex(frame({"Cell 1,1 Voltage": [4.0, 3.9, 3.8, 3.7], "Cell 1,2 Anode SEI Length": [1., 2., 3., 4.]}), (1, 2))
+    cube = Query(table).cycles([1]).cube("Voltage")
+    assert cube.shape == (4, 1, 2)
+    np.testing.assert_allclose(cube[:, 0, 0], [4.0, 3.9, 3.8, 3.7])
+    assert np.isnan(cube[:, 0, 1]).all()
+
+
+def test_cube_unknown_attribute():
+    table = TableIndex(frame({"Cell 1,1 Voltage": [4.0, 3.9, 3.8, 3.7]}), (1, 1))
+    with pytest.raises(KeyError):
+        Query(table).cube("Anode SEI Length")
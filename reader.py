@@ -2,7 +2,9 @@ from experiment import Experiment, CHARGE, CC_CHARGE, CV_CHARGE, DISCHARGE
 
 ## LOADING AN EXPERIMENT (folder name within data/)
 squarepack = Experiment("5by5_100cycles_const")
-PACK = squarepack.get_pack()
+## topology from profile.json (series, parallel, cycles, voltage_window, names) -- no pybamm needed.
+## get_pack() rebuilds the full Pack from manifest.json on first call
+PACK = squarepack.get_topology()
 
 ## PRINTS THE `PROFILE.JSON` as string (operating condition data)
 print(squarepack)
@@ -27,6 +29,8 @@ squarepack.select_attributes(["SEI"])
 ### Plot the CURRENT dataset (i.e. after all predecessing filters)
 ### isolate_cycles =True:  Plot data for EACH cycle as separate line with respect to "local time"
 ###                =False: Plot data with respect to "global time" (no delineation by cycle #)
+### Lines are decimated to screen resolution (decimate='minmax' or 'lttb', cached in decimated/; None: full resolution)
+### envelope="Voltage" draws the min/median/max cell voltage instead of one line per cell
 squarepack.plotter(isolate_cycles=True)
 
 
@@ -1,9 +1,12 @@
+import numpy as np
 import pandas as pd
 from experiment import Experiment, CHARGE, CC_CHARGE, CV_CHARGE, DISCHARGE
 
 ## LOADING AN EXPERIMENT (folder name within data/)
 squarepack = Experiment("5by5_1C_2.8V")
-PACK = squarepack.get_pack()
+## topology from profile.json (series, parallel, cycles, voltage_window, names) -- no pybamm needed.
+## get_pack() rebuilds the full Pack from manifest.json on first call
+PACK = squarepack.get_topology()
 
 ## PRINTS THE `PROFILE.JSON` as string (operating condition data)
 # print(squarepack)
@@ -17,27 +20,15 @@ squarepack.select_cycles(
     protocols=[DISCHARGE]
 )
 
-### Selection of cell attributes (columns)
-### Uses 'fuzzy' regex searching -- so searching for ['SEI'] will choose ALL columns with SEI in the name
-### In other words, each cell's SEI data will be in the filtered table
-# squarepack.select_attributes(["SEI"])
-squarepack.select_attributes(["Cell.*?Voltage"])
-
-df = squarepack.get_data().copy(deep=True)
-voltages = df.filter(regex="Cell.*?Voltage")
+### Cell voltages of the selection as a (time, series, parallel) array -- no column name lookups
+voltages = squarepack.selection.cube("Voltage")
 lower_bound = PACK.voltage_window[0] / PACK.series
-last_volts = voltages.iloc[-1]
-filtered = last_volts[last_volts < lower_bound]
+last_volts = voltages[-1]
+rows, strings = np.nonzero(last_volts < lower_bound)
 
 result_df = pd.DataFrame({
-    'Column': filtered.index,
-    'OD-Voltage': filtered.values
+    'Column': [f"{name} Voltage" for name in PACK.names[rows, strings]],
+    'OD-Voltage': last_volts[rows, strings]
 })
 
 print(result_df)
-
-### Plot the CURRENT dataset (i.e. after all predecessing filters)
-### isolate_cycles =True:  Plot data for EACH cycle as separate line with respect to "local time"
-###                =False: Plot data with respect to "global time" (no delineation by cycle #)
-squarepack.plotter(isolate_cycles=True)
-
@@ -0,0 +1,150 @@
+import threading
+import collections
+
+
+class BackgroundWriter:
+    """
+    Single writer thread between Pack.cycler and the output files.
+
+    Segments and small writes (capacities / summary / profiles / cube) go through one FIFO, and only this
+    thread ever touches the files. Up to `batch` queued segments are written as one batch (Writer.write_many:
+    data first, then index rows) together with the small writes queued between them, which run right after
+    the batch in submission order (they go to other files, so only their own order matters).
+    submit_segment() returns immediately unless `max_segments` segments or ~`max_bytes` of data are queued,
+    in which case the solver waits (backpressure) instead of growing memory without bound.
+
+    fsync policy:
+        "never":      leave it to the OS
+        "batch":      fsync data + index after every batch
+        "checkpoint": fsync at checkpoints and on close (default)
+    """
+
+    FSYNC = ["never", "batch", "checkpoint"]
+
+    def __init__(self, writer, max_segments=8, max_bytes=256*1024**2, batch=4, fsync="checkpoint", metrics=None):
+        if fsync not in self.FSYNC:
+            raise ValueError(f"Unknown fsync policy '{fsync}'. Choose from {self.FSYNC}")
+
+        self.writer = writer
+        self.max_segments = max_segments
+        self.max_bytes = max_bytes
+        self.batch = batch
+        self.fsync = fsync
+        self.metrics = metrics
+
+        self.items = collections.deque()
+        self.condition = threading.Condition()
+        self.queued_bytes = 0
+        self.queued_segments = 0
+        self.pending = 0
+        self.closing = False
+        self.error = None
+
+        self.thread = threading.Thread(target=self.__run, name="pack-writer", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def size(data: dict) -> int:
+        ## rough in-memory size of a segment (8 bytes per value)
+        return 8 * sum(len(values) for values in data.values())
+
+    def submit_segment(self, data: dict, cycle: int, protocol: str):
+        self.__put(("segment", (data, cycle, protocol)), BackgroundWriter.size(data))
+
+    def submit(self, fn, *args):
+        ## small writes never wait: they're bounded by the segments submitted between them
+        self.__put(("call", (fn, args)), 0)
+
+    def __put(self, item, size: int):
+        segment = item[0] == "segment"
+        with self.condition:
+            while segment and self.queued_segments != 0 and (self.queued_segments >= self.max_segments
+                    or self.queued_bytes + size > self.max_bytes) and self.error is None:
+                self.condition.wait()
+            self.__raise()
+
+            self.items.append((item, size))
+            self.queued_bytes += size
+            self.queued_segments += segment
+            self.pending += 1
+            self.condition.notify_all()
+
+    def drain(self):
+        ## block until everything submitted so far is written
+        with self.condition:
+            while self.pending != 0 and self.error is None:
+                self.condition.wait()
+            self.__raise()
+
+    def sync(self):
+        ## drain + fsync (checkpoints)
+        self.drain()
+        if self.fsync != "never":
+            self.writer.sync()
+
+    def close(self):
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+        self.thread.join()
+
+        self.writer.close()
+        if self.fsync != "never":
+            self.writer.sync()
+        self.__raise()
+
+    def __raise(self):
+        if self.error is not None:
+            raise RuntimeError("Background writer failed") from self.error
+
+    def __next(self) -> list:
+        ## head of the queue: up to `batch` segments plus the small writes queued in between
+        with self.condition:
+            while len(self.items) == 0 and not self.closing:
+                self.condition.wait()
+
+            taken = []
+            segments = 0
+            while len(self.items) != 0:
+                segment = self.items[0][0][0] == "segment"
+                if segment and segments == self.batch:
+                    break
+                segments += segment
+                taken.append(self.items.popleft())
+            return taken
+
+    def __run(self):
+        while True:
+            taken = self.__next()
+            if len(taken) == 0:
+                return
+
+            try:
+                if self.error is None:
+                    self.__process([item for item, _ in taken])
+            except Exception as e:
+                ## surfaced to the cycler on its next submit/drain/close
+                self.error = e
+
+            with self.condition:
+                self.queued_bytes -= sum(size for _, size in taken)
+                self.queued_segments -= sum(item[0] == "segment" for item, _ in taken)
+                self.pending -= len(taken)
+                self.condition.notify_all()
+
+    def __process(self, items: list):
+        segments = [payload for kind, payload in items if kind == "segment"]
+        if len(segments) != 0:
+            if self.metrics is not None:
+                with self.metrics.phase("write: data"):
+                    self.writer.write_many(segments)
+            else:
+                self.writer.write_many(segments)
+
+            if self.fsync == "batch":
+                self.writer.sync()
+
+        for kind, payload in items:
+            if kind == "call":
+                fn, args = payload
+                fn(*args)
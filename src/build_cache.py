@@ -0,0 +1,85 @@
+import os
+import json
+import pickle
+import hashlib
+import numbers
+
+
+class BuildCache:
+    """
+    On-disk cache of discretised pack models (Pack.build output).
+
+    Keyed on topology, mesh size, cutoffs baked into the events and a hash of every
+    non-input parameter value, so a hit is exactly the model build() would have produced.
+    The directory is bounded by `max_bytes`; least recently used entries are evicted first.
+    """
+
+    def __init__(self, directory="cache", max_bytes=2*1024**3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(pack, discrete_pts) -> str:
+        import pybamm
+
+        parameters = {}
+        for name, value in pack.parameters.items():
+            if isinstance(value, str):
+                parameters[name] = value
+            elif isinstance(value, numbers.Number):
+                parameters[name] = repr(float(value))
+            else:
+                ## OCP functions
+                parameters[name] = f"{value.__module__}.{value.__qualname__}"
+
+        items = {
+            "pybamm": pybamm.__version__,
+            "series": pack.series,
+            "parallel": pack.parallel,
+            "discrete_pts": discrete_pts,
+            "voltage_window": list(pack.voltage_window),
+            "min_current": repr(float(pack.iappt * pack.current_cut)),
+            "parameters": sorted(parameters.items()),
+        }
+        items.update(pack._cache_items())
+
+        digest = hashlib.sha256(json.dumps(items, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pkl")
+
+    def load(self, key: str):
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as f:
+            model = pickle.load(f)
+
+        ## mtime doubles as the LRU clock
+        os.utime(path)
+        return model
+
+    def store(self, key: str, model):
+        path = self.path(key)
+        with open(path + ".tmp", 'wb') as f:
+            pickle.dump(model, f)
+        os.replace(path + ".tmp", path)
+
+        self.__evict()
+
+    def __evict(self):
+        entries = []
+        for f in os.listdir(self.directory):
+            if f.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.directory, f))
+                entries.append((stat.st_mtime, stat.st_size, f))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, f in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, f))
+            total -= size
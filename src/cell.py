@@ -7,8 +7,9 @@ import params as p
 class Cell:
     CELLS = list()
     def __init__(self, name: str,iapp: pybamm.Variable, charging: pybamm.Parameter, 
-            model: pybamm.BaseModel, geo:dict, parameters:dict
+            model: pybamm.BaseModel, geo:dict, parameters:dict, values=None, diffusion="full"
     ):
+        ## values: {"pos": Cathode.sample(), "neg": Anode.sample()} drawn beforehand (None -> drawn here)
 
         if name in self.CELLS:
             raise ValueError("Must have unique cell names/IDs")
@@ -19,8 +20,8 @@ class Cell:
 
         self.iapp = iapp
         
-        self.pos = Cathode(name + " Cathode", iapp)
-        self.neg = Anode(name + " Anode", iapp)
+        self.pos = Cathode(name + " Cathode", iapp, diffusion)
+        self.neg = Anode(name + " Anode", iapp, diffusion)
 
         ## cell-level 'reference' to sei length 
         self.sei = self.neg.sei_L
@@ -46,8 +47,9 @@ class Cell:
         self.pos.process_geometry(geo)
         self.neg.process_geometry(geo)
 
-        self.pos.attach_parameters(parameters)
-        self.neg.attach_parameters(parameters)
+        values = values or {}
+        self.pos.attach_parameters(parameters, values.get("pos"))
+        self.neg.attach_parameters(parameters, values.get("neg"))
 
         model.variables.update({
             self.voltage.name: self.vvolt,
@@ -0,0 +1,159 @@
+import os
+import concurrent.futures
+import numpy as np
+import pandas as pd
+
+from src.results import Results
+
+## run properties a comparison can be keyed by (derived from profile.json / Topology)
+KEYS = {
+    "C-rate":               lambda r: r.topology.c_rate,
+    "Voltage Window":       lambda r: "{:g}-{:g} V".format(*r.topology.voltage_window),
+    "Cell Voltage Window":  lambda r: "{:g}-{:g} V".format(*(v / r.topology.series for v in r.topology.voltage_window)),
+    "Series":               lambda r: r.topology.series,
+    "Parallel":             lambda r: r.topology.parallel,
+    "Temperature":          lambda r: r.topology.temperature,
+}
+
+## Pack sets its reference capacity after the second cycle (the first starts from the initial SOC)
+REFERENCE_CYCLE = 2
+
+
+def discover(root="data") -> list:
+    ## every folder under root (nested too, cached-result links included) holding a finished run's small files
+    found = []
+    for folder, _, files in os.walk(root, followlinks=True):
+        if "profile.json" in files and "capacities.csv" in files:
+            found.append(os.path.relpath(folder, root).replace(os.sep, "/"))
+    return sorted(found)
+
+
+class ExperimentCollection:
+    """
+    Many runs under one root (sweeps, ensembles, hand-made experiments), compared side by side.
+
+        runs = ExperimentCollection("data")
+        runs.select(**{"C-rate": 1.0}).fade()       ## capacity fade vs cycle, one column per run
+
+    Profiles, topology and capacity tables of every run load concurrently on construction (small files).
+    Time series stay on disk until a run's Results.data / query() is used -- map() does that for the
+    selected runs only. Runs that fail to load are skipped and listed in `errors`.
+    """
+
+    def __init__(self, root="data", experiments=None, workers=None):
+        self.root = root
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.errors = {}
+
+        names = experiments if experiments is not None else discover(root)
+        self.runs = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(Results, name, root): name for name in names}
+            for future in concurrent.futures.as_completed(futures):
+                name = futures[future]
+                try:
+                    self.runs[name] = future.result()
+                except Exception as e:
+                    self.errors[name] = repr(e)
+
+        self.runs = dict(sorted(self.runs.items()))
+
+    @classmethod
+    def _of(cls, root: str, runs: dict, workers: int) -> "ExperimentCollection":
+        ## sub-collection sharing the already loaded Results
+        collection = cls.__new__(cls)
+        collection.root = root
+        collection.workers = workers
+        collection.errors = {}
+        collection.runs = runs
+        return collection
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __iter__(self):
+        return iter(self.runs.values())
+
+    def __getitem__(self, name: str) -> Results:
+        return self.runs[name]
+
+    def keys(self, name: str) -> dict:
+        return {key: fn(self.runs[name]) for key, fn in KEYS.items()}
+
+    def overview(self) -> pd.DataFrame:
+        ## one row per run: comparison keys, cycles completed / requested, capacities
+        rows = {}
+        for name, run in self.runs.items():
+            caps = run.caps["Pack Capacity"]
+            rows[name] = {
+                **self.keys(name),
+                "Cycles": run.topology.completed,
+                "Requested Cycles": run.topology.cycles,
+                "First Capacity": caps.iloc[0] if len(caps) != 0 else np.nan,
+                "Last Capacity": caps.iloc[-1] if len(caps) != 0 else np.nan,
+                "Failure": run.profile.get("Failure"),
+            }
+        df = pd.DataFrame.from_dict(rows, orient='index')
+        df.index.name = "Experiment"
+        return df
+
+    def select(self, where=None, **criteria) -> "ExperimentCollection":
+        """
+        Runs whose KEYS match every criterion: a value, or a list of accepted values
+            runs.select(**{"C-rate": [0.5, 1.0], "Series": 5})
+        where: optional predicate on the Results (e.g. lambda r: r.topology.completed >= 100)
+        """
+        unknown = set(criteria) - set(KEYS)
+        if len(unknown) != 0:
+            raise KeyError(f"Unknown keys {sorted(unknown)}. Choose from {list(KEYS)}")
+
+        runs = {}
+        for name, run in self.runs.items():
+            keys = self.keys(name)
+            if all(keys[k] in (v if isinstance(v, (list, tuple, set)) else [v]) for k, v in criteria.items()):
+                if where is None or where(run):
+                    runs[name] = run
+        return ExperimentCollection._of(self.root, runs, self.workers)
+
+    def aligned(self, column="Pack Capacity", by=("C-rate", "Voltage Window"), source="capacities") -> pd.DataFrame:
+        """
+        One column per run, aligned on Cycle (NaN where a run has no such cycle), with (*by, Experiment)
+        column levels so groups compare directly: df.T.groupby(level="C-rate").mean().T
+            source: 'capacities' (capacities.csv) or 'summary' (summary.csv, read concurrently on demand)
+        """
+        if source == "capacities":
+            series = {name: run.caps[column] for name, run in self.runs.items()}
+        elif source == "summary":
+            series = self.__summaries(column)
+        else:
+            raise ValueError(f"Unknown source '{source}'. Choose from ['capacities', 'summary']")
+
+        by = list(by)
+        keys = [tuple(self.keys(name)[k] for k in by) + (name,) for name in series]
+        df = pd.concat(list(series.values()), axis=1, keys=keys, names=by + ["Experiment"]) if len(series) != 0 else pd.DataFrame()
+        df.index.name = "Cycle"
+        return df.sort_index()
+
+    def fade(self, by=("C-rate", "Voltage Window"), normalise=True) -> pd.DataFrame:
+        ## pack capacity vs cycle per run; normalise: relative to the reference (second-cycle) capacity
+        df = self.aligned("Pack Capacity", by=by)
+        if normalise and len(df) != 0:
+            reference = df.loc[REFERENCE_CYCLE] if REFERENCE_CYCLE in df.index else df.iloc[0]
+            df = df / reference
+        return df
+
+    def __summaries(self, column: str) -> dict:
+        def read(run):
+            path = run.path + "summary.csv"
+            if not os.path.exists(path):
+                return None
+            return pd.read_csv(path, index_col="Cycle")[column]
+
+        return {name: s for name, s in zip(self.runs, self.map(read)) if s is not None}
+
+    def map(self, fn, runs=None) -> list:
+        ## fn(Results) over the (selected) runs concurrently, in order. Heavy reads (run.data, run.query(),
+        ## run.cube()) happen only here, only for these runs
+        runs = list(self.runs.values()) if runs is None else runs
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(fn, runs))
@@ -0,0 +1,88 @@
+import os
+import json
+import numpy as np
+
+from src.writers import file_size, truncate_file, fsync_file
+
+## cube/ next to the data file: one raw (time, series, parallel) array per per-cell attribute,
+## appended segment by segment, row-aligned with the data table. Read back with np.memmap -- no parsing
+FOLDER = "cube"
+META_FILENAME = "cube.json"
+
+
+def cube_filename(attribute: str) -> str:
+    return attribute.replace(" ", "_") + ".bin"
+
+
+class CubeWriter:
+    """
+    Pack.set_cube(True): the per-cell columns of every segment also go to cube/<attribute>.bin
+    as contiguous (time, series, parallel) blocks. Unrecorded positions (OutputSpec.cells) are NaN.
+    Runs on the background writer thread like the other outputs (BackgroundWriter.submit).
+    """
+
+    def __init__(self, folder: str, shape: tuple, names, attributes: list, float32=False):
+        self.folder = os.path.join(folder, FOLDER)
+        self.shape = tuple(shape)
+        self.names = names
+        self.attributes = list(attributes)
+        self.dtype = np.dtype(np.float32 if float32 else np.float64)
+        self.paths = {a: os.path.join(self.folder, cube_filename(a)) for a in self.attributes}
+
+    def create(self):
+        os.makedirs(self.folder, exist_ok=True)
+        for path in self.paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+
+        meta = {
+            "Shape": list(self.shape),
+            "Dtype": self.dtype.name,
+            "Attributes": {a: cube_filename(a) for a in self.attributes},
+        }
+        with open(os.path.join(self.folder, META_FILENAME), 'w') as json_file:
+            json.dump(meta, json_file, indent=4)
+
+    def write(self, data: dict):
+        ## data: one segment's cycle_data (column -> values)
+        n = len(data["Time"])
+        for attribute, path in self.paths.items():
+            block = np.full((n,) + self.shape, np.nan, dtype=self.dtype)
+            for (i, j), name in np.ndenumerate(self.names):
+                values = data.get(f"{name} {attribute}")
+                if values is not None:
+                    block[:, i, j] = values
+            with open(path, 'ab') as f:
+                f.write(block.tobytes())
+
+    def sync(self):
+        for path in self.paths.values():
+            fsync_file(path)
+
+    def position(self) -> dict:
+        return {a: file_size(path) for a, path in self.paths.items()}
+
+    def truncate(self, position: dict):
+        for attribute, path in self.paths.items():
+            truncate_file(path, position.get(attribute, 0))
+
+
+def read_cube(folder: str, attribute: str):
+    ## read-only (time, series, parallel) memmap of one attribute; None if the run has no cube for it
+    cube_folder = os.path.join(folder, FOLDER)
+    meta_path = os.path.join(cube_folder, META_FILENAME)
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    if attribute not in meta["Attributes"]:
+        return None
+
+    path = os.path.join(cube_folder, meta["Attributes"][attribute])
+    shape = tuple(meta["Shape"])
+    dtype = np.dtype(meta["Dtype"])
+    rows = file_size(path) // (dtype.itemsize * int(np.prod(shape)))
+    if rows == 0:
+        return np.empty((0,) + shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(rows,) + shape)
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class CycleJumper:
+    """
+    Cycle extrapolation for long degradation runs (Pack.set_cycle_jumping).
+
+    Capacity fade is driven by slow states -- SEI length and the lithium inventory carried between
+    segments through the c0 inputs. After `settle` consecutive fully simulated cycles, those states
+    are pushed forward N cycles along their observed per-cycle drift and cycling continues from there.
+
+    N is set by an error controller:
+        - grows (x2, up to max_jump) while the capacity predicted for the first cycle after a jump
+          matches the simulated one within `tolerance` (relative to the reference capacity), shrinks otherwise
+        - N <= sqrt(2 tolerance C_ref / |d2C|), so the neglected curvature of the fade curve stays in tolerance
+        - N <= approach * (cycles left to CAPACITY_CUT_FACTOR at the current fade rate): jumps shrink
+          to nothing close to the cut, so the end-of-life cycle itself is always simulated
+        - no slow state moves by more than max_change (relative) in one jump
+    """
+
+    def __init__(self, settle=3, max_jump=50, tolerance=2e-3, max_change=0.05, approach=0.5, warmup=3):
+        if settle < 2:
+            raise ValueError("settle must be >= 2 (the drift needs two consecutive cycles)")
+
+        self.settle = settle
+        self.max_jump = max_jump
+        self.tolerance = tolerance
+        self.max_change = max_change
+        self.approach = approach
+        self.warmup = warmup
+
+        self.size = 2
+        self.history = []       ## [(cycle, {input: value}, capacity)] consecutive simulated cycles since the last jump
+        self.predicted = None   ## capacity predicted for the first simulated cycle after the last jump
+        self.jumps = []         ## [(from cycle, cycles skipped)]
+
+    def after_cycle(self, cycle: int, inps: dict, keys: list, capacity: float, capacity_ref: float,
+            capacity_cut: float, remaining: int) -> int:
+        """
+        Called at every cycle boundary with the end-of-cycle inputs. Returns the number of cycles jumped
+        (0: keep simulating); inps[keys] are then already extrapolated.
+        """
+        self.history.append((cycle, {k: np.asarray(inps[k], dtype=float) for k in keys}, capacity))
+
+        if len(self.history) == 1 and self.predicted is not None:
+            self.__control(abs(capacity - self.predicted) / capacity_ref)
+            self.predicted = None
+
+        if cycle < self.warmup or len(self.history) < self.settle:
+            return 0
+
+        (_, states_a, cap_a), (_, states_b, cap_b) = self.history[-2:]
+        fade = cap_b - cap_a
+
+        limits = [self.size, remaining]
+
+        if len(self.history) >= 3:
+            curvature = abs(self.history[-1][2] - 2 * self.history[-2][2] + self.history[-3][2])
+            if curvature > 0:
+                limits.append(np.sqrt(2 * self.tolerance * capacity_ref / curvature))
+
+        if fade < 0:
+            limits.append(self.approach * (cap_b - capacity_cut * capacity_ref) / -fade)
+
+        for k in keys:
+            drift = np.abs(states_b[k] - states_a[k])
+            scale = np.abs(states_b[k])
+            moving = drift > 0
+            if np.any(moving):
+                limits.append(np.min(self.max_change * scale[moving] / drift[moving]))
+
+        jump = int(min(limits))
+        if jump < 2:
+            return 0
+
+        for k in keys:
+            inps[k] = np.maximum(states_b[k] + jump * (states_b[k] - states_a[k]), 0)
+            if np.ndim(inps[k]) == 0:
+                inps[k] = float(inps[k])
+
+        self.predicted = cap_b + (jump + 1) * fade
+        self.jumps.append((cycle, jump))
+        self.history = []
+        print(f"Cycle jump: {cycle} -> {cycle + jump}")
+        return jump
+
+    def __control(self, error: float):
+        if error <= self.tolerance:
+            self.size = min(2 * self.size, self.max_jump)
+        else:
+            factor = max(0.25, np.sqrt(self.tolerance / error))
+            self.size = max(2, int(self.size * factor))
+
+    def JSON(self) -> dict:
+        return {
+            "Settle": self.settle,
+            "Max Jump": self.max_jump,
+            "Tolerance": self.tolerance,
+            "Max Change": self.max_change,
+            "Approach": self.approach,
+            "Warmup": self.warmup,
+            "Jumps": [[int(c), int(n)] for c, n in self.jumps],
+        }
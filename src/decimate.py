@@ -0,0 +1,213 @@
+import os
+import numpy as np
+
+## Screen-resolution summaries of the results table for plotting (Experiment.plotter).
+## Every (Cycle, Protocol) segment of every column is reduced to at most `level` points, once per
+## (method, level), and cached next to the data as decimated/<method>_<level>.npz
+METHODS = ["minmax", "lttb"]
+LEVELS = [16, 64, 256, 1024]
+FOLDER = "decimated"
+VERSION = 1
+
+
+def minmax(t: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    ## (points, columns) row indices: first and last row, plus the min and max of every bucket in between
+    n, m = y.shape
+    if n <= points:
+        return np.repeat(np.arange(n)[:, None], m, axis=1)
+
+    buckets = max((points - 2) // 2, 1)
+    edges = np.linspace(1, n - 1, buckets + 1).astype(int)
+    idx = [np.zeros((1, m), dtype=int)]
+    for a, b in zip(edges[:-1], edges[1:]):
+        if b <= a:
+            continue
+        lo = a + np.argmin(y[a:b], axis=0)
+        hi = a + np.argmax(y[a:b], axis=0)
+        idx.append(np.sort([lo, hi], axis=0))
+    idx.append(np.full((1, m), n - 1))
+    return np.concatenate(idx)
+
+
+def lttb(t: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    ## (points, columns) row indices: largest-triangle-three-buckets (Steinarsson 2013), all columns at once
+    n, m = y.shape
+    if n <= points or points < 3:
+        return np.repeat(np.arange(n)[:, None], m, axis=1)
+
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    cols = np.arange(m)
+    idx = np.empty((points, m), dtype=int)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    a = np.zeros(m, dtype=int)
+    for k in range(points - 2):
+        lo, hi = edges[k], edges[k + 1]
+        ## third vertex: average of the next bucket (the last point after the last bucket)
+        if k + 2 < len(edges):
+            avg_t = t[hi:edges[k + 2]].mean()
+            avg_y = y[hi:edges[k + 2]].mean(axis=0)
+        else:
+            avg_t = t[-1]
+            avg_y = y[-1]
+
+        ta, ya = t[a], y[a, cols]
+        tb, yb = t[lo:hi, None], y[lo:hi]
+        area = np.abs((ta - avg_t) * (yb - ya) - (ta - tb) * (avg_y - ya))
+        a = lo + np.argmax(area, axis=0)
+        idx[k + 1] = a
+
+    return idx
+
+
+DECIMATORS = {"minmax": minmax, "lttb": lttb}
+
+
+def envelope(t: np.ndarray, bands: np.ndarray, points: int):
+    ## bands (rows, 3): lower / median / upper across cells -> at most `points` buckets sharing one time axis:
+    ## (bucket start time, min of lower, mean of median, max of upper)
+    n = len(t)
+    if n <= points:
+        return t, bands[:, 0], bands[:, 1], bands[:, 2]
+
+    starts = np.unique(np.linspace(0, n, points + 1).astype(int)[:-1])
+    counts = np.diff(np.append(starts, n))
+    return (t[starts], np.minimum.reduceat(bands[:, 0], starts),
+            np.add.reduceat(bands[:, 1], starts) / counts, np.maximum.reduceat(bands[:, 2], starts))
+
+
+def signature(path: str) -> list:
+    ## [bytes, newest mtime] of the data file (or of every file of a dataset folder): stale cache check
+    if os.path.isdir(path):
+        files = [os.path.join(root, f) for root, _, names in os.walk(path) for f in names]
+    else:
+        files = [path] if os.path.exists(path) else []
+    return [sum(os.path.getsize(f) for f in files), max([os.path.getmtime(f) for f in files] + [0.])]
+
+
+def choose_level(needed: int) -> int:
+    ## smallest cached resolution with at least `needed` points per segment
+    for level in LEVELS:
+        if level >= needed:
+            return level
+    return LEVELS[-1]
+
+
+def joined(pieces: list):
+    ## [(x, y), ...] -> one NaN-separated (x, y): a single line artist for any number of segments
+    if len(pieces) == 0:
+        return np.array([]), np.array([])
+    gap = np.array([np.nan])
+    xs = [p for x, _ in pieces for p in (x, gap)][:-1]
+    ys = [p for _, y in pieces for p in (y, gap)][:-1]
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+class Decimated:
+    """
+    Decimated copy of a results table (src/query.py TableIndex), one block of rows per segment:
+        columns:         data column names
+        cycles, protocols, offsets: segment k owns rows offsets[k]:offsets[k+1]
+        shift:           Global Time - Time of every segment
+        rows:            (points, columns) positions into the full table (so selections still apply)
+        time, values:    (points, columns) segment-local time and value, float32
+    """
+
+    def __init__(self, arrays: dict):
+        self.columns = list(arrays["columns"])
+        self.cycles = arrays["cycles"]
+        self.protocols = arrays["protocols"]
+        self.offsets = arrays["offsets"]
+        self.shift = arrays["shift"]
+        self.rows = arrays["rows"]
+        self.time = arrays["time"]
+        self.values = arrays["values"]
+
+    @classmethod
+    def build(cls, table, method: str, level: int) -> "Decimated":
+        if method not in DECIMATORS:
+            raise ValueError(f"Unknown decimation '{method}'. Choose from {METHODS}")
+        decimate = DECIMATORS[method]
+
+        frame = table.frame
+        data_columns = table.data_columns
+        t = table.times["Time"]
+        g = table.times["Global Time"]
+
+        rows, offsets, shift = [], [0], []
+        times, values = [], []
+        for a, b in zip(table.segments["Start"], table.segments["Stop"]):
+            y = frame.iloc[a:b, data_columns].to_numpy(dtype=float)
+            idx = decimate(t[a:b], y, level)
+            rows.append((a + idx).astype(np.int32))
+            times.append(t[a:b][idx].astype(np.float32))
+            values.append(np.take_along_axis(y, idx, axis=0).astype(np.float32))
+            offsets.append(offsets[-1] + len(idx))
+            shift.append(g[a] - t[a])
+
+        m = len(data_columns)
+        return cls({
+            "columns": np.array(frame.columns[data_columns], dtype=str),
+            "cycles": table.segments["Cycle"].to_numpy(),
+            "protocols": table.segments["Protocol"].to_numpy().astype(str),
+            "offsets": np.array(offsets),
+            "shift": np.array(shift, dtype=float),
+            "rows": np.concatenate(rows) if rows else np.empty((0, m), dtype=np.int32),
+            "time": np.concatenate(times) if times else np.empty((0, m), dtype=np.float32),
+            "values": np.concatenate(values) if values else np.empty((0, m), dtype=np.float32),
+        })
+
+    @classmethod
+    def cached(cls, folder: str, source: str, table, method: str, level: int) -> "Decimated":
+        ## load decimated/<method>_<level>.npz if it was computed from this exact data file, else build + store.
+        ## table: callable returning the full TableIndex -- only called (the whole file read) to build
+        path = os.path.join(folder, FOLDER, f"{method}_{level}.npz")
+        stamp = np.array([VERSION] + signature(source), dtype=float)
+
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as npz:
+                if np.array_equal(npz["stamp"], stamp):
+                    return cls({k: npz[k] for k in npz.files})
+
+        decimated = cls.build(table(), method, level)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        ## write-then-rename: np.savez appends .npz to names without it
+        np.savez(path + ".tmp.npz", stamp=stamp, **decimated.arrays())
+        os.replace(path + ".tmp.npz", path)
+        return decimated
+
+    def arrays(self) -> dict:
+        return {
+            "columns": np.array(self.columns, dtype=str), "cycles": self.cycles, "protocols": self.protocols,
+            "offsets": self.offsets, "shift": self.shift, "rows": self.rows, "time": self.time, "values": self.values,
+        }
+
+    def lines(self, columns: list, segments=None, rows=None, global_time=False) -> list:
+        """
+        One NaN-joined (x, y) per column over the given (Cycle, Protocol) segments (DataFrame; None: all).
+        rows: Query.segment_rows() -- (Cycle, Protocol) -> row offsets within the segment (None: all rows).
+        isolate cycles: global_time=False.
+        """
+        keep = np.ones(len(self.cycles), dtype=bool)
+        if segments is not None:
+            wanted = set(zip(segments["Cycle"], segments["Protocol"]))
+            keep = np.array([(c, p) in wanted for c, p in zip(self.cycles, self.protocols)], dtype=bool)
+
+        lines = []
+        for column in columns:
+            k = self.columns.index(column)
+            pieces = []
+            for s in np.flatnonzero(keep):
+                a, b = self.offsets[s], self.offsets[s + 1]
+                x, y = self.time[a:b, k].astype(float), self.values[a:b, k]
+                if rows is not None:
+                    ## both decimators keep a segment's first row: rows[a] is the segment start
+                    local = rows.get((self.cycles[s], self.protocols[s]), np.array([], dtype=int))
+                    selected = np.isin(self.rows[a:b, k] - self.rows[a, k], local)
+                    x, y = x[selected], y[selected]
+                if global_time:
+                    x = x + self.shift[s]
+                pieces.append((x, y))
+            lines.append(joined(pieces))
+        return lines
@@ -0,0 +1,137 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from src.sweep import Sweep
+
+
+class CapacityStats:
+    """
+    Streaming aggregate of capacity fade over many pack realizations.
+    Fade is pack capacity relative to the cycle-2 reference (the same reference Pack uses for CAPACITY_CUT_FACTOR).
+    A realization that stopped at the capacity cut keeps its end-of-life fade for every later cycle, so late-cycle
+    statistics cover the whole population instead of only the packs still running.
+    """
+    PERCENTILES = [5, 25, 50, 75, 95]
+
+    def __init__(self, capacity_cut: float):
+        self.capacity_cut = capacity_cut
+        self.fade = {}      ## realization -> fade per simulated cycle
+        self.eol = {}       ## realization -> cycles to capacity cut (NaN if never reached)
+
+    def add(self, realization: int, caps: pd.DataFrame):
+        pack = caps["Pack Capacity"]
+        if len(pack) == 0:
+            self.eol[realization] = np.nan
+            return
+
+        ref = pack.loc[2] if 2 in pack.index else pack.iloc[0]
+        fade = pack / ref
+        self.fade[realization] = fade
+
+        below = fade.index[(fade.index > 2) & (fade <= self.capacity_cut)]
+        self.eol[realization] = below[0] if len(below) != 0 else np.nan
+
+    def fade_table(self) -> pd.DataFrame:
+        """
+        Per cycle:
+            Count:      realizations in the statistics (simulated this cycle, or already at end of life)
+            Surviving:  fraction of realizations still being simulated at this cycle
+            Mean, Std, P5..P95: over Count, end-of-life realizations carried forward at their final fade
+        Realizations that stopped early without reaching the cut (solver failure) only count while they ran.
+        """
+        cycles = sorted(set(cycle for fade in self.fade.values() for cycle in fade.index))
+        rows = {}
+        for cycle in cycles:
+            values = []
+            surviving = 0
+            for realization, fade in self.fade.items():
+                last = fade.index[-1]
+                if cycle <= last:
+                    surviving += 1
+                if cycle in fade.index:
+                    values.append(fade.loc[cycle])
+                elif cycle > last and not np.isnan(self.eol[realization]):
+                    values.append(fade.iloc[-1])
+
+            values = np.asarray(values)
+            row = {"Count": len(values), "Surviving": surviving / len(self.fade),
+                   "Mean": values.mean(), "Std": values.std()}
+            for q, v in zip(self.PERCENTILES, np.percentile(values, self.PERCENTILES)):
+                row[f"P{q}"] = v
+            rows[cycle] = row
+
+        df = pd.DataFrame.from_dict(rows, orient='index')
+        df.index.name = "Cycle"
+        return df
+
+    def eol_table(self) -> pd.DataFrame:
+        df = pd.DataFrame({"Cycles to Capacity Cut": pd.Series(self.eol, dtype=float)})
+        df.index.name = "Realization"
+        return df.sort_index()
+
+    def eol_summary(self) -> dict:
+        eol = np.asarray([v for v in self.eol.values() if not np.isnan(v)])
+        summary = {
+            "Realizations": len(self.eol),
+            "Reached Capacity Cut": len(eol),
+            "Censored": len(self.eol) - len(eol),
+        }
+        if len(eol) != 0:
+            summary["Mean"] = float(eol.mean())
+            summary.update({f"P{q}": float(v) for q, v in zip(self.PERCENTILES, np.percentile(eol, self.PERCENTILES))})
+        return summary
+
+
+class Ensemble(Sweep):
+    """
+    N realizations of the same heterogeneous pack, realization k seeded with stream [seed, k]
+    (np.random.SeedSequence(seed).spawn(N)[k]), so any single realization can be re-run on its own.
+
+        ensemble = Ensemble("porosity_mc", {"NUM_SERIES": 5, "NUM_PARALLEL": 5, "NUM_CYCLES": 300}, 200, seed=42)
+        ensemble.run(workers=64)
+
+    Aggregates are rewritten as realizations finish:
+        data/<name>/ensemble_fade.csv       mean / std / percentiles of capacity fade per cycle (end-of-life
+                                            realizations carried forward) + surviving fraction
+        data/<name>/ensemble_eol.csv        cycles to CAPACITY_CUT_FACTOR per realization
+        data/<name>/ensemble_summary.json   distribution of cycles to CAPACITY_CUT_FACTOR
+        data/<name>/ensemble_parameters.csv sampled per-cell parameters of every realization
+    """
+
+    def __init__(self, name: str, base: dict, realizations: int, seed: int):
+        base = dict(base)
+        ## variation only happens with OVERRIDE off
+        base.setdefault("OVERRIDE", False)
+
+        self.seed = seed
+        super().__init__(name, base, {"SEED": [[seed, k] for k in range(realizations)]})
+
+        self.stats = CapacityStats(self.jobs[0]["CAPACITY_CUT_FACTOR"])
+        self.params_path = f"data/{self.name}/ensemble_parameters.csv"
+        if os.path.exists(self.params_path):
+            os.remove(self.params_path)
+
+    def on_result(self, config: dict, result: dict):
+        if result["Status"] not in ("done", "cached"):
+            return
+
+        realization = config["SEED"][1]
+        folder = f"data/{config['EXPERIMENT']}"
+        self.stats.add(realization, pd.read_csv(f"{folder}/capacities.csv", index_col=0))
+
+        params = pd.read_csv(f"{folder}/cell_parameters.csv")
+        params.insert(0, "Realization", realization)
+        params.to_csv(self.params_path, mode='a', header=not os.path.exists(self.params_path), index=False)
+
+        self.export_stats()
+
+    def export_stats(self):
+        self.stats.fade_table().to_csv(f"data/{self.name}/ensemble_fade.csv", index=True)
+        self.stats.eol_table().to_csv(f"data/{self.name}/ensemble_eol.csv", index=True)
+
+        summary = {"Seed": self.seed}
+        summary.update(self.stats.eol_summary())
+        with open(f"data/{self.name}/ensemble_summary.json", 'w') as json_file:
+            json.dump(summary, json_file, indent=4)
@@ -0,0 +1,169 @@
+import os
+import glob
+import json
+import time
+import hashlib
+
+import params
+from src.variator import Variator
+from src.runner import apply_variations, reset_globals, run_pack
+
+## content-addressed registry: data/results/<hash>.json -> experiment folder holding that result
+REGISTRY = "data/results"
+RESULT_FILENAME = "result.json"
+
+POLICIES = ["overwrite", "resume", "skip", "error"]
+
+## configuration keys that don't change the simulated result
+UNHASHED = ["EXPERIMENT", "OVERWRITE", "RESUME", "POLICY", "BUILD_CACHE", "METRICS", "WRITER_OPTIONS",
+            "CHECKPOINT_CYCLES", "CHECKPOINT_MINUTES"]
+
+## files defining the model; editing any of them invalidates every cached result
+CODE_FILES = ["params.py", "consts.py", "src/*.py"]
+
+
+def code_digest() -> str:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    for pattern in CODE_FILES:
+        for path in sorted(glob.glob(os.path.join(root, pattern))):
+            with open(path, 'rb') as f:
+                digest.update(os.path.relpath(path, root).encode())
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def distributions(config: dict) -> dict:
+    ## every params.py Variator (after VARIATIONS) as its full (constructor, *args) spec
+    originals = apply_variations(config["VARIATIONS"])
+    try:
+        return {v.name: [repr(x) for x in (v.spec or (v.string, v.mean_value))]
+                    for v in vars(params).values() if isinstance(v, Variator)}
+    finally:
+        for attr, original in originals.items():
+            setattr(params, attr, original)
+        reset_globals()
+
+
+def config_hash(config: dict):
+    """
+    sha256 of everything that determines the result: topology, protocol, cutoffs, mesh, solver and output
+    options, Variator distributions, seed, pybamm version and the model source. None when the run is not
+    reproducible (parameters varied with no SEED), so it is never served from or added to the cache.
+    """
+    import pybamm
+
+    override = config["OVERRIDE"] if config["OVERRIDE"] is not None else Variator.OVERRIDE
+    if not override and config["SEED"] is None:
+        return None
+
+    items = {k: v for k, v in config.items() if k not in UNHASHED}
+    items["OVERRIDE"] = override
+    items["Distributions"] = distributions(config)
+    items["pybamm"] = pybamm.__version__
+    items["Code"] = code_digest()
+
+    ## tuples and lists hash the same (configurations round-trip through JSON manifests)
+    return hashlib.sha256(json.dumps(items, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def read_result(folder: str):
+    path = os.path.join(folder, RESULT_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_json(file_path: str, data: dict):
+    ## write-then-rename: concurrent launchers never see half a file
+    with open(file_path + ".tmp", 'w') as json_file:
+        json.dump(data, json_file, indent=4, default=repr)
+    os.replace(file_path + ".tmp", file_path)
+
+
+def lookup(key: str):
+    ## experiment folder holding a completed result with this hash (None: not cached)
+    path = os.path.join(REGISTRY, key + ".json")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        folder = json.load(f)["Folder"]
+
+    result = read_result(folder)
+    if result is None or result.get("Hash") != key or result.get("Status") != "done":
+        return None
+    return folder
+
+
+def launch(config: dict, policy=None) -> dict:
+    """
+    Non-interactive entry point: run `config` unless an identical completed result already exists.
+
+    policy (default: config["POLICY"], else 'overwrite' if OVERWRITE else 'error') decides what happens
+    when data/<EXPERIMENT> already holds something else:
+        overwrite: simulate from scratch (also ignores cached results)
+        resume:    continue from its checkpoint.pkl if there is one, otherwise simulate from scratch
+        skip:      leave it and return status 'skipped'
+        error:     raise FileExistsError
+
+    A completed result with the same hash is returned as status 'cached' without simulating; when it lives
+    under another experiment name, data/<EXPERIMENT> becomes a link to it.
+    """
+    policy = policy or config.get("POLICY") or ("overwrite" if config["OVERWRITE"] else "error")
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy '{policy}'. Choose from {POLICIES}")
+
+    start = time.perf_counter()
+    folder = f"data/{config['EXPERIMENT']}"
+    key = config_hash(config)
+    result = {"Experiment": config["EXPERIMENT"], "Hash": key}
+
+    if key is not None and policy != "overwrite":
+        existing = read_result(folder)
+        if existing is not None and existing.get("Hash") == key and existing.get("Status") == "done":
+            result.update({"Status": "cached", "Cycles": existing.get("Cycles"), "Folder": folder})
+            return result
+
+    resume = False
+    if os.path.exists(folder):
+        if policy == "skip":
+            result["Status"] = "skipped"
+            return result
+        if policy == "error":
+            raise FileExistsError(f"{folder} already exists (policy 'error')")
+        resume = policy == "resume" and not os.path.islink(folder) and os.path.exists(os.path.join(folder, "checkpoint.pkl"))
+
+    elif key is not None and policy != "overwrite":
+        cached = lookup(key)
+        if cached is not None:
+            os.makedirs(os.path.dirname(folder), exist_ok=True)
+            os.symlink(os.path.relpath(cached, os.path.dirname(folder)), folder)
+            result.update({"Status": "cached", "Cycles": read_result(cached).get("Cycles"), "Folder": cached})
+            return result
+
+    if os.path.islink(folder):
+        ## never simulate into a shared cached result
+        os.unlink(folder)
+
+    config = dict(config, OVERWRITE=True, RESUME=resume)
+    try:
+        pack = run_pack(config)
+        result["Status"] = "done" if pack.failure is None else "failed"
+        result["Cycles"] = pack.cycles
+        if pack.failure is not None:
+            result["Error"] = pack.failure
+    except Exception as e:
+        result["Status"] = "failed"
+        result["Error"] = repr(e)
+
+    result["Elapsed (s)"] = time.perf_counter() - start
+    result["Folder"] = folder
+
+    if os.path.isdir(folder):
+        write_json(os.path.join(folder, RESULT_FILENAME), dict(result, Config=config))
+        if key is not None and result["Status"] == "done":
+            os.makedirs(REGISTRY, exist_ok=True)
+            write_json(os.path.join(REGISTRY, key + ".json"), {"Folder": folder, "Config": config})
+
+    return result
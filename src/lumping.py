@@ -0,0 +1,79 @@
+import numpy as np
+from src.single_particle import SingleParticle
+
+LABELS = [label for label, _ in SingleParticle.PARAMETERS]
+
+
+def signature(values: dict) -> np.ndarray:
+    ## values: {"pos": Cathode.sample(), "neg": Anode.sample()}
+    return np.array([values["pos"][label] for label in LABELS] + [values["neg"][label] for label in LABELS])
+
+
+def same(a: np.ndarray, b: np.ndarray, tol) -> bool:
+    ## tol=None: bit-for-bit identical. Otherwise every parameter within a relative tolerance
+    if tol is None:
+        return np.array_equal(a, b)
+    return bool(np.all(np.abs(a - b) <= tol * np.abs(b)))
+
+
+def classes_of(signatures: list, tol) -> list:
+    ## greedy clustering of one series string: [[representative row, [rows], signature], ...]
+    classes = []
+    for i, sig in enumerate(signatures):
+        for cls in classes:
+            if same(sig, cls[2], tol):
+                cls[1].append(i)
+                break
+        else:
+            classes.append([i, [i], sig])
+
+    return classes
+
+
+def match(a: list, b: list, tol):
+    ## pair each class of string a with an unused class of string b (same multiplicity, same parameters)
+    ## returns {class # in a: class # in b}, or None if the strings are not equivalent
+    if len(a) != len(b):
+        return None
+
+    pairs = {}
+    for k, (_, rows, sig) in enumerate(a):
+        for m, (_, rows_b, sig_b) in enumerate(b):
+            if m not in pairs.values() and len(rows) == len(rows_b) and same(sig, sig_b, tol):
+                pairs[k] = m
+                break
+        else:
+            return None
+
+    return pairs
+
+
+def lump(samples: np.ndarray, tol=None):
+    """
+    samples: (series, parallel) array of {"pos": ..., "neg": ...}
+
+    Cells in one string carry the same current, so equivalent cells in a string collapse into one
+    representative with a multiplicity; equivalent strings then collapse into one representative string.
+
+    returns
+        strings: [(representative string j, [member strings]), ...]
+        classes: per string j, [[representative row, [rows], signature], ...]
+        pairs:   {member string j: {class # in j: class # in its representative string}}
+    """
+    series, parallel = samples.shape
+    classes = [classes_of([signature(samples[i, j]) for i in range(series)], tol) for j in range(parallel)]
+
+    strings = []
+    pairs = {}
+    for j in range(parallel):
+        for rep, members in strings:
+            paired = match(classes[j], classes[rep], tol)
+            if paired is not None:
+                members.append(j)
+                pairs[j] = paired
+                break
+        else:
+            strings.append((j, [j]))
+            pairs[j] = {k: k for k in range(len(classes[j]))}
+
+    return strings, classes, pairs
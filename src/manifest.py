@@ -0,0 +1,128 @@
+import os
+import json
+import numpy as np
+
+## manifest.json: everything post-processing needs from a finished run (replaces the pickled Pack, model.pkl).
+## Plain JSON -- readable without pybamm or the src modules; rebuild() re-creates the Pack from it on request
+FILENAME = "manifest.json"
+VERSION = 1
+
+
+def jsonable(value):
+    ## numpy scalars/arrays -> floats/lists, recursively
+    if isinstance(value, dict):
+        return {str(k): jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_manifest(folder: str, manifest: dict):
+    ## write-then-rename: a reader never sees half a manifest
+    file_path = os.path.join(folder, FILENAME)
+    with open(file_path + ".tmp", 'w') as json_file:
+        json.dump(jsonable(dict(manifest, Version=VERSION)), json_file, indent=4)
+    os.replace(file_path + ".tmp", file_path)
+
+
+def read_manifest(folder: str):
+    ## None for runs written before manifests existed (they only have model.pkl)
+    file_path = os.path.join(folder, FILENAME)
+    if not os.path.exists(file_path):
+        return None
+
+    with open(file_path, 'r') as f:
+        manifest = json.load(f)
+
+    if manifest.get("Version", 0) > VERSION:
+        raise ValueError(f"{file_path} is manifest version {manifest['Version']}; this code reads up to {VERSION}")
+    return manifest
+
+
+def cell_values(manifest: dict) -> np.ndarray:
+    ## (series, parallel) grid of {"pos": {...}, "neg": {...}} -- the Pack(values=...) argument
+    values = np.empty((manifest["Series"], manifest["Parallel"]), dtype=object)
+    for (i, j), name in np.ndenumerate(np.array(manifest["Names"], dtype=object)):
+        values[i, j] = manifest["Cells"][name]
+    return values
+
+
+def rebuild(folder: str, build=True):
+    """
+    Re-create the Pack of a finished run from its manifest: same engine, topology, per-cell parameter
+    values, protocol, cutoffs, model options and every set_* setting (output, writer, cube, checkpoints,
+    cycle jumping, metrics). build=True also discretises it (DISCRETE_PTS of the run).
+    Imports pybamm -- only call when the model itself is needed. The pack's folder is `folder` itself
+    (wherever Results(root=...) found it), and nothing in it is modified until the pack is run again.
+    Manifests written before the writer/cube/checkpoint/jumping keys existed keep the Pack defaults for those.
+
+    The final state of the run is on the rebuilt pack as `final_inputs` (c0 / SEI inputs) and
+    `final_state` (last solver state vector; `state_slices` maps model variables into it).
+    """
+    import pybamm
+    from src.pack import Pack
+    from src.vector_pack import VectorPack
+    from src.runner import reset_globals
+    from src.output_spec import OutputSpec
+    from src.time_grid import AdaptiveGrid
+    from src.cycle_jump import CycleJumper
+
+    engines = {"Pack": Pack, "VectorPack": VectorPack}
+
+    manifest = read_manifest(folder)
+    if manifest is None:
+        raise FileNotFoundError(f"No {FILENAME} in {folder}")
+
+    reset_globals()
+
+    protocol = manifest["Protocol"]
+    pack = engines[manifest["Engine"]](manifest["Experiment"], manifest["Parallel"], manifest["Series"],
+                pybamm.BaseModel(), {}, {}, overwrite=True, lumping=manifest["Lumping"],
+                diffusion=manifest["Diffusion"], values=cell_values(manifest), folder=os.path.normpath(folder))
+
+    pack.set_charge_protocol(protocol["Cycles"], protocol["I-app"], use_c_rate=False)
+    pack.set_cutoffs(tuple(manifest["Cutoffs"]["Voltage Window"]), manifest["Cutoffs"]["I-app Cut Factor"],
+                manifest["Cutoffs"]["Capacity Cut Factor"])
+    pack.set_output_format(manifest["Output Format"], float32=manifest["Float32"])
+    pack.set_solver(manifest["Solver"], manifest["Solver Options"])
+    pack.set_summary(manifest["Integrated Summary"])
+    ## JSON keys are the constructor arguments, title-cased ("Cell Variables" -> cell_variables)
+    pack.set_output_spec(OutputSpec(**{k.lower().replace(" ", "_"): v for k, v in manifest["Output Spec"].items()}))
+    if manifest["Time Grid"] is not None:
+        pack.set_time_grid(AdaptiveGrid(**{k.lower().replace(" ", "_"): v for k, v in manifest["Time Grid"].items()}))
+    if "Writer" in manifest:
+        pack.set_writer_options(**manifest["Writer"])
+        pack.set_cube(manifest["Cube"])
+        pack.set_checkpoints(manifest["Checkpoints"]["Cycles"], manifest["Checkpoints"]["Minutes"])
+        pack.set_metrics(manifest["Metrics"])
+        jumping = manifest["Cycle Jumping"]
+        if jumping is not None:
+            ## "Jumps" is what the run did, not a setting
+            pack.set_cycle_jumping(CycleJumper(**{k.lower().replace(" ", "_"): v for k, v in jumping.items() if k != "Jumps"}))
+
+    ## cycler() arguments of the run, for calling it the same way again
+    pack.hours = protocol["Hours"]
+    pack.time_pts = protocol["Time Points"]
+    pack.stepping = protocol["Stepping"]
+
+    pack.cycles = protocol["Completed"]
+    capacity = manifest["Capacity"]
+    pack.capacity_value = capacity["Pack"]
+    if capacity["Reference"] is not None:
+        pack.capacity_ref = capacity["Reference"]
+    for (i, j), cell in np.ndenumerate(pack.cells):
+        cell.capacity_value = capacity["Cells"][pack.names[i, j]]
+
+    pack.manifest = manifest
+    pack.final_inputs = manifest["State"]["Inputs"]
+    pack.final_state = None if manifest["State"]["Vector"] is None else np.array(manifest["State"]["Vector"])
+    pack.state_slices = manifest["State"]["Slices"]
+
+    if build:
+        pack.build(manifest["Discrete Points"])
+
+    return pack
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+
+class Metrics:
+    """
+    Phase timings and solver statistics of one Pack (metrics.json next to profile.json).
+
+        with pack.metrics.phase("solve"):
+            ...
+
+    Totals are kept per phase name; phases listed in SEGMENT_PHASES are also reported per protocol
+    segment, together with what the solution says about the integration. enabled=False turns every
+    call into a no-op and nothing is written.
+    """
+
+    SEGMENT_PHASES = ["solve", "extract", "state update", "summary"]
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.phases = {}        ## name -> [calls, seconds]
+        self.segments = []
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        ## thread-safe: output dumps run on the cycler's writer threads
+        with self.lock:
+            entry = self.phases.setdefault(name, [0, 0.])
+            entry[0] += 1
+            entry[1] += seconds
+            if name in self.SEGMENT_PHASES:
+                self.pending[name] = self.pending.get(name, 0.) + seconds
+
+    def end_segment(self, cycle: int, protocol: str, solution):
+        if not self.enabled:
+            return
+
+        with self.lock:
+            record = {"Cycle": cycle, "Protocol": protocol}
+            record.update({f"{name} (s)": seconds for name, seconds in self.pending.items()})
+            self.pending = {}
+
+        record.update(Metrics.solver_statistics(solution))
+        self.segments.append(record)
+
+    @staticmethod
+    def solver_statistics(solution) -> dict:
+        stats = {
+            "Termination": solution.termination,
+            "Time Points": len(solution.t),
+            ## the solver restarts its integrator per window (between events/steps)
+            "Integration Windows": len(solution.all_ts),
+        }
+        for attr in ["set_up_time", "solve_time", "integration_time"]:
+            value = getattr(solution, attr, None)
+            if value is not None:
+                ## pybamm.TimerTime -> seconds
+                stats[f"Solver {attr.replace('_', ' ').title()} (s)"] = float(getattr(value, "value", value))
+
+        ## IDAKLU reports step / residual / Jacobian counts; CasADi reports nothing
+        for name, value in (getattr(solution, "integration_statistics", None) or {}).items():
+            stats[f"Solver {name}"] = int(value) if isinstance(value, (int, float)) else str(value)
+
+        return stats
+
+    def JSON(self) -> dict:
+        return {
+            "Phases": {name: {"Calls": calls, "Seconds": seconds} for name, (calls, seconds) in self.phases.items()},
+            "Segments": self.segments,
+        }
+
+    def export(self, folder: str):
+        if not self.enabled:
+            return
+
+        file_path = os.path.join(folder, "metrics.json")
+        with open(file_path, 'w') as json_file:
+            json.dump(self.JSON(), json_file, indent=4)
+
+    def __getstate__(self):
+        ## Pack objects may still be pickled (user code, process pools); locks can't be
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class OutputSpec:
+    """
+    What Pack.cycler writes to the master data file, and how densely.
+
+        cell_variables: per-cell column suffixes, keys of CELL_VARIABLES
+        cells:          cell names to record ("Cell 1,1", ...); None -> every cell
+        strings:        string numbers (1-based) whose current is recorded; None -> every string
+        pack:           record Pack Voltage / Pack Current
+        every:          keep every n-th solver time point (a segment's first and last point are always kept).
+                        Ignored with an adaptive time grid (src/time_grid.py)
+        profiles:       electrodes ("Cathode", "Anode") whose full radial concentration profile is
+                        written to profiles.csv at the end of every segment (full diffusion only)
+
+        pack.set_output_spec(OutputSpec(cell_variables=["Voltage", "Anode SEI Length"], every=5, profiles=["Anode"]))
+    """
+
+    ## column suffix -> model variable suffix. Every source is a scalar per time point:
+    ## "... Concentration" columns hold the particle SURFACE concentration (same column names as before)
+    CELL_VARIABLES = {
+        "Cathode Concentration":            "Cathode Surface Concentration",
+        "Anode Concentration":              "Anode Surface Concentration",
+        "Cathode Average Concentration":    "Cathode Average Concentration",
+        "Anode Average Concentration":      "Anode Average Concentration",
+        "Anode SEI Length":                 "Anode SEI Length",
+        "Voltage":                          "Voltage",
+        "Anode Side Current":               "Anode Side Current",
+        "Anode Intercalation Current":      "Anode Intercalation Current",
+    }
+
+    DEFAULT_CELL_VARIABLES = [
+        "Cathode Concentration", "Anode Concentration", "Anode SEI Length",
+        "Voltage", "Anode Side Current", "Anode Intercalation Current",
+    ]
+
+    ELECTRODES = ["Cathode", "Anode"]
+
+    def __init__(self, cell_variables=None, cells=None, strings=None, pack=True, every=1, profiles=None):
+        self.cell_variables = list(cell_variables) if cell_variables is not None else list(self.DEFAULT_CELL_VARIABLES)
+        unknown = set(self.cell_variables) - set(self.CELL_VARIABLES)
+        if len(unknown) != 0:
+            raise ValueError(f"Unknown cell variables {sorted(unknown)}. Choose from {list(self.CELL_VARIABLES)}")
+
+        self.profiles = list(profiles or [])
+        unknown = set(self.profiles) - set(self.ELECTRODES)
+        if len(unknown) != 0:
+            raise ValueError(f"Unknown profile electrodes {sorted(unknown)}. Choose from {self.ELECTRODES}")
+
+        if int(every) < 1:
+            raise ValueError("every must be a positive integer")
+
+        self.cells = None if cells is None else set(cells)
+        self.strings = None if strings is None else set(strings)
+        self.pack = pack
+        self.every = int(every)
+
+    def records_cell(self, name: str) -> bool:
+        return self.cells is None or name in self.cells
+
+    def records_string(self, j: int) -> bool:
+        ## j: 0-based string index
+        return self.strings is None or (j + 1) in self.strings
+
+    def indices(self, n: int) -> np.ndarray:
+        ## decimated time-point indices of an n-point segment
+        idx = np.arange(0, n, self.every)
+        if n != 0 and idx[-1] != n - 1:
+            idx = np.append(idx, n - 1)
+        return idx
+
+    def JSON(self) -> dict:
+        return {
+            "Cell Variables": self.cell_variables,
+            "Cells": None if self.cells is None else sorted(self.cells),
+            "Strings": None if self.strings is None else sorted(self.strings),
+            "Pack": self.pack,
+            "Every": self.every,
+            "Profiles": self.profiles,
+        }
@@ -1,8 +1,12 @@
+import sys
 import json
 import traceback
 import pybamm
 import numpy as np
 from src.cell import Cell
+from src.particle_anode import Anode
+from src.particle_cathode import Cathode
+from src.lumping import lump
 from consts import BIND_VALUES, SET_MODEL_VARS, SET_OUTPUTS, T, THEORETICAL_CAPACITY
 import pandas as pd
 import os
@@ -10,7 +14,18 @@ import pickle
 import time
 
 from src.variator import Variator
-import concurrent.futures
+from src.writers import WRITERS, file_size, truncate_file
+from src.build_cache import BuildCache
+from src.solvers import SOLVERS, make_solver
+from src.output_spec import OutputSpec
+from src.time_grid import AdaptiveGrid
+from src.summary import CycleSummary
+from src.cycle_jump import CycleJumper
+from src.metrics import Metrics
+from src.background_writer import BackgroundWriter
+from src.manifest import write_manifest
+from src.cube import CubeWriter
+from src.single_particle import SingleParticle
 
 class Pack:
     STATEMAP = {
@@ -20,16 +35,22 @@ class Pack:
     }
 
     def __init__(self, experiment: str, parallel, series,
-        model:pybamm.BaseModel, geo:dict, parameters:dict
+        model:pybamm.BaseModel, geo:dict, parameters:dict, overwrite=None, lumping=None, diffusion="full", values=None, folder=None
     ):
 
+        ## overwrite=None asks on the terminal; True/False answer up front (batch jobs can't answer a prompt)
+        ## folder: where every output goes (None -> data/<experiment>; rebuild() passes the run's own folder)
         self.experiment = experiment
-        if os.path.exists(f"data/{self.experiment}"):
-            a = input("Experiment already exists. Data will be overwritten! 'Y' to proceed anyway: ")
-            if (a != 'Y'):
+        self.folder = f"data/{self.experiment}" if folder is None else folder
+        if os.path.exists(self.folder):
+            if overwrite is None and not sys.stdin.isatty():
+                raise ValueError("Experiment already exists and there is no terminal to confirm overwriting. Pass overwrite=True/False")
+            if overwrite is None:
+                overwrite = input("Experiment already exists. Data will be overwritten! 'Y' to proceed anyway: ") == 'Y'
+            if not overwrite:
                 raise ValueError("Experiment already exists!")
         else:
-            os.makedirs(f"data/{self.experiment}")
+            os.makedirs(self.folder)
 
         self.parallel = parallel
         self.series = series
@@ -59,14 +80,90 @@ class Pack:
         )
 
         self.shape = (series, parallel)
+        self.names = np.array([[f"Cell {i + 1},{j + 1}" for j in range(parallel)] for i in range(series)], dtype=object)
+
+        ## lumping: None, "exact" (identical cells/strings simulated once) or a relative tolerance
+        ## for near-identical ones. self.iapps then only holds the simulated (representative) strings,
+        ## each standing for string_weights[k] real strings; self.string_currents keeps all of them for output
+        self.lumping = lumping
+        ## diffusion: particle submodel, see SingleParticle.DIFFUSION_MODELS
+        self.diffusion = diffusion
+        ## values: (series, parallel) grid of {"pos": Cathode.sample(), "neg": Anode.sample()} to use instead of
+        ## drawing from params.py (src/manifest.py rebuild). None -> drawn
+        self.values = values
+        self.string_currents = self.iapps
+        self.string_weights = [1] * parallel
+        self.strings = None
+        self.samples = None
+
+        self.cells = self._create_cells(model, geo, parameters)
+
+        self.set_output_format("csv")
+        self.set_solver("casadi")
+        self.set_output_spec(OutputSpec())
+        self.set_time_grid(None)
+        self.set_summary(integrate=False)
+        self.set_checkpoints(None, None)
+        self.set_cycle_jumping(None)
+        self.set_metrics(True)
+        self.set_writer_options()
+        self.set_cube(False)
+
+
+    def _create_cells(self, model, geo, parameters):
+        if self.lumping is not None:
+            return self.__create_lumped_cells(model, geo, parameters)
 
         cells = np.empty(self.shape, dtype=Cell)
-        for i in range(series):
-            for j in range(parallel):
-                cells[i, j] = Cell(f"Cell {i + 1},{j + 1}", self.iapps[j], self.charging, model, geo, parameters)
+        for i in range(self.series):
+            for j in range(self.parallel):
+                cells[i, j] = Cell(self.names[i, j], self.iapps[j], self.charging, model, geo, parameters,
+                                   values=None if self.values is None else self.values[i, j], diffusion=self.diffusion)
+
+        ## (cell, multiplicity) of every simulated string
+        self.strings = [[(cells[i, j], 1) for i in range(self.series)] for j in range(self.parallel)]
+        return cells
 
-        self.cells = cells
+    def __create_lumped_cells(self, model, geo, parameters):
+        ## draw every cell's parameters first (same order as the unlumped pack), then only build representatives
+        samples = np.empty(self.shape, dtype=object)
+        for i in range(self.series):
+            for j in range(self.parallel):
+                if self.values is not None:
+                    samples[i, j] = self.values[i, j]
+                else:
+                    samples[i, j] = {"pos": Cathode.sample(), "neg": Anode.sample()}
+        self.samples = samples
 
+        tol = None if self.lumping == "exact" else float(self.lumping)
+        strings, classes, pairs = lump(samples, tol)
+
+        cells = np.empty(self.shape, dtype=Cell)
+        self.strings = []
+        self.string_weights = []
+        iapps = []
+        for rep, members in strings:
+            string = []
+            for rep_row, rows, _ in classes[rep]:
+                cell = Cell(self.names[rep_row, rep], self.iapps[rep], self.charging, model, geo, parameters,
+                            values=samples[rep_row, rep], diffusion=self.diffusion)
+                string.append((cell, len(rows)))
+
+            ## every position of every member string points at its representative Cell
+            for j in members:
+                for k, (_, rows, _) in enumerate(classes[j]):
+                    for i in rows:
+                        cells[i, j] = string[pairs[j][k]][0]
+
+            self.strings.append(string)
+            self.string_weights.append(len(members))
+            iapps.append(self.iapps[rep])
+
+        self.iapps = iapps
+
+        simulated = sum(len(string) for string in self.strings)
+        print(f"Lumping: simulating {simulated} of {self.series * self.parallel} cells ({len(self.strings)} of {self.parallel} strings)")
+        return cells
 
     def set_charge_protocol(self, cycles, crate_or_current, use_c_rate=True):
         self.cycles = cycles
@@ -82,6 +179,62 @@ class Pack:
         self.current_cut = current_cut
         self.capacity_cut = capacity_cut
 
+    def set_output_format(self, backend: str, float32=False):
+        ## backend in src/writers.py WRITERS: 'csv', 'parquet', 'hdf5'
+        if backend not in WRITERS:
+            raise ValueError(f"Unknown output format '{backend}'. Choose from {list(WRITERS)}")
+
+        self.output_format = backend
+        self.float32 = float32
+
+    def set_output_spec(self, spec: OutputSpec):
+        ## which variables / cells / strings are written and at what rate (src/output_spec.py)
+        self.output_spec = spec
+
+    def set_time_grid(self, grid: AdaptiveGrid):
+        ## None: TIME_PTS evenly spaced points per segment (decimated by the output spec)
+        ## AdaptiveGrid: dense solve, then a bounded set of points where the solution actually changes
+        self.time_grid = grid
+
+    def set_summary(self, integrate: bool):
+        ## integrate=True adds Pack Charge/Energy Throughput RHS states (exact Ah/Wh per cycle
+        ## in summary.csv); otherwise they are integrated from the solver output. Call before build()
+        self.integrate_summary = integrate
+
+    def set_checkpoints(self, every_cycles=None, every_minutes=None):
+        ## checkpoint.pkl at cycle boundaries every N cycles and/or T minutes (both None: off).
+        ## cycler(..., resume=True) continues from the last one
+        self.checkpoint_cycles = every_cycles
+        self.checkpoint_minutes = every_minutes
+
+    def set_cycle_jumping(self, jumper: CycleJumper):
+        ## None: simulate every cycle. CycleJumper: extrapolate the slow states (SEI, c0) over many cycles
+        self.jumper = jumper
+
+    def set_metrics(self, enabled: bool):
+        ## phase timings + solver statistics -> metrics.json (False: no instrumentation at all)
+        self.metrics = Metrics(enabled)
+
+    def set_writer_options(self, max_segments=8, max_bytes=256*1024**2, batch=4, fsync="checkpoint"):
+        ## background writer queue bound, segments per batch and fsync policy (src/background_writer.py)
+        if fsync not in BackgroundWriter.FSYNC:
+            raise ValueError(f"Unknown fsync policy '{fsync}'. Choose from {BackgroundWriter.FSYNC}")
+
+        self.writer_options = {"max_segments": max_segments, "max_bytes": max_bytes, "batch": batch, "fsync": fsync}
+
+    def set_cube(self, enabled: bool):
+        ## also write every recorded per-cell attribute as a (time, series, parallel) array
+        ## to cube/<attribute>.bin (src/cube.py), memory-mappable by Results.cube
+        self.write_cube = enabled
+
+    def set_solver(self, backend: str, options=None):
+        ## backend in src/solvers.py SOLVERS: 'casadi', 'idaklu'. options override that backend's defaults
+        if backend not in SOLVERS:
+            raise ValueError(f"Unknown solver backend '{backend}'. Choose from {list(SOLVERS)}")
+
+        self.solver_backend = backend
+        self.solver_options = options or {}
+
     
     # ------------
 
@@ -97,22 +250,126 @@ class Pack:
             'I-app Cut Factor': self.current_cut,
             'Capacity Cut Factor': self.capacity_cut,
             'Cycles': f"{i}/{self.cycles}",
+            'Output Format': self.output_format,
+            'Float32': self.float32,
+            'Writer': self.writer_options,
+            'Cube': self.write_cube,
+            'Stepping': self.stepping,
+            'Output Spec': self.output_spec.JSON(),
+            'Time Grid': 'uniform' if self.time_grid is None else self.time_grid.JSON(),
+            'Integrated Summary': self.integrate_summary,
+            'Checkpoint Cycles': self.checkpoint_cycles,
+            'Checkpoint Minutes': self.checkpoint_minutes,
+            'Cycle Jumping': None if self.jumper is None else self.jumper.JSON(),
+            'Metrics': self.metrics.enabled,
+            'Solver': self.solver_backend,
+            'Solver Options': self.solver_options,
+            'Failure': self.failure,
+            'Diffusion': self.diffusion,
+            'First Cycle Solve Time (s)': self.first_cycle_time,
+            'Mean Cycle Solve Time (s)': self.mean_cycle_time,
         }
 
         data.update(Variator.JSON())
 
-        file_path = f"data/{self.experiment}/profile.json"
+        file_path = f"{self.folder}/profile.json"
         with open(file_path, 'w') as json_file:
             json.dump(data, json_file, indent=4)
 
-    def build(self, discrete_pts):
-        
-        self.__setupDAE()
-        self.__IC_and_StopC()
+    def export_cell_parameters(self):
+        ## one row per cell: every parameter value it actually got (reproducibility of heterogeneous packs)
+        rows = {}
+        for (i, j), cell in np.ndenumerate(self.cells):
+            if self.samples is None:
+                rows[self.names[i, j]] = {**cell.pos.sampled_values(), **cell.neg.sampled_values()}
+            else:
+                ## lumped: what this position drew, and which representative simulated it
+                rows[self.names[i, j]] = {
+                    **{f"Cathode {label}": v for label, v in self.samples[i, j]["pos"].items()},
+                    **{f"Anode {label}": v for label, v in self.samples[i, j]["neg"].items()},
+                    "Representative": cell.name,
+                }
 
-        self.param_ob = pybamm.ParameterValues(self.parameters)
-        self.param_ob.process_model(self.model)
-        self.param_ob.process_geometry(self.geo)
+        df = pd.DataFrame.from_dict(rows, orient='index')
+        df.index.name = "Cell"
+        df.to_csv(f"{self.folder}/cell_parameters.csv", index=True)
+
+    def export_manifest(self, i, inps: dict, solution):
+        ## compact replacement of the pickled Pack (src/manifest.py): enough to post-process or rebuild the run
+        samples = self._cell_samples()
+        state = None
+        slices = {}
+        if solution is not None:
+            state = np.asarray(solution.y[:, -1]).ravel()
+            slices = {var.name: [[s.start, s.stop] for s in ys] for var, ys in self.model.y_slices.items()}
+
+        manifest = {
+            'Engine': type(self).__name__,
+            'Experiment': self.experiment,
+            'pybamm': pybamm.__version__,
+            'Series': self.series,
+            'Parallel': self.parallel,
+            'Names': self.names.tolist(),
+            'Lumping': self.lumping,
+            'Diffusion': self.diffusion,
+            'Discrete Points': self.discrete_pts,
+            'Cells': {self.names[row, col]: samples[row, col] for row, col in np.ndindex(self.shape)},
+            'Protocol': {
+                'Cycles': self.cycles,
+                'Completed': i,
+                'C-rate': self.c_rate,
+                'I-app': self.iappt,
+                'Hours': self.hours,
+                'Time Points': self.time_pts,
+                'Stepping': self.stepping,
+            },
+            'Cutoffs': {
+                'Voltage Window': self.voltage_window,
+                'I-app Cut Factor': self.current_cut,
+                'Capacity Cut Factor': self.capacity_cut,
+            },
+            'Output Format': self.output_format,
+            'Float32': self.float32,
+            'Output Spec': self.output_spec.JSON(),
+            'Time Grid': None if self.time_grid is None else self.time_grid.JSON(),
+            'Integrated Summary': self.integrate_summary,
+            'Solver': self.solver_backend,
+            'Solver Options': self.solver_options,
+            'Writer': self.writer_options,
+            'Cube': self.write_cube,
+            'Checkpoints': {'Cycles': self.checkpoint_cycles, 'Minutes': self.checkpoint_minutes},
+            'Cycle Jumping': None if self.jumper is None else self.jumper.JSON(),
+            'Metrics': self.metrics.enabled,
+            'Capacity': {
+                'Pack': getattr(self, "capacity_value", None),
+                'Reference': getattr(self, "capacity_ref", None),
+                'Cells': {self.names[row, col]: cell.capacity_value for (row, col), cell in np.ndenumerate(self.cells)},
+            },
+            'State': {'Inputs': inps, 'Vector': state, 'Slices': slices},
+            'Failure': self.failure,
+        }
+        write_manifest(self.folder, manifest)
+
+    def build(self, discrete_pts, cache=None):
+        self.discrete_pts = discrete_pts
+        with self.metrics.phase("build: equations"):
+            self.__setupDAE()
+            self.__IC_and_StopC()
+
+        ## cache: src.build_cache.BuildCache -- reuse the discretised model from an identical earlier build
+        if cache is not None:
+            with self.metrics.phase("build: cache load"):
+                key = cache.key(self, discrete_pts)
+                model = cache.load(key)
+            if model is not None:
+                print(f"Loaded discretised model from build cache ({key[:12]})")
+                self.model = model
+                return
+
+        with self.metrics.phase("build: parameter processing"):
+            self.param_ob = pybamm.ParameterValues(self.parameters)
+            self.param_ob.process_model(self.model)
+            self.param_ob.process_geometry(self.geo)
 
         self.model.variables.update({
             "Pack Voltage": self.voltage,
@@ -120,128 +377,408 @@ class Pack:
         })
         SET_MODEL_VARS(self.model, self.iapps)
 
+        self._discretise(discrete_pts)
 
-        particles = [] 
-        for cell in self.flat_cells:
-            particles.append(cell.pos)
-            particles.append(cell.neg)
+        if cache is not None:
+            with self.metrics.phase("build: cache store"):
+                cache.store(key, self.model)
 
-        mesh = pybamm.Mesh(self.geo, 
-            { p.domain: pybamm.Uniform1DSubMesh for p in particles },
-            { p.r: discrete_pts for p in particles }
-        )
 
-        disc = pybamm.Discretisation(mesh, 
-            { p.domain: pybamm.FiniteVolume() for p in particles }
-        )
-        disc.process_model(self.model)
+    def _discretise(self, discrete_pts):
+        ## reduced-order particles have no radial domain to mesh
+        particles = [] 
+        for cell in self.flat_cells:
+            particles.extend(p for p in (cell.pos, cell.neg) if p.diffusion == "full")
 
+        if len(particles) == 0:
+            with self.metrics.phase("build: discretisation"):
+                pybamm.Discretisation().process_model(self.model)
+            return
 
-    def cycler(self, hours, time_pts):
-        solver = pybamm.CasadiSolver(atol=1e-6, rtol=1e-5, root_tol=1e-6, dt_max=1e-10, max_step_decrease_count=10,
-                    root_method='casadi', extra_options_setup={"max_num_steps": 1000000}, 
-                    return_solution_if_failed_early=True)
+        with self.metrics.phase("build: meshing"):
+            mesh = pybamm.Mesh(self.geo, 
+                { p.domain: pybamm.Uniform1DSubMesh for p in particles },
+                { p.r: discrete_pts for p in particles }
+            )
 
-        time_steps = np.linspace(0, 3600 * hours, time_pts)
+        with self.metrics.phase("build: discretisation"):
+            disc = pybamm.Discretisation(mesh, 
+                { p.domain: pybamm.FiniteVolume() for p in particles }
+            )
+            disc.process_model(self.model)
+
+    def _cache_items(self) -> dict:
+        ## anything besides self.parameters that changes the discretised model (see BuildCache.key)
+        items = {"engine": type(self).__name__, "diffusion": self.diffusion, "string weights": self.string_weights,
+                 "summary states": self.integrate_summary}
+        if self.strings is not None:
+            items["multiplicities"] = [[m for _, m in string] for string in self.strings]
+        return items
+
+    def cycler(self, hours, time_pts, stepping=False, resume=False):
+        ## stepping=True: each protocol segment continues integration from the full final state
+        ## (concentrations, phi, side currents, string currents) of the previous one, with a single
+        ## integrator set-up for the whole run. Otherwise every segment re-solves from initial_conditions
+        ## resume=True: continue from <folder>/checkpoint.pkl (same pack, parameters and outputs).
+        ## Output files are cut back to the checkpoint, so nothing is duplicated; with stepping, the first
+        ## resumed segment starts from the checkpointed inputs (c0, SEI) like a non-stepping segment
+        solver = make_solver(self.solver_backend, self.solver_options)
+
+        solve_pts = time_pts if self.time_grid is None else self.time_grid.points(time_pts)
+        time_steps = np.linspace(0, 3600 * hours, solve_pts)
         
         inps = {}
-        outputs = self.__setup_initialization_and_outputs(inps)
+        outputs = self._setup_initialization_and_outputs(inps)
 
         ## insert at front
         cycle_columns = ['Time', 'Global Time'] + outputs
         cycle_data = {col: [] for col in cycle_columns}
 
-        self.__create_dataframe_files(cycle_columns, ["Pack Capacity"] + [c.name for c in self.cells[0]])
-
         prev_time = 0
         state = 0
         i = 0
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            try:
-                futures = []
-                while i < self.cycles:
-                    solution = solver.solve(self.model, time_steps, inputs=inps)
-
-                    print(f"Completed cycle {i+1}, {Pack.STATEMAP[state]} -- HIT {solution.termination}")                
-
-                    cycle_data['Time'] = solution.t
-                    cycle_data['Global Time'] = solution.t + prev_time
-                    prev_time += solution.t[-1]
-
-                    ## KEYS ARE SOLVED VARIABLES
-                    for var in outputs:
-                        data = solution[var].entries
-                        if len(data.shape) == 2:
-                            data = data[-1]
-                        cycle_data[var].extend(data)
-                    
-                    if len(futures) != 0: 
-                        concurrent.futures.wait(futures)
-                        futures.clear()
-
-                    ## 1) set initial conditions for the next cycle (with 'last' data from this cycle)
-                    ## 2) Store discharge capacity in sep capacity_dict
+        self.stepping = stepping
+        self.hours = hours
+        self.time_pts = time_pts
+        self.solve_times = []
+        self.failure = None
+        self.summary = CycleSummary(5.e-9)
+        solution = None
+
+        self.cube = None
+        if self.write_cube:
+            self.cube = CubeWriter(self.folder, self.shape, self.names,
+                                   self.output_spec.cell_variables, float32=self.float32)
+
+        if resume:
+            checkpoint = self.__load_checkpoint(cycle_columns)
+            inps.update(checkpoint["inps"])
+            i = checkpoint["cycle"]
+            prev_time = checkpoint["prev_time"]
+            print(f"Resuming {self.experiment} after cycle {i}")
+        else:
+            self.__create_dataframe_files(cycle_columns, ["Pack Capacity"] + list(self.names[0]))
+            self.export_cell_parameters()
+
+        last_checkpoint = (i, time.perf_counter())
+        cycle_start = prev_time
+
+        ## one writer thread owns every output file; the solver only waits when its queue is full
+        background = BackgroundWriter(self.writer, metrics=self.metrics, **self.writer_options)
+        try:
+            while i < self.cycles:
+                start = time.perf_counter()
+                with self.metrics.phase("solve"):
+                    if stepping:
+                        ## save=False: only this segment comes back (the run isn't accumulated in memory)
+                        last = None
+                        if solution is not None:
+                            ## step() hands an event-terminated solution straight back without integrating:
+                            ## restart from (a copy of) the final state as if the segment had run to time
+                            last = solution.last_state.copy()
+                            last.termination = "final time"
+                        solution = solver.step(last, self.model, 3600 * hours, npts=solve_pts, inputs=inps, save=False)
+                        t = solution.t - solution.t[0]
+                    else:
+                        solution = solver.solve(self.model, time_steps, inputs=inps)
+                        t = solution.t
+                self.solve_times.append((i+1, Pack.STATEMAP[state], time.perf_counter() - start))
+
+                print(f"Completed cycle {i+1}, {Pack.STATEMAP[state]} -- HIT {solution.termination}")                
+
+                with self.metrics.phase("extract"):
+                    idx = self._output_indices(solution, t, time_pts)
+                    cycle_data['Time'] = t[idx]
+                    cycle_data['Global Time'] = t[idx] + prev_time
+                    self._extract(solution, outputs, cycle_data, idx)
+                    profiles = self._profiles(solution)
+                prev_time += t[-1]
+
+                ## 1) set initial conditions for the next cycle (with 'last' data from this cycle)
+                ## 2) Store discharge capacity in sep capacity_dict
+                with self.metrics.phase("state update"):
                     capcut = self.__update_pack_state(inps, solution, i, state)
-                    #print(cycle_data)
-                    
-                    futures.append(executor.submit(self.__cycle_dump, cycle_data, i, state))
-                    if (state == 0):
-                        futures.append(executor.submit(self.__cap_dump, i))
-
-                    if (capcut):
-                        print(f"Pack capacity of {self.capacity_value} below {self.capacity_cut*100}% threshold")
-                        break
-
-                    cycle_data = {col: [] for col in cycle_columns}
-
-                    state = self.__next_protocol(inps, state)
-                    if (state == 0):
-                        i += 1
-                    
+                with self.metrics.phase("summary"):
+                    self.summary.add(state, self._summary_segment(solution, t))
+                self.metrics.end_segment(i+1, Pack.STATEMAP[state], solution)
+                #print(cycle_data)
+
+                ## everything handed to the writer is a snapshot (cycle_data is replaced below, never reused)
+                background.submit_segment(cycle_data, i+1, Pack.STATEMAP[state])
+                if self.cube is not None:
+                    background.submit(self.cube.write, cycle_data)
+                if len(profiles) != 0:
+                    background.submit(self.__profile_dump, profiles, i, state)
+                if (state == 0):
+                    background.submit(self.__cap_dump, self.__capacity_row(i))
+
+                if (capcut):
+                    background.submit(self.__summary_dump, self.summary.finish(i+1, self.capacity_value))
+                    print(f"Pack capacity of {self.capacity_value} below {self.capacity_cut*100}% threshold")
+                    break
+
+                cycle_data = {col: [] for col in cycle_columns}
+
+                state = self.__next_protocol(inps, state)
+                if (state == 0):
+                    background.submit(self.__summary_dump, self.summary.finish(i+1, self.capacity_value))
+                    i += 1
+
+                    if self.jumper is not None:
+                        jump = self.jumper.after_cycle(i, inps, self._slow_states(), self.capacity_value,
+                                    getattr(self, "capacity_ref", self.capacity_value), self.capacity_cut,
+                                    self.cycles - i - 1)
+                        if jump != 0:
+                            ## skipped cycles take as long as the last simulated one; stepping restarts from inps
+                            prev_time += jump * (prev_time - cycle_start)
+                            i += jump
+                            solution = None
+                    cycle_start = prev_time
+
+                    if self.__checkpoint_due(i, last_checkpoint):
+                        ## outputs of every finished cycle must be on disk before their positions are recorded
+                        with self.metrics.phase("checkpoint"):
+                            background.sync()
+                            self.__save_checkpoint(inps, i, prev_time, cycle_columns)
+                        last_checkpoint = (i, time.perf_counter())
+                
+        except Exception as e:
+            self.failure = repr(e)
+            print(traceback.format_exc())
+            print (f"FAILED AT CYCLE # {i+1}. Dumping collected data so far")
+
+        finally:
+            ## drains the queue, closes and (per fsync policy) syncs the files. A writer failure (disk full, IO error)
+            ## is recorded like any other: profile, manifest and metrics are still written so the run stays readable
+            try:
+                background.close()
             except Exception as e:
+                if self.failure is None:
+                    self.failure = repr(e.__cause__ or e)
                 print(traceback.format_exc())
-                print (f"FAILED AT CYCLE # {i+1}. Dumping collected data so far")
+                print(f"OUTPUT WRITER FAILED AFTER CYCLE # {i}. Data files may be incomplete")
 
-            finally:
-                self.cycles = i
-                self.export_profile(i)
-                with open(f"data/{self.experiment}/model.pkl", 'wb') as f:
-                    pickle.dump(self, f)
+            self.export_manifest(i, inps, solution)
+            self.cycles = i
+            self.__report_solve_times()
+            self.export_profile(i)
+            self.metrics.export(self.folder)
 
 
-    def __cycle_dump(self, data: dict, i: int, state: int):
-        subdf = pd.DataFrame(data)
-        subdf = pd.concat({(i+1, Pack.STATEMAP[state]): subdf})
-        subdf.to_csv(f"data/{self.experiment}/data.csv", mode='a', header=False, index=True)
+    ## output files (besides the data writer's) cut back on resume
+    CHECKPOINT_FILES = ["capacities.csv", "summary.csv", "profiles.csv"]
 
-    def __cap_dump(self, i: int):
-        with open(f"data/{self.experiment}/capacities.csv", mode='a') as f:
-            f.write(str(i+1))
-            f.write(f",{self.capacity_value}")
+    def __checkpoint_due(self, i: int, last_checkpoint: tuple) -> bool:
+        ## last_checkpoint: (cycle, perf_counter time) of the previous checkpoint (or the start of the run)
+        cycle, seconds = last_checkpoint
+        if self.checkpoint_cycles is not None and i - cycle >= self.checkpoint_cycles:
+            return True
+        if self.checkpoint_minutes is not None and time.perf_counter() - seconds >= 60 * self.checkpoint_minutes:
+            return True
+        return False
 
-            ## Only need to look at the first row of cells (first cell in each parallel branch)
-            ## Each cell in a branch will have the same 'real' capacity (same current integrated over time)
-            for cell in self.cells[0]:
-                f.write(f",{cell.capacity_value}")
+    def __save_checkpoint(self, inps: dict, i: int, prev_time: float, cycle_columns: list):
+        folder = self.folder
+        positions = {name: file_size(f"{folder}/{name}") for name in Pack.CHECKPOINT_FILES}
+        positions["writer"] = self.writer.position()
+        positions["cube"] = None
+        if self.cube is not None:
+            if self.writer_options["fsync"] != "never":
+                self.cube.sync()
+            positions["cube"] = self.cube.position()
+
+        checkpoint = {
+            "key": BuildCache.key(self, self.discrete_pts),
+            "output format": self.output_format,
+            "columns": cycle_columns,
+            "cycle": i,
+            "prev_time": prev_time,
+            "inps": dict(inps),
+            "capacity_ref": getattr(self, "capacity_ref", None),
+            "capacity_value": self.capacity_value,
+            "cell capacities": [cell.capacity_value for cell in self.flat_cells],
+            "summary": self.summary,
+            "jumper": self.jumper,
+            "solve_times": list(self.solve_times),
+            "positions": positions,
+        }
 
+        ## write-then-rename: a crash mid-write leaves the previous checkpoint intact
+        file_path = f"{folder}/checkpoint.pkl"
+        with open(file_path + ".tmp", 'wb') as f:
+            pickle.dump(checkpoint, f)
+        os.replace(file_path + ".tmp", file_path)
+        print(f"Checkpoint after cycle {i}")
+
+    def __load_checkpoint(self, cycle_columns: list) -> dict:
+        folder = self.folder
+        with open(f"{folder}/checkpoint.pkl", 'rb') as f:
+            checkpoint = pickle.load(f)
+
+        if checkpoint["key"] != BuildCache.key(self, self.discrete_pts):
+            raise ValueError("Checkpoint was written by a different pack configuration/parameters (check SEED)")
+        if checkpoint["output format"] != self.output_format or checkpoint["columns"] != cycle_columns:
+            raise ValueError("Checkpoint was written with different output settings")
+
+        ## drop whatever was written after the checkpoint; it is re-simulated
+        self.writer = WRITERS[self.output_format](folder, float32=self.float32)
+        self.writer.truncate(checkpoint["positions"]["writer"])
+        for name in Pack.CHECKPOINT_FILES:
+            truncate_file(f"{folder}/{name}", checkpoint["positions"][name])
+        if self.cube is not None:
+            if checkpoint["positions"].get("cube") is None:
+                raise ValueError("Checkpoint was written without the cube output")
+            self.cube.truncate(checkpoint["positions"]["cube"])
+
+        if checkpoint["capacity_ref"] is not None:
+            self.capacity_ref = checkpoint["capacity_ref"]
+        self.capacity_value = checkpoint["capacity_value"]
+        for cell, capacity in zip(self.flat_cells, checkpoint["cell capacities"]):
+            cell.capacity_value = capacity
+        self.summary = checkpoint["summary"]
+        self.jumper = checkpoint["jumper"]
+        self.solve_times = checkpoint["solve_times"]
+
+        return checkpoint
+
+    def __report_solve_times(self):
+        ## first cycle carries the integrator set-up; the rest is the per-cycle cost
+        per_cycle = {}
+        for cycle, _, seconds in self.solve_times:
+            per_cycle[cycle] = per_cycle.get(cycle, 0) + seconds
+
+        totals = list(per_cycle.values())
+        self.first_cycle_time = totals[0] if len(totals) > 0 else None
+        self.mean_cycle_time = float(np.mean(totals[1:])) if len(totals) > 1 else self.first_cycle_time
+
+        print(f"Solve time -- first cycle: {self.first_cycle_time} s, mean per later cycle: {self.mean_cycle_time} s "
+              f"({'stepping' if self.stepping else 'per-segment solve'})")
+
+    def __profile_dump(self, profiles: dict, i: int, state: int):
+        ## one row per particle: concentration at the (uniform) mesh cell centres, r/R in (0, 1)
+        df = pd.DataFrame.from_dict(profiles, orient='index')
+        n = df.shape[1]
+        df.columns = [f"r/R={(k + 0.5) / n:.4f}" for k in range(n)]
+        df.index.name = "Particle"
+        df.insert(0, "Protocol", Pack.STATEMAP[state])
+        df.insert(0, "Cycle", i+1)
+
+        file_path = f"{self.folder}/profiles.csv"
+        with self.metrics.phase("write: profiles"):
+            df.to_csv(file_path, mode='a', header=not os.path.exists(file_path), index=True)
+
+    def __summary_dump(self, row: dict):
+        file_path = f"{self.folder}/summary.csv"
+        with self.metrics.phase("write: summary"):
+            pd.DataFrame([row]).to_csv(file_path, mode='a', header=not os.path.exists(file_path), index=False)
+
+    def __capacity_row(self, i: int) -> list:
+        ## Only need to look at the first row of cells (first cell in each parallel branch)
+        ## Each cell in a branch will have the same 'real' capacity (same current integrated over time)
+        return [i+1, self.capacity_value] + [cell.capacity_value for cell in self.cells[0]]
+
+    def __cap_dump(self, row: list):
+        with open(f"{self.folder}/capacities.csv", mode='a') as f:
+            f.write(",".join(str(value) for value in row))
             f.write('\n')
 
     def __create_dataframe_files(self, cycle_columns, cell_names):
-        pd.DataFrame(
-            columns=cycle_columns, 
-            index=pd.MultiIndex.from_product([[], [], []], names=["Cycle", "Protocol", "Stamps"])
-        ).to_csv(f"data/{self.experiment}/data.csv", index=True)
+        self.writer = WRITERS[self.output_format](self.folder, float32=self.float32)
+        self.writer.create(cycle_columns)
+        if self.cube is not None:
+            self.cube.create()
+
+        for name in ["profiles.csv", "summary.csv"]:
+            if os.path.exists(f"{self.folder}/{name}"):
+                os.remove(f"{self.folder}/{name}")
 
         pd.DataFrame(
             columns=cell_names,
             index=pd.MultiIndex.from_product([[]], names=["Cycle"])
-        ).to_csv(f"data/{self.experiment}/capacities.csv", index=True)
+        ).to_csv(f"{self.folder}/capacities.csv", index=True)
     
 
-    def __setup_initialization_and_outputs(self, inps: dict):
-        outputs = ["Pack Voltage", "Pack Current"]
-        SET_OUTPUTS(outputs, self.iapps)
+    def _extract(self, solution: pybamm.Solution, outputs: list, cycle_data: dict, idx: np.ndarray):
+        ## KEYS ARE OUTPUT COLUMNS; self.sources maps them to solved (scalar) variables, shared by lumped cells
+        ## idx: decimated time points (OutputSpec.indices)
+        extracted = {}
+        for column in outputs:
+            var = self.sources.get(column, column)
+            if var not in extracted:
+                extracted[var] = solution[var].entries[idx]
+            cycle_data[column].extend(extracted[var])
+
+    def _cell_samples(self) -> np.ndarray:
+        ## (series, parallel) grid of the parameter values every position got, in Pack(values=...) form
+        if self.samples is not None:
+            return self.samples
+
+        samples = np.empty(self.shape, dtype=object)
+        for (i, j), cell in np.ndenumerate(self.cells):
+            samples[i, j] = {
+                key: {label: getattr(particle, attr).value for label, attr in SingleParticle.PARAMETERS}
+                for key, particle in [("pos", cell.pos), ("neg", cell.neg)]
+            }
+        return samples
+
+    def _slow_states(self) -> list:
+        ## inputs carrying the slow (degradation) states from cycle to cycle -- extrapolated by cycle jumping
+        return [k for cell in self.flat_cells for k in (cell.pos.c0.name, cell.neg.c0.name, cell.neg.sei0.name)]
+
+    def _summary_segment(self, solution: pybamm.Solution, t: np.ndarray) -> dict:
+        ## everything CycleSummary needs from one segment (independent of the output spec)
+        segment = {
+            "t": t,
+            "voltage": solution["Pack Voltage"].entries,
+            "current": solution["Pack Current"].entries,
+            "strings": self._string_current_entries(solution),
+            "cell voltages": self._cell_final(solution, "Voltage"),
+            "sei": self._cell_final(solution, "Anode SEI Length"),
+        }
+        if self.integrate_summary:
+            for key, name in [("charge", "Pack Charge Throughput"), ("energy", "Pack Energy Throughput")]:
+                entries = solution[name].entries
+                segment[key] = float(entries[-1] - entries[0])
+        return segment
+
+    def _string_current_entries(self, solution: pybamm.Solution) -> np.ndarray:
+        ## (strings, time); lumped strings read their representative
+        return np.array([solution[self.cells[0, j].iapp.name].entries for j in range(self.parallel)])
+
+    def _cell_final(self, solution: pybamm.Solution, suffix: str) -> np.ndarray:
+        ## end-of-segment value of a CELL_VARIABLES column for every cell position (row-major)
+        values = {}
+        for cell in self.flat_cells:
+            values[cell] = solution[f"{cell.name} {OutputSpec.CELL_VARIABLES[suffix]}"].entries[-1]
+        return np.array([values[cell] for cell in self.cells.flatten()])
+
+    def _output_indices(self, solution: pybamm.Solution, t: np.ndarray, time_pts: int) -> np.ndarray:
+        ## time points of this segment that get written (the last one is the event/final state)
+        if self.time_grid is None:
+            return self.output_spec.indices(len(t))
+
+        values = [solution[var].entries for var in self.time_grid.variables]
+        return self.time_grid.select(t, values, time_pts)
+
+    def _profiles(self, solution: pybamm.Solution) -> dict:
+        ## end-of-segment radial profiles requested by the output spec: {particle name: concentrations}
+        profiles = {}
+        for cell in self.flat_cells:
+            for particle in [cell.pos, cell.neg]:
+                electrode = particle.name[len(cell.name) + 1:]
+                if electrode in self.output_spec.profiles and particle.diffusion == "full":
+                    profiles[particle.name] = solution[particle.c.name].entries[:, -1]
+        return profiles
+
+    def _setup_initialization_and_outputs(self, inps: dict):
+        spec = self.output_spec
+        outputs = ["Pack Voltage", "Pack Current"] if spec.pack else []
+        SET_OUTPUTS(outputs, [current for j, current in enumerate(self.string_currents) if spec.records_string(j)])
+
+        self.sources = {}
+        for j, current in enumerate(self.string_currents):
+            self.sources[current.name] = self.cells[0, j].iapp.name
 
         BIND_VALUES(inps, 
             {
@@ -251,8 +788,23 @@ class Pack:
             }
         )
         
+        for (i, j), cell in np.ndenumerate(self.cells):
+            if not spec.records_cell(self.names[i, j]):
+                continue
+            for suffix in spec.cell_variables:
+                ## a lumped position reads its representative: "Cell 2,1 Anode SEI Length" <- "Cell 1,1 Anode SEI Length"
+                column = f"{self.names[i, j]} {suffix}"
+                outputs.append(column)
+                self.sources[column] = f"{cell.name} {OutputSpec.CELL_VARIABLES[suffix]}"
+
+        ## a column holds one value per time point: a source left on a radial domain (e.g. an average
+        ## pybamm didn't reduce) would be read as a profile of that many points
+        for cell in self.flat_cells:
+            for source in OutputSpec.CELL_VARIABLES.values():
+                if self.model.variables[f"{cell.name} {source}"].domain != []:
+                    raise ValueError(f"Output source '{cell.name} {source}' is not a scalar per time point")
+
         for cell in self.flat_cells:
-            SET_OUTPUTS(outputs, [cell.pos.c, cell.neg.c, cell.sei, cell.voltage, cell.neg.i_sei, cell.neg.i_int])
             BIND_VALUES(inps, 
                 {
                     cell.pos.c0: cell.pos.c0.value,
@@ -265,16 +817,7 @@ class Pack:
 
 
     def __update_pack_state(self, inps: dict, solution: pybamm.Solution, i: int, state: int):
-        for cell in self.flat_cells:
-            BIND_VALUES(inps, 
-                {
-                    cell.pos.c0: solution[cell.pos.c.name].entries[-1][-1],
-                    cell.neg.c0: solution[cell.neg.c.name].entries[-1][-1],
-                    cell.neg.sei0: solution[cell.neg.sei_L.name].entries[-1],
-                }
-            )
-            if (state == 0):
-                cell.capacity_value = solution[cell.capacity.name].entries[-1]
+        self._update_cell_state(inps, solution, state)
 
         self.capacity_value = self.__compute_pack_capacity()
         if (i == 1):
@@ -288,6 +831,20 @@ class Pack:
         
         return False
 
+    def _update_cell_state(self, inps: dict, solution: pybamm.Solution, state: int):
+        for cell in self.flat_cells:
+            BIND_VALUES(inps, 
+                {
+                    cell.pos.c0: cell.pos.final_concentration(solution),
+                    cell.neg.c0: cell.neg.final_concentration(solution),
+                    cell.neg.sei0: solution[cell.neg.sei_L.name].entries[-1],
+                }
+            )
+            if (state == 0):
+                ## capacity integral is carried over between segments when stepping
+                capacity = solution[cell.capacity.name].entries
+                cell.capacity_value = capacity[-1] - capacity[0]
+
     def __compute_pack_capacity(self):
         cap = 0
         for col in range(self.parallel):
@@ -332,10 +889,14 @@ class Pack:
 
 
 
+    def _string_voltage(self, j: int):
+        voltage = 0
+        for cell, multiplicity in self.strings[j]:
+            voltage += cell.vvolt if multiplicity == 1 else multiplicity * cell.vvolt
+        return voltage
+
     def __setupDAE(self):
-        self.voltage = 0
-        for i in range(self.series):
-            self.voltage += self.cells[i, 0].vvolt
+        self.voltage = self._string_voltage(0)
 
         # cutoffs[1] (max V-cut is effectively the vlock)
         # 'boolean algebra' to switch state from CC <-> CV
@@ -345,18 +906,31 @@ class Pack:
         })
 
         self.model.algebraic.update({
-            self.iapps[0]: self.i_total - sum(self.iapps),
+            self.iapps[0]: self.i_total - sum(
+                iapp if weight == 1 else weight * iapp for iapp, weight in zip(self.iapps, self.string_weights)
+            ),
         })
 
-        for i in range(1, self.parallel):
-            vbalance = 0
+        for i in range(1, len(self.iapps)):
             ## V{str{n}} - V{str{n-1}} = 0 from n=[1, num-strings]
-            for j in range(self.series):
-                vbalance += self.cells[j, i].vvolt
-                vbalance -= self.cells[j, i-1].vvolt
-
-            #expr = cells[0, i].vvolt - cells[0, i-1].vvolt
-            self.model.algebraic[self.iapps[i]] = vbalance #expr
+            self.model.algebraic[self.iapps[i]] = self._string_voltage(i) - self._string_voltage(i-1)
+
+        if self.integrate_summary:
+            ## Ah and Wh throughput (per electrode area) for summary.csv
+            charge = pybamm.Variable("Pack Charge Throughput")
+            energy = pybamm.Variable("Pack Energy Throughput")
+            self.model.rhs.update({
+                charge: pybamm.AbsoluteValue(self.i_total) / 3600,
+                energy: pybamm.AbsoluteValue(self.voltage * self.i_total) / 3600,
+            })
+            self.model.initial_conditions.update({
+                charge: 0,
+                energy: 0,
+            })
+            self.model.variables.update({
+                charge.name: charge,
+                energy.name: energy,
+            })
     
 
     def __IC_and_StopC(self):
@@ -365,10 +939,11 @@ class Pack:
         })
 
         self.model.initial_conditions.update({
-            **{ self.iapps[i]: self.ilock / self.parallel for i in range(self.parallel) },
+            **{ iapp: self.ilock / self.parallel for iapp in self.iapps },
         })
 
-        self.flat_cells = self.cells.flatten()
+        ## unique simulated cells (lumped positions share one)
+        self.flat_cells = list(dict.fromkeys(self.cells.flatten()))
 
         min_current = self.iappt * self.current_cut
 
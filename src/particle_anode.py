@@ -10,19 +10,20 @@ import params as p
 class Anode(SingleParticle): 
     OCP_INIT = 0.08352811644995728
 
-    def __init__(self, name: str, iapp: pybamm.Variable):
-
-        super().__init__(name, -1, iapp)
+    def __init__(self, name: str, iapp: pybamm.Variable, diffusion="full"):
 
+        ## before super(): the surface boundary condition (surface_gradient) needs i_int
         self.i_sei = pybamm.Variable(name + " Side Current")
         self.i_int = pybamm.Variable(name + " Intercalation Current")
         self.sei_L = pybamm.Variable(name + " SEI Length")
         self.sei0 = pybamm.Parameter(name + " Initial SEI Length")
 
+        super().__init__(name, -1, iapp, diffusion)
+
+    def surface_gradient(self):
+        return -self.i_int / (cc.F * self.D)
+
     def process_model(self, model: pybamm.BaseModel, charging):
-        flux = self.D * -pybamm.grad(self.c)
-        # dc/dt = d^2c/dr^2
-        dcdt = -pybamm.div(flux)
 
         ## see params.py
         # self.eps_n <- NEG_ELEC_POROSITY
@@ -37,8 +38,8 @@ class Anode(SingleParticle):
         dLdt = (-self.i_sei / (2*cc.F)) * (M_SEI / RHO_SEI)
 
         # solve the ODEs -- diffusion equation (del * del(c))
+        self.process_diffusion(model)
         model.rhs.update({
-            self.c: dcdt,
             self.sei_L: dLdt
         })
 
@@ -62,25 +63,14 @@ class Anode(SingleParticle):
         })
 
         model.initial_conditions.update({
-            self.c: self.c0,
             self.phi: self.OCP_INIT,
             self.i_sei: 1e-8,
             self.i_int: 1e-2,
             self.sei_L: self.sei0,
         }) 
 
-        # TODO: Sign check on surface boundary condition
-        model.boundary_conditions.update({
-            self.c: {
-                "left":  (0, "Neumann"),
-                "right": (-self.i_int / (cc.F * self.D), "Neumann") # outer boundary condition (dc/dr behavior @r=R)
-            },
-        })
+        # TODO: Sign check on surface boundary condition (see surface_gradient)
 
-        # model.variables.update{}
-        model.variables.update({
-            self.c.name: pybamm.PrimaryBroadcast(self.surf_c, self.domain),
-        })
         SET_MODEL_VARS(model,
             [
                 self.phi, 
@@ -90,20 +80,36 @@ class Anode(SingleParticle):
             ]
         )
 
-    def attach_parameters(self, parameters: dict):
+    @staticmethod
+    def sample() -> dict:
+        ## draw order matters for seeded runs -- keep it
+        return {
+            "Electrode Thickness":   p.NEG_ELEC_THICKNESS.sample(),
+            "Electrode Porosity":    p.NEG_ELEC_POROSITY.sample(),
+            "Max Concentration":     p.NEG_CSN_MAX.sample(),
+            "Diffusion Coefficient": p.NEG_DIFFUSION.sample(),
+            "Particle Radius":       p.PARTICLE_RADIUS.sample(),
+            "Initial Concentration": p.NEG_CSN_INITIAL.sample(),
+        }
+
+    def attach_parameters(self, parameters: dict, values=None):
+        ## values: output of Anode.sample() (drawn here if not given)
+        if values is None:
+            values = self.sample()
+
         BIND_VALUES(parameters, {
             self.c0:               "[input]",
-            self.L:                p.NEG_ELEC_THICKNESS.sample(),
-            self.eps_n:            p.NEG_ELEC_POROSITY.sample(),
-            self.cmax:             p.NEG_CSN_MAX.sample(),
+            self.L:                values["Electrode Thickness"],
+            self.eps_n:            values["Electrode Porosity"],
+            self.cmax:             values["Max Concentration"],
 
             self.ocp:              p.NEG_OCP2,
-            self.D:                p.NEG_DIFFUSION.sample(),
-            self.R:                p.PARTICLE_RADIUS.sample(),
+            self.D:                values["Diffusion Coefficient"],
+            self.R:                values["Particle Radius"],
             self.sei0:             "[input]",
         })
 
-        self.c0.set_value(p.NEG_CSN_INITIAL.sample()) 
+        self.c0.set_value(values["Initial Concentration"]) 
 
 if __name__ == '__main__':
     import params as p
@@ -10,21 +10,18 @@ class Cathode(SingleParticle):
     OCP_INIT = 4.08138601219583
 
     def __init__(self, name: str, 
-            iapp: pybamm.Variable):
+            iapp: pybamm.Variable, diffusion="full"):
 
-        super().__init__(name, +1, iapp)
+        super().__init__(name, +1, iapp, diffusion)
+
+    def surface_gradient(self):
+        return -self.j / (c.F * self.D)
     
     def process_model(self, model: pybamm.BaseModel):
-        # dc/dt = d^2c/dr^2
-        flux = self.D * -pybamm.grad(self.c)
-        dcdt = -pybamm.div(flux)
-
         KINT = 1.04e-11
 
         # solve the diffusion equation (del * del(c))
-        model.rhs.update({
-            self.c: dcdt,
-        })
+        self.process_diffusion(model)
 
         x = c.F / (2 * c.R_GAS * c.T) * (self.phi - self.ocp)
         j0 = c.F * KINT * self.surf_c**0.5 * (self.cmax - self.surf_c)**0.5 
@@ -34,36 +31,42 @@ class Cathode(SingleParticle):
         })
 
         model.initial_conditions.update({
-            self.c: self.c0,
             self.phi: self.OCP_INIT
         }) 
 
-        model.boundary_conditions.update({
-            self.c: {
-                "left":  (0, "Neumann"),
-                "right": (-self.j / (c.F * self.D), "Neumann") # outer boundary condition (dc/dr behavior @r=R)
-            },
-        })
-
-        # model.variables.update{}
         model.variables.update({
-            self.c.name: pybamm.PrimaryBroadcast(self.surf_c, self.domain),
             self.phi.name: self.phi
         })
 
-    def attach_parameters(self, parameters: dict):
+    @staticmethod
+    def sample() -> dict:
+        ## draw order matters for seeded runs -- keep it
+        return {
+            "Electrode Thickness":   p.POS_ELEC_THICKNESS.sample(),
+            "Electrode Porosity":    p.POS_ELEC_POROSITY.sample(),
+            "Max Concentration":     p.POS_CSN_MAX.sample(),
+            "Diffusion Coefficient": p.POS_DIFFUSION.sample(),
+            "Particle Radius":       p.PARTICLE_RADIUS.sample(),
+            "Initial Concentration": p.POS_CSN_INITIAL.sample(),
+        }
+
+    def attach_parameters(self, parameters: dict, values=None):
+        ## values: output of Cathode.sample() (drawn here if not given)
+        if values is None:
+            values = self.sample()
+
         BIND_VALUES(parameters, {
             self.c0:               "[input]",
-            self.L:                p.POS_ELEC_THICKNESS.sample(),
-            self.eps_n:            p.POS_ELEC_POROSITY.sample(),
-            self.cmax:             p.POS_CSN_MAX.sample(),
+            self.L:                values["Electrode Thickness"],
+            self.eps_n:            values["Electrode Porosity"],
+            self.cmax:             values["Max Concentration"],
 
             self.ocp:              p.POS_OCP,
-            self.D:                p.POS_DIFFUSION.sample(),
-            self.R:                p.PARTICLE_RADIUS.sample(),
+            self.D:                values["Diffusion Coefficient"],
+            self.R:                values["Particle Radius"],
         })
 
-        self.c0.set_value(p.POS_CSN_INITIAL.sample()) 
+        self.c0.set_value(values["Initial Concentration"]) 
 
 if __name__ == '__main__':
     import params as p
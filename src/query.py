@@ -0,0 +1,193 @@
+import re
+import numpy as np
+import pandas as pd
+
+from src.writers import TIME_COLUMNS
+from src.schema import structured, suffix
+
+
+class TableIndex:
+    """
+    Lookups over one cached (Cycle, Protocol, Stamps)-indexed results table, computed once:
+        segments:   (Cycle, Protocol) -> [start, stop) row positions (segments are contiguous on disk)
+        cells:      cell name -> column positions
+        attributes: column suffix ("Voltage", "Anode SEI Length") or whole name ("Pack Voltage") -> column positions
+        grids:      cell column suffix -> (series, parallel) column positions (-1: position not recorded)
+        schema:     (Series, Parallel, Electrode, Attribute) MultiIndex of the columns (src/schema.py)
+    Queries only combine these position arrays; nothing scans the data or the column strings again.
+    shape: (series, parallel) of the pack (None: the largest cell index found in the columns)
+    """
+
+    def __init__(self, frame: pd.DataFrame, shape=None):
+        self.frame = frame
+
+        cycles = frame.index.get_level_values(0).to_numpy()
+        protocols = frame.index.get_level_values(1).to_numpy()
+        n = len(frame)
+
+        change = np.flatnonzero((cycles[1:] != cycles[:-1]) | (protocols[1:] != protocols[:-1])) + 1
+        starts = np.concatenate([[0], change]) if n != 0 else np.array([], dtype=int)
+        stops = np.concatenate([change, [n]]) if n != 0 else np.array([], dtype=int)
+        self.segments = pd.DataFrame({
+            "Cycle": cycles[starts], "Protocol": protocols[starts], "Start": starts, "Stop": stops,
+        })
+
+        self.time_columns = np.array([frame.columns.get_loc(c) for c in TIME_COLUMNS if c in frame.columns], dtype=int)
+        self.times = {c: frame[c].to_numpy() for c in TIME_COLUMNS if c in frame.columns}
+
+        self.schema = structured(frame.columns)
+        if shape is None:
+            shape = (max([key[0] for key in self.schema] + [0]), max([key[1] for key in self.schema] + [0]))
+        self.shape = tuple(shape)
+
+        self.cells = {}
+        self.attributes = {}
+        self.grids = {}
+        for k, key in enumerate(self.schema):
+            i, j, electrode, _ = key
+            attribute = frame.columns[k]
+            if electrode in ["Cathode", "Anode", "Cell"]:
+                attribute = suffix(key)
+                self.cells.setdefault(f"Cell {i},{j}", []).append(k)
+                grid = self.grids.setdefault(attribute, np.full(self.shape, -1, dtype=int))
+                grid[i - 1, j - 1] = k
+            self.attributes.setdefault(attribute, []).append(k)
+
+        self.cells = {k: np.array(v, dtype=int) for k, v in self.cells.items()}
+        self.attributes = {k: np.array(v, dtype=int) for k, v in self.attributes.items()}
+        self.data_columns = np.setdiff1d(np.arange(len(frame.columns)), self.time_columns)
+
+    def rows(self, segments: pd.DataFrame) -> np.ndarray:
+        if len(segments) == 0:
+            return np.array([], dtype=int)
+        return np.concatenate([np.arange(a, b) for a, b in zip(segments["Start"], segments["Stop"])])
+
+
+class Query:
+    """
+    Immutable selection over an Experiment's cached table. Every method returns a new Query;
+    `frame()` materialises it once (cached on the query). Nothing is re-read from disk.
+
+        q = experiment.query().cycles([1, 50]).protocols([DISCHARGE]).attributes(["Voltage"])
+        q.time(0, 600).frame()
+
+    rows / columns: positions into the base table (None: all of them). Time columns are always kept.
+    """
+
+    def __init__(self, table: TableIndex, rows=None, columns=None):
+        self.table = table
+        self.rows = rows
+        self.columns = columns
+        self._frame = None
+
+    def __select_rows(self, rows: np.ndarray) -> "Query":
+        if self.rows is not None:
+            rows = np.intersect1d(self.rows, rows, assume_unique=True)
+        return Query(self.table, rows, self.columns)
+
+    def __select_columns(self, columns: np.ndarray) -> "Query":
+        current = self.columns if self.columns is not None else self.table.data_columns
+        return Query(self.table, self.rows, np.intersect1d(current, columns, assume_unique=True))
+
+    def cycles(self, cycles) -> "Query":
+        ## cycle numbers (list, range, ...). Empty: no filter
+        cycles = list(cycles)
+        if len(cycles) == 0:
+            return self
+        segments = self.table.segments
+        return self.__select_rows(self.table.rows(segments.loc[segments["Cycle"].isin(cycles)]))
+
+    def protocols(self, protocols) -> "Query":
+        ## protocol labels (DISCHARGE, CC_CHARGE, CV_CHARGE; CHARGE = both charge protocols). Empty: no filter
+        labels = [label for p in protocols for label in p.split("|")]
+        if len(labels) == 0:
+            return self
+        segments = self.table.segments
+        return self.__select_rows(self.table.rows(segments.loc[segments["Protocol"].isin(labels)]))
+
+    def cells(self, cells) -> "Query":
+        ## cell names ("Cell 2,1") or 1-based (row, string) pairs; drops pack/string columns
+        names = [c if isinstance(c, str) else f"Cell {c[0]},{c[1]}" for c in cells]
+        unknown = [n for n in names if n not in self.table.cells]
+        if len(unknown) != 0:
+            raise KeyError(f"No columns for {unknown}")
+        return self.__select_columns(np.concatenate([self.table.cells[n] for n in names] + [np.array([], dtype=int)]))
+
+    def attributes(self, attributes) -> "Query":
+        ## exact cell attributes ("Voltage", "Anode SEI Length") or whole column names ("Pack Voltage", "String 1 Iapp")
+        unknown = [a for a in attributes if a not in self.table.attributes]
+        if len(unknown) != 0:
+            raise KeyError(f"Unknown attributes {unknown}. Available: {sorted(self.table.attributes)}")
+        return self.__select_columns(np.concatenate([self.table.attributes[a] for a in attributes] + [np.array([], dtype=int)]))
+
+    def match(self, pattern: str) -> "Query":
+        ## regex over the column names (once, not over the data) -- Experiment.select_attributes' fuzzy search
+        regex = re.compile(pattern)
+        return self.__select_columns(np.array([k for k, c in enumerate(self.table.frame.columns) if regex.search(c)], dtype=int))
+
+    def time(self, start=None, stop=None, global_time=False) -> "Query":
+        ## rows with start <= t <= stop; t is the segment-local 'Time' (global_time: 'Global Time')
+        t = self.table.times["Global Time" if global_time else "Time"]
+        keep = np.ones(len(t), dtype=bool)
+        if start is not None:
+            keep &= t >= start
+        if stop is not None:
+            keep &= t <= stop
+        return self.__select_rows(np.flatnonzero(keep))
+
+    @property
+    def segments(self) -> pd.DataFrame:
+        ## (Cycle, Protocol) segments touched by this selection
+        segments = self.table.segments
+        if self.rows is None:
+            return segments[["Cycle", "Protocol"]]
+        hit = np.searchsorted(segments["Start"].to_numpy(), self.rows, side='right') - 1
+        return segments.iloc[np.unique(hit)][["Cycle", "Protocol"]]
+
+    def segment_rows(self):
+        ## (Cycle, Protocol) -> selected row offsets within that segment (None: whole segments). Independent of
+        ## where the segment sits in the table, so it also applies to tables read segment by segment (seek)
+        if self.rows is None:
+            return None
+        starts = self.table.segments["Start"].to_numpy()
+        hit = np.searchsorted(starts, self.rows, side='right') - 1
+        segments = self.table.segments
+        return {(segments["Cycle"].iat[s], segments["Protocol"].iat[s]): self.rows[hit == s] - starts[s]
+                for s in np.unique(hit)}
+
+    def cube(self, attribute: str) -> np.ndarray:
+        ## contiguous (time, series, parallel) array of a per-cell attribute ("Voltage", "Anode SEI Length")
+        ## over the selected rows; positions that weren't recorded are NaN
+        if attribute not in self.table.grids:
+            raise KeyError(f"Unknown cell attribute '{attribute}'. Available: {sorted(self.table.grids)}")
+
+        grid = self.table.grids[attribute]
+        rows = self.rows if self.rows is not None else slice(None)
+        ## owned copy: under pandas copy-on-write to_numpy() can hand back a read-only view (e.g. one column)
+        values = np.array(self.table.frame.iloc[rows, np.maximum(grid.ravel(), 0)], dtype=float)
+        values[:, grid.ravel() < 0] = np.nan
+        return np.ascontiguousarray(values.reshape((-1,) + self.table.shape))
+
+    def structured(self) -> pd.DataFrame:
+        ## frame() with (Series, Parallel, Electrode, Attribute) columns instead of the flat names
+        frame = self.frame()
+        return frame.set_axis(structured(frame.columns), axis=1)
+
+    def frame(self) -> pd.DataFrame:
+        ## shares memory with the cached table when nothing is selected: treat as read-only (copy to modify)
+        if self._frame is None:
+            frame = self.table.frame
+            if self.columns is not None:
+                columns = np.union1d(self.table.time_columns, self.columns)
+                frame = frame.iloc[:, columns]
+            if self.rows is not None:
+                frame = frame.iloc[self.rows]
+            self._frame = frame
+        return self._frame
+
+    def __len__(self):
+        return len(self.table.frame) if self.rows is None else len(self.rows)
+
+    def __repr__(self):
+        columns = len(self.table.frame.columns) if self.columns is None else len(self.columns) + len(self.table.time_columns)
+        return f"Query({len(self)} rows x {columns} columns)"
@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+
+from src.writers import detect, read_index
+from src.manifest import read_manifest
+from src.query import TableIndex, Query
+from src.cube import read_cube
+from src.decimate import Decimated
+
+## Protocol labels in the (Cycle, Protocol) index
+DISCHARGE = "CC-discharge"
+CV_CHARGE = "CV-charge"
+CC_CHARGE = "CC-charge"
+CHARGE = "CV-charge|CC-charge"
+
+
+class Topology:
+    """
+    Pack layout and operating limits, read from profile.json.
+    Carries the Pack attributes post-processing used to unpickle model.pkl for (same names).
+    """
+
+    def __init__(self, profile: dict):
+        self.experiment = profile.get("Experiment")
+        self.series = int(profile["Series"])
+        self.parallel = int(profile["Parallel"])
+        self.temperature = profile.get("Temperature")
+        self.voltage_window = tuple(profile["Voltage Window"])
+        self.c_rate = profile.get("C-rate")
+        self.iappt = profile.get("I-app")
+        self.current_cut = profile.get("I-app Cut Factor")
+        self.capacity_cut = profile.get("Capacity Cut Factor")
+
+        ## "completed/requested" (older profiles: a single number)
+        cycles = str(profile.get("Cycles", "0")).split("/")
+        self.completed = int(cycles[0])
+        self.cycles = int(cycles[-1])
+
+        ## same convention as Pack.names: Cell <row>,<string>
+        self.names = np.array([[f"Cell {i + 1},{j + 1}" for j in range(self.parallel)]
+                                for i in range(self.series)], dtype=object)
+
+    def __repr__(self):
+        return f"Topology({self.experiment}: {self.series}S{self.parallel}P, {self.completed}/{self.cycles} cycles)"
+
+
+class Results:
+    """
+    Read-only view of one run in data/<experiment>/ that needs nothing but numpy and pandas:
+    profile, topology, capacities and the segment index load eagerly (small files), the time series
+    is read once on first access of `data` / `query()` and cached, and the Pack (pybamm + the
+    discretised model) only when `pack` is touched.
+    """
+
+    def __init__(self, experiment: str, root="data"):
+        self.experiment = experiment
+        self.path = os.path.join(root, experiment) + "/"
+
+        with open(self.path+"profile.json", 'r') as f:
+            self.profile = json.load(f)
+
+        self.topology = Topology(self.profile)
+
+        ## manifest.json (src/manifest.py): per-cell parameter values, protocol, final state. None for older runs
+        self.manifest = read_manifest(self.path)
+
+        ## backend recorded in profile.json (older runs: whichever data file exists).
+        ## None: no time series on disk -- profile/capacities still load, `data` raises
+        try:
+            self.reader = detect(self.path, self.profile.get("Output Format"))
+        except FileNotFoundError:
+            self.reader = None
+
+        ## (Cycle, Protocol) -> location in the data file. None for runs without an index.
+        ## With an index, seek() reads single segments without loading the whole table
+        self.index = read_index(self.path)
+        self._base = None
+        self._table = None
+        self._decimated = {}
+        self._pack = None
+
+        self.caps = pd.read_csv(self.path+"capacities.csv", index_col=0)
+
+    def __str__(self):
+        return json.dumps(self.profile, indent=4)
+
+    @property
+    def base(self) -> pd.DataFrame:
+        ## the whole table, read once
+        if self._base is None:
+            if self.reader is None:
+                raise FileNotFoundError(f"No simulation data found in {self.path}")
+            self._base = self.reader.read(self.path)
+        return self._base
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self.base
+
+    @property
+    def table(self) -> TableIndex:
+        if self._table is None:
+            self._table = TableIndex(self.base, (self.topology.series, self.topology.parallel))
+        return self._table
+
+    def query(self) -> Query:
+        ## everything; narrow it down with .cycles() / .protocols() / .cells() / .attributes() / .time()
+        return Query(self.table)
+
+    def decimated(self, method="minmax", level=256) -> Decimated:
+        ## screen-resolution copy of the table (src/decimate.py), computed once and cached in decimated/
+        if (method, level) not in self._decimated:
+            source = os.path.join(self.path, self.reader.FILENAME)
+            self._decimated[method, level] = Decimated.cached(self.path, source, lambda: self.table, method, level)
+        return self._decimated[method, level]
+
+    def cube(self, attribute: str) -> np.ndarray:
+        ## (time, series, parallel) array of a per-cell attribute over the whole run. Runs written with
+        ## CUBE=True map cube/<attribute>.bin without reading the table; otherwise it comes from the table
+        cube = read_cube(self.path, attribute)
+        if cube is not None:
+            return cube
+        return self.query().cube(attribute)
+
+    def seek(self, cycles=[], protocols=[]) -> pd.DataFrame:
+        ## read only these segments straight from disk (needs the sidecar index; nothing is cached)
+        if self.index is None or self.reader is None:
+            return self.query().cycles(cycles).protocols(protocols).frame()
+
+        labels = [label for p in protocols for label in p.split("|")]
+        flt = np.ones(len(self.index), dtype=bool)
+        if len(cycles) != 0:
+            flt &= self.index["Cycle"].isin(cycles).to_numpy()
+        if len(labels) != 0:
+            flt &= self.index["Protocol"].isin(labels).to_numpy()
+        return self.reader.read(self.path, self.index.loc[flt])
+
+    @property
+    def pack(self):
+        ## the full Pack object: imports pybamm and rebuilds the model from manifest.json, so only on request
+        if self._pack is None and self.manifest is not None:
+            from src.manifest import rebuild
+            self._pack = rebuild(self.path)
+
+        if self._pack is None:
+            ## runs from before manifests: the pickled Pack
+            import pickle
+
+            ## model.pkl references the src modules by their bare names
+            src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+            if src not in sys.path:
+                sys.path.append(src)
+
+            with open(self.path+"model.pkl", 'rb') as f:
+                self._pack = pickle.load(f)
+        return self._pack
+
+    def get_capacities(self) -> pd.DataFrame:
+        return self.caps
+
+    def get_data(self) -> pd.DataFrame:
+        return self.data
+
+    def get_profile(self) -> dict:
+        return self.profile
+
+    def get_manifest(self) -> dict:
+        return self.manifest
+
+    def get_topology(self) -> Topology:
+        return self.topology
+
+    def get_pack(self):
+        return self.pack
@@ -0,0 +1,167 @@
+import params
+from consts import THEORETICAL_CAPACITY
+from src.variator import Variator
+
+## Same names as the operating conditions at the top of mainmodel.py
+DEFAULTS = {
+    "NUM_SERIES": 1,
+    "NUM_PARALLEL": 1,
+    "NUM_CYCLES": 300,
+    "ENGINE": "object",         ## 'object' (Pack, one Cell object per cell) or 'vector' (VectorPack, stacked cells)
+    "LUMPING": None,            ## None, 'exact' or a relative tolerance (object engine only)
+    "DIFFUSION": "full",        ## particle diffusion: 'full' (radial PDE), 'parabolic' or 'quartic' (object engine only)
+
+    "USE_C_RATE": True,
+    "C_RATE": 1.0,
+    "I_INPUT": None,            ## used when USE_C_RATE is False
+
+    "CELL_VOLTAGE_WINDOW": (3.0, 4.2),
+    "VOLTAGE_WINDOW": None,     ## None -> CELL_VOLTAGE_WINDOW * NUM_SERIES
+
+    "CURRENT_CUT_FACTOR": 1/10,
+    "CAPACITY_CUT_FACTOR": 0.80,
+
+    "HOURS": None,              ## None -> 2/C_RATE
+    "TIME_PTS": 100,
+    "TIME_GRID": None,          ## None (uniform) or AdaptiveGrid keyword arguments (src/time_grid.py)
+    "DISCRETE_PTS": 100,
+
+    "STEPPING": False,          ## carry the full DAE state across protocol switches (Pack.cycler)
+    "SOLVER": "casadi",         ## 'casadi' or 'idaklu' (src/solvers.py)
+    "SOLVER_OPTIONS": {},       ## pybamm solver keyword arguments, e.g. {"rtol": 1e-4, "atol": 1e-7}
+
+    "EXPERIMENT": None,
+    "OVERWRITE": None,
+    "POLICY": None,             ## src/launcher.py: 'overwrite', 'resume', 'skip' or 'error' (None: from OVERWRITE)
+    "METRICS": True,            ## phase timings / solver statistics -> metrics.json
+    "CYCLE_JUMPING": None,      ## None or CycleJumper keyword arguments (src/cycle_jump.py), e.g. {"max_jump": 50}
+    "CHECKPOINT_CYCLES": None,  ## checkpoint.pkl every N cycles (None: off)
+    "CHECKPOINT_MINUTES": None, ## ... and/or every T minutes of wall time
+    "RESUME": False,            ## continue EXPERIMENT from its checkpoint instead of starting over
+    "BUILD_CACHE": None,        ## directory of the discretised-model cache (None disables it)
+    "OUTPUT_FORMAT": "csv",
+    "FLOAT32": False,
+    "CUBE": False,              ## also write per-cell attributes as memory-mappable (time, series, parallel) arrays (src/cube.py)
+    "WRITER_OPTIONS": {},       ## background writer: max_segments, max_bytes, batch, fsync ('never', 'batch', 'checkpoint')
+    "SUMMARY_STATES": False,    ## integrate Ah/Wh throughput as extra RHS states for summary.csv
+    "OUTPUT_SPEC": None,        ## None -> every default column; else OutputSpec keyword arguments (src/output_spec.py)
+
+    ## Variator settings. { params.py attribute: (Variator constructor, *args) }
+    ##  e.g. {"POS_ELEC_POROSITY": ("from_gaussian_stddev", 0.385, 0.01, 0.02)}
+    "VARIATIONS": {},
+    "OVERRIDE": None,           ## None keeps params.py's Variator.OVERRIDE
+    "SEED": None,               ## int or [root, k]; see Variator.seed
+}
+
+
+def make_config(**kwargs) -> dict:
+    unknown = set(kwargs) - set(DEFAULTS)
+    if len(unknown) != 0:
+        raise KeyError(f"Unknown configuration keys: {sorted(unknown)}")
+
+    config = dict(DEFAULTS)
+    config.update(kwargs)
+
+    series = config["NUM_SERIES"]
+    if config["VOLTAGE_WINDOW"] is None:
+        low, high = config["CELL_VOLTAGE_WINDOW"]
+        config["VOLTAGE_WINDOW"] = (low * series, high * series)
+
+    if config["HOURS"] is None:
+        config["HOURS"] = (1./c_rate(config)) * 2.0
+
+    return config
+
+
+def c_rate(config: dict) -> float:
+    ## C-rate of a configuration, also when the current is given directly (USE_C_RATE False)
+    if config["USE_C_RATE"]:
+        return config["C_RATE"]
+    return config["I_INPUT"] / (THEORETICAL_CAPACITY * config["NUM_PARALLEL"])
+
+
+def reset_globals():
+    ## Cell.CELLS and Variator.ALL are module-level registries: clear whatever a previous run left behind
+    from src.cell import Cell
+
+    Cell.CELLS.clear()
+    Variator.ALL[:] = [v for v in vars(params).values() if isinstance(v, Variator)]
+
+
+def apply_variations(variations: dict) -> dict:
+    ## returns the replaced variators so they can be restored
+    originals = {}
+    for attr, spec in variations.items():
+        original = getattr(params, attr)
+        originals[attr] = original
+        setattr(params, attr, getattr(Variator, spec[0])(original.name, *spec[1:]))
+
+    return originals
+
+
+def run_pack(config: dict):
+    import pybamm
+    from src.pack import Pack
+    from src.vector_pack import VectorPack
+    from src.build_cache import BuildCache
+    from src.output_spec import OutputSpec
+    from src.time_grid import AdaptiveGrid
+    from src.cycle_jump import CycleJumper
+
+    engines = {"object": Pack, "vector": VectorPack}
+
+    originals = apply_variations(config["VARIATIONS"])
+    override = Variator.OVERRIDE
+    if config["OVERRIDE"] is not None:
+        Variator.OVERRIDE = config["OVERRIDE"]
+
+    try:
+        reset_globals()
+        Variator.seed(config["SEED"])
+
+        model = pybamm.BaseModel()
+        geo = {}
+        parameters = {}
+
+        pack = engines[config["ENGINE"]](config["EXPERIMENT"], config["NUM_PARALLEL"], config["NUM_SERIES"], model, geo, parameters,
+                    overwrite=True if config["RESUME"] else config["OVERWRITE"], lumping=config["LUMPING"],
+                    diffusion=config["DIFFUSION"])
+        if config["USE_C_RATE"]:
+            pack.set_charge_protocol(config["NUM_CYCLES"], config["C_RATE"], use_c_rate=True)
+        else:
+            pack.set_charge_protocol(config["NUM_CYCLES"], config["I_INPUT"], use_c_rate=False)
+        pack.set_cutoffs(config["VOLTAGE_WINDOW"], config["CURRENT_CUT_FACTOR"], config["CAPACITY_CUT_FACTOR"])
+        pack.set_output_format(config["OUTPUT_FORMAT"], float32=config["FLOAT32"])
+        pack.set_writer_options(**config["WRITER_OPTIONS"])
+        pack.set_cube(config["CUBE"])
+        pack.set_solver(config["SOLVER"], config["SOLVER_OPTIONS"])
+        pack.set_summary(config["SUMMARY_STATES"])
+        pack.set_metrics(config["METRICS"])
+        pack.set_checkpoints(config["CHECKPOINT_CYCLES"], config["CHECKPOINT_MINUTES"])
+        if config["CYCLE_JUMPING"] is not None:
+            pack.set_cycle_jumping(CycleJumper(**config["CYCLE_JUMPING"]))
+        if config["TIME_GRID"] is not None:
+            pack.set_time_grid(AdaptiveGrid(**config["TIME_GRID"]))
+        if config["OUTPUT_SPEC"] is not None:
+            pack.set_output_spec(OutputSpec(**config["OUTPUT_SPEC"]))
+
+        cache = BuildCache(config["BUILD_CACHE"]) if config["BUILD_CACHE"] is not None else None
+        pack.build(config["DISCRETE_PTS"], cache=cache)
+        pack.cycler(config["HOURS"], config["TIME_PTS"], stepping=config["STEPPING"], resume=config["RESUME"])
+
+    finally:
+        for attr, original in originals.items():
+            setattr(params, attr, original)
+        Variator.OVERRIDE = override
+        Variator.seed(None)
+        reset_globals()
+
+    return pack
+
+
+def run_job(config: dict) -> dict:
+    ## process-pool entry point. Only a small summary goes back to the parent (not the Pack).
+    ## Goes through the launcher: never prompts, and identical finished configurations aren't re-simulated
+    from src.launcher import launch
+
+    return launch(config)
@@ -0,0 +1,59 @@
+import re
+import pandas as pd
+
+## Structured names of the output columns: (series index, parallel index, electrode, attribute)
+##   "Cell 2,1 Anode SEI Length" -> (2, 1, "Anode", "SEI Length")
+##   "Cell 2,1 Voltage"          -> (2, 1, "Cell", "Voltage")
+##   "String 3 Iapp"             -> (0, 3, "String", "Iapp")
+##   "Pack Voltage"              -> (0, 0, "Pack", "Voltage")
+##   "Time"                      -> (0, 0, "", "Time")
+## Cells are 1-based (same as their names); 0 means "not tied to a row/string"
+LEVELS = ["Series", "Parallel", "Electrode", "Attribute"]
+ELECTRODES = ["Cathode", "Anode"]
+
+CELL_COLUMN = re.compile(r"^(Cell (\d+),(\d+)) (.+)$")
+STRING_COLUMN = re.compile(r"^String (\d+) (.+)$")
+
+
+def column_key(column: str) -> tuple:
+    match = CELL_COLUMN.match(column)
+    if match:
+        _, i, j, suffix = match.groups()
+        electrode, _, attribute = suffix.partition(" ")
+        if electrode not in ELECTRODES:
+            electrode, attribute = "Cell", suffix
+        return (int(i), int(j), electrode, attribute)
+
+    match = STRING_COLUMN.match(column)
+    if match:
+        j, attribute = match.groups()
+        return (0, int(j), "String", attribute)
+
+    if column.startswith("Pack "):
+        return (0, 0, "Pack", column[len("Pack "):])
+
+    return (0, 0, "", column)
+
+
+def column_name(key: tuple) -> str:
+    ## inverse of column_key
+    i, j, electrode, attribute = key
+    if electrode in ELECTRODES:
+        return f"Cell {i},{j} {electrode} {attribute}"
+    if electrode == "Cell":
+        return f"Cell {i},{j} {attribute}"
+    if electrode == "String":
+        return f"String {j} {attribute}"
+    if electrode == "Pack":
+        return f"Pack {attribute}"
+    return attribute
+
+
+def suffix(key: tuple) -> str:
+    ## per-cell column suffix (OutputSpec.CELL_VARIABLES key) of a cell column: "Anode SEI Length", "Voltage"
+    _, _, electrode, attribute = key
+    return f"{electrode} {attribute}" if electrode in ELECTRODES else attribute
+
+
+def structured(columns) -> pd.MultiIndex:
+    return pd.MultiIndex.from_tuples([column_key(c) for c in columns], names=LEVELS)
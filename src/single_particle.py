@@ -3,12 +3,34 @@ from abc import abstractmethod
 from src.wrapped_parameter import WrappedParameter
 
 class SingleParticle:
+    ## (label, attribute) of the per-particle parameters that get sampled from params.py
+    PARAMETERS = [
+        ("Initial Concentration",   "c0"),
+        ("Electrode Thickness",     "L"),
+        ("Electrode Porosity",      "eps_n"),
+        ("Max Concentration",       "cmax"),
+        ("Diffusion Coefficient",   "D"),
+        ("Particle Radius",         "R"),
+    ]
+
+    ## radial diffusion submodels
+    ##   full:      diffusion PDE on a DISCRETE_PTS radial mesh
+    ##   parabolic: 2-parameter polynomial profile, 1 state  (c_surf = c_avg + R/5 dc/dr|R)
+    ##   quartic:   3-parameter polynomial profile, 2 states (average concentration + R * average gradient q)
+    ##              Subramanian et al., J. Electrochem. Soc. 152 (2005) A2002
+    DIFFUSION_MODELS = ["full", "parabolic", "quartic"]
+
     def __init__(self, name: str, charge: int, 
-            iapp: pybamm.Variable):
+            iapp: pybamm.Variable, diffusion="full"):
+
+        if diffusion not in self.DIFFUSION_MODELS:
+            raise ValueError(f"Unknown diffusion model '{diffusion}'. Choose from {self.DIFFUSION_MODELS}")
 
         self.name = name
-        self.domain = name + " dDomain"
+        ## must end in "particle": pybamm.r_average only reduces particle domains (anything else comes back as the profile)
+        self.domain = name + " particle"
         self.charge = charge
+        self.diffusion = diffusion
 
         self.c0 = WrappedParameter(name + " pInitial Concentration")
         self.L = WrappedParameter(name + " pElectrode Thickness")
@@ -19,16 +41,26 @@ class SingleParticle:
 
         self.iapp = iapp
 
-        self.phi = pybamm.Variable(name + " Phi")
-        self.c = pybamm.Variable(name + " Concentration", domain=self.domain)
-        self.surf_c = pybamm.surf(self.c)
+        a_term = (3 * (1 - self.eps_n)) / self.R
+        self.j = (self.charge * self.iapp) / (self.L * a_term)
 
-        self.ocp = self.u_func(self.surf_c / self.cmax)
+        self.phi = pybamm.Variable(name + " Phi")
 
-        self.r = pybamm.SpatialVariable(name + " svRadius", domain=self.domain, coord_sys="spherical polar")
+        if diffusion == "full":
+            self.c = pybamm.Variable(name + " Concentration", domain=self.domain)
+            self.surf_c = pybamm.surf(self.c)
+            self.r = pybamm.SpatialVariable(name + " svRadius", domain=self.domain, coord_sys="spherical polar")
+        else:
+            ## reduced order: self.c is the volume-averaged concentration (no radial domain)
+            self.c = pybamm.Variable(name + " Concentration")
+            self.surf_c = self.c + self.R * self.surface_gradient() / 5
+            if diffusion == "quartic":
+                ## state is R * (volume-averaged concentration gradient): concentration units, same scale as c.
+                ## The gradient itself (mol/m^4, ~1e8) wrecks the solver's error control
+                self.q = pybamm.Variable(name + " Scaled Average Concentration Gradient")
+                self.surf_c = self.c + 8 * self.q / 35 + self.R * self.surface_gradient() / 35
 
-        a_term = (3 * (1 - self.eps_n)) / self.R
-        self.j = (self.charge * self.iapp) / (self.L * a_term)
+        self.ocp = self.u_func(self.surf_c / self.cmax)
 
     def u_func(self, sto):
         return pybamm.FunctionParameter(
@@ -38,6 +70,66 @@ class SingleParticle:
             }
         )
 
+    @abstractmethod
+    def surface_gradient(self):
+        ## dc/dr at r = R (outer boundary condition)
+        pass
+
+    def process_diffusion(self, model: pybamm.BaseModel):
+        grad_R = self.surface_gradient()
+
+        if self.diffusion == "full":
+            # dc/dt = d^2c/dr^2
+            flux = self.D * -pybamm.grad(self.c)
+            model.rhs.update({
+                self.c: -pybamm.div(flux),
+            })
+
+            model.boundary_conditions.update({
+                self.c: {
+                    "left":  (0, "Neumann"),
+                    "right": (grad_R, "Neumann") # outer boundary condition (dc/dr behavior @r=R)
+                },
+            })
+
+            average = pybamm.r_average(self.c)
+
+        else:
+            ## d(c_avg)/dt = 3/R * D dc/dr|R
+            model.rhs.update({
+                self.c: 3 * self.D * grad_R / self.R,
+            })
+
+            if self.diffusion == "quartic":
+                model.rhs.update({
+                    self.q: -30 * self.D * self.q / self.R**2 + 45 * self.D * grad_R / (2 * self.R),
+                })
+                ## every segment starts from the parabolic profile (q = 0), as 'full' restarts from a flat one
+                model.initial_conditions.update({
+                    self.q: 0,
+                })
+
+            average = self.c
+
+        model.initial_conditions.update({
+            self.c: self.c0,
+        })
+
+        ## "<name> Concentration" is the radial profile (full) or the average (reduced);
+        ## outputs use the scalar surface/average variables
+        model.variables.update({
+            self.c.name: self.c,
+            self.name + " Surface Concentration": self.surf_c,
+            self.name + " Average Concentration": average,
+        })
+
+    def final_concentration(self, solution) -> float:
+        ## restart value for c0 in the next protocol segment
+        ##   full: surface concentration (profile re-initialised flat). reduced: average concentration
+        if self.diffusion == "full":
+            return solution[self.name + " Surface Concentration"].entries[-1]
+        return solution[self.name + " Average Concentration"].entries[-1]
+
     @abstractmethod    
     def process_model(self, model: pybamm.BaseModel):
         pass
@@ -46,7 +138,17 @@ class SingleParticle:
     def attach_parameters(self, parameters: dict):
         pass
 
+    def sampled_values(self) -> dict:
+        ## {"Cathode Electrode Thickness": 8e-05, ...} -- values drawn in attach_parameters
+        electrode = type(self).__name__
+        return {
+            f"{electrode} {label}": getattr(self, attr).value for label, attr in self.PARAMETERS
+        }
+
     def process_geometry(self, geo: dict):
+        if self.diffusion != "full":
+            return
+
         geo.update({
             self.domain: {self.r: {"min": 0, "max": self.R}}
         })
@@ -0,0 +1,48 @@
+import pybamm
+
+## Solver backends for Pack.cycler. Options are keyword arguments of the pybamm solver; any
+## key not given falls back to the backend defaults below (the settings Pack has always used)
+DEFAULTS = {
+    "casadi": {
+        "atol": 1e-6,
+        "rtol": 1e-5,
+        "root_tol": 1e-6,
+        "dt_max": 1e-10,
+        "max_step_decrease_count": 10,
+        "root_method": 'casadi',
+        "extra_options_setup": {"max_num_steps": 1000000},
+        "return_solution_if_failed_early": True,
+    },
+    ## IDA with the KLU sparse direct solver: the pack Jacobian is block-sparse
+    ## (each cell only couples to its string current and the pack balance equations)
+    "idaklu": {
+        "atol": 1e-6,
+        "rtol": 1e-5,
+        "root_tol": 1e-6,
+        "root_method": 'casadi',
+        "options": {
+            "jacobian": "sparse",
+            "linear_solver": "SUNLinSol_KLU",
+            "max_num_steps": 1000000,
+        },
+    },
+}
+
+SOLVERS = {
+    "casadi": lambda **kw: pybamm.CasadiSolver(**kw),
+    "idaklu": lambda **kw: pybamm.IDAKLUSolver(**kw),
+}
+
+
+def make_solver(backend="casadi", options=None) -> pybamm.BaseSolver:
+    if backend not in SOLVERS:
+        raise ValueError(f"Unknown solver backend '{backend}'. Choose from {list(SOLVERS)}")
+
+    kwargs = dict(DEFAULTS[backend])
+    for key, value in (options or {}).items():
+        ## nested dicts (extra_options_setup, options) are merged rather than replaced
+        if isinstance(value, dict) and isinstance(kwargs.get(key), dict):
+            value = {**kwargs[key], **value}
+        kwargs[key] = value
+
+    return SOLVERS[backend](**kwargs)
@@ -0,0 +1,95 @@
+import numpy as np
+
+## Pack.STATEMAP states
+DISCHARGE, CC_CHARGE, CV_CHARGE = 0, 1, 2
+
+
+def trapezoid(y: np.ndarray, t: np.ndarray) -> float:
+    return float(np.sum((y[1:] + y[:-1]) * np.diff(t)) / 2) if len(t) > 1 else 0.
+
+
+class CycleSummary:
+    """
+    Per-cycle summary accumulated segment by segment inside Pack.cycler (one row of summary.csv per cycle),
+    so capacity/energy/efficiency/SEI/imbalance analyses don't have to re-read the raw time series.
+
+    Throughput comes from the pack's integrated "Pack Charge/Energy Throughput" states when the pack
+    has them (Pack.set_summary(integrate=True)), otherwise from the trapezoid rule on the solver output.
+    Units follow the model: currents per electrode area -> Ah/m2, Wh/m2.
+    """
+
+    def __init__(self, sei0: float):
+        self.sei_prev = sei0
+        self.reset()
+
+    def reset(self):
+        self.times = {DISCHARGE: 0., CC_CHARGE: 0., CV_CHARGE: 0.}
+        self.charge = {DISCHARGE: 0., CC_CHARGE: 0., CV_CHARGE: 0.}
+        self.energy = {DISCHARGE: 0., CC_CHARGE: 0., CV_CHARGE: 0.}
+        self.imbalance = np.nan
+        self.eod_voltage = np.nan
+        self.eod_spread = np.nan
+        self.sei = None
+
+    def add(self, state: int, segment: dict):
+        """
+        segment:
+            t, voltage, current:  pack time series of the segment
+            strings:              (strings, time) string currents
+            cell voltages, sei:   value of every cell position at the end of the segment
+            charge, energy:       integrated throughput of the segment (None -> trapezoid rule)
+        """
+        t = segment["t"]
+        self.times[state] += float(t[-1] - t[0])
+
+        current = np.abs(segment["current"])
+        power = np.abs(segment["voltage"] * segment["current"])
+        charge = segment.get("charge")
+        energy = segment.get("energy")
+        self.charge[state] += charge if charge is not None else trapezoid(current, t) / 3600
+        self.energy[state] += energy if energy is not None else trapezoid(power, t) / 3600
+
+        self.sei = segment["sei"]
+
+        if state == DISCHARGE:
+            strings = segment["strings"]
+            mean = np.abs(strings.mean(axis=0))
+            spread = np.ptp(strings, axis=0)
+            self.imbalance = float(np.max(spread / np.where(mean > 0, mean, np.inf)))
+
+            self.eod_voltage = float(segment["voltage"][-1])
+            self.eod_spread = float(np.ptp(segment["cell voltages"]))
+
+    def finish(self, cycle: int, capacity: float) -> dict:
+        ## row for this cycle; resets the accumulators for the next one
+        discharge_q = self.charge[DISCHARGE]
+        discharge_e = self.energy[DISCHARGE]
+        charge_q = self.charge[CC_CHARGE] + self.charge[CV_CHARGE]
+        charge_e = self.energy[CC_CHARGE] + self.energy[CV_CHARGE]
+
+        sei = float(np.mean(self.sei)) if self.sei is not None else np.nan
+
+        row = {
+            "Cycle": cycle,
+            "Pack Capacity": capacity,
+            "Discharge Time (s)": self.times[DISCHARGE],
+            "CC Charge Time (s)": self.times[CC_CHARGE],
+            "CV Time (s)": self.times[CV_CHARGE],
+            "Discharge Capacity (Ah/m2)": discharge_q,
+            "Charge Capacity (Ah/m2)": charge_q,
+            "Discharge Energy (Wh/m2)": discharge_e,
+            "Charge Energy (Wh/m2)": charge_e,
+            "Average Discharge Voltage": discharge_e / discharge_q if discharge_q > 0 else np.nan,
+            "Coulombic Efficiency": discharge_q / charge_q if charge_q > 0 else np.nan,
+            "Energy Efficiency": discharge_e / charge_e if charge_e > 0 else np.nan,
+            "End of Discharge Voltage": self.eod_voltage,
+            "EOD Cell Voltage Spread": self.eod_spread,
+            "Max String Current Imbalance": self.imbalance,
+            "Mean SEI Length": sei,
+            "Max SEI Length": float(np.max(self.sei)) if self.sei is not None else np.nan,
+            "SEI Growth": sei - self.sei_prev,
+        }
+
+        self.sei_prev = sei
+        self.reset()
+        return row
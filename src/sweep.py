@@ -0,0 +1,118 @@
+import os
+import json
+import itertools
+import multiprocessing
+import concurrent.futures
+
+from src.runner import make_config, run_job, c_rate
+from src.variator import Variator
+
+
+class Sweep:
+    """
+    Runs every combination of `grid` (on top of `base`) as its own Pack experiment.
+    Each job gets a fresh worker process, so Cell.CELLS / Variator.ALL / params.py never leak between jobs.
+
+        sweep = Sweep("crate_sweep", {"NUM_CYCLES": 50}, {"C_RATE": [0.5, 1.0], "NUM_SERIES": [1, 5]})
+        sweep.run(workers=4)
+
+    Outputs go to data/<name>/<job #>/ and a manifest to data/<name>/manifest.json
+    """
+
+    def __init__(self, name: str, base: dict, grid: dict):
+        self.name = name
+        self.base = base
+        self.grid = grid
+
+        keys = list(grid.keys())
+        self.jobs = []
+        for k, combo in enumerate(itertools.product(*grid.values())):
+            config = dict(base)
+            config.update(zip(keys, combo))
+            config["EXPERIMENT"] = f"{name}/{k:04d}"
+            config.setdefault("OVERWRITE", True)
+            ## reuse identical finished results, continue interrupted ones (see src/launcher.py)
+            config.setdefault("POLICY", "resume")
+            self.jobs.append(make_config(**config))
+
+        self.results = {}
+        os.makedirs(f"data/{self.name}", exist_ok=True)
+
+    ## per-cycle solve time relative to 'full' diffusion at DISCRETE_PTS=100 / to the object engine
+    ## (benchmarks/diffusion.py, benchmarks/vectorised.py)
+    DIFFUSION_COST = {"parabolic": 0.4, "quartic": 0.5}
+    ENGINE_COST = {"object": 1.0, "vector": 0.25}
+
+    @staticmethod
+    def simulated_cells(config: dict) -> int:
+        ## cells actually simulated: without parameter variation every cell is identical and any LUMPING
+        ## collapses the pack to one cell. With variation the draws rarely lump; count every cell
+        cells = config["NUM_SERIES"] * config["NUM_PARALLEL"]
+        identical = config["OVERRIDE"] if config["OVERRIDE"] is not None else Variator.OVERRIDE
+        if config["LUMPING"] is not None and identical:
+            return 1
+        return cells
+
+    @staticmethod
+    def cost(config: dict) -> float:
+        ## rough relative cost: simulated cells x per-cell work (mesh points / reduced diffusion, engine)
+        ## x simulated time per cycle (segments last ~1/C-rate hours) x cycles
+        if config["DIFFUSION"] == "full":
+            particle = config["DISCRETE_PTS"] / 100
+        else:
+            particle = Sweep.DIFFUSION_COST[config["DIFFUSION"]]
+        per_cycle = Sweep.simulated_cells(config) * particle * Sweep.ENGINE_COST[config["ENGINE"]] / c_rate(config)
+        return per_cycle * config["NUM_CYCLES"]
+
+    def run(self, workers=None) -> dict:
+        ## longest jobs first so the tail of the sweep isn't one big pack running alone
+        order = sorted(self.jobs, key=Sweep.cost, reverse=True)
+        workers = workers or os.cpu_count()
+
+        ## 'spawn' + one task per child: every job starts from freshly imported modules
+        context = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                max_tasks_per_child=1) as executor:
+
+            futures = {executor.submit(run_job, config): config for config in order}
+            self.export_manifest(workers)
+
+            for future in concurrent.futures.as_completed(futures):
+                config = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    ## worker died (e.g. killed by the OOM killer)
+                    result = {"Experiment": config["EXPERIMENT"], "Status": "failed", "Error": repr(e)}
+
+                self.results[config["EXPERIMENT"]] = result
+                print(f"[{len(self.results)}/{len(self.jobs)}] {result['Experiment']} -- {result['Status']}")
+                self.on_result(config, result)
+                self.export_manifest(workers)
+
+        return self.results
+
+    def on_result(self, config: dict, result: dict):
+        ## hook for subclasses, called in the parent process as each job finishes
+        pass
+
+    def export_manifest(self, workers: int):
+        jobs = []
+        for config in self.jobs:
+            entry = {"Config": config, "Estimated Cost": Sweep.cost(config)}
+            entry.update(self.results.get(config["EXPERIMENT"], {"Experiment": config["EXPERIMENT"], "Status": "pending"}))
+            jobs.append(entry)
+
+        data = {
+            "Sweep": self.name,
+            "Base": self.base,
+            "Grid": self.grid,
+            "Workers": workers,
+            "Jobs": jobs,
+        }
+
+        ## write-then-rename so a reader never sees a half-written manifest
+        file_path = f"data/{self.name}/manifest.json"
+        with open(file_path + ".tmp", 'w') as json_file:
+            json.dump(data, json_file, indent=4)
+        os.replace(file_path + ".tmp", file_path)
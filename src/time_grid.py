@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class AdaptiveGrid:
+    """
+    Event-aware adaptive output grid for Pack.cycler.
+
+    Each segment is solved on `oversample` x TIME_PTS evenly spaced points (the solver appends the
+    exact event time/state as the last point), then at most `budget` points are kept: starting from the
+    first and last point, the point worst reproduced by linear interpolation of the kept ones is added
+    until every tracked variable is within `tolerance` (relative to its range in the segment).
+    Flat stretches get few points, the knee before the voltage cutoff and the start of CV get many.
+
+        pack.set_time_grid(AdaptiveGrid(budget=60, tolerance=2e-3))
+    """
+
+    def __init__(self, budget=None, tolerance=1e-3, oversample=10, variables=("Pack Voltage", "Pack Current")):
+        ## budget None -> TIME_PTS
+        if budget is not None and int(budget) < 2:
+            raise ValueError("budget must keep at least the first and last point")
+        if int(oversample) < 1:
+            raise ValueError("oversample must be a positive integer")
+
+        self.budget = None if budget is None else int(budget)
+        self.tolerance = tolerance
+        self.oversample = int(oversample)
+        self.variables = list(variables)
+
+    def points(self, time_pts: int) -> int:
+        ## solver output points per segment
+        return self.oversample * time_pts
+
+    def select(self, t: np.ndarray, values: list, time_pts: int) -> np.ndarray:
+        ## values: one array per tracked variable (same length as t). Returns sorted indices into t
+        n = len(t)
+        budget = min(self.budget or time_pts, n)
+        if n <= 2:
+            return np.arange(n)
+
+        scaled = []
+        for v in values:
+            v = np.asarray(v, dtype=float)
+            span = np.ptp(v)
+            if span > 0:
+                scaled.append((v - v.min()) / span)
+
+        keep = np.zeros(n, dtype=bool)
+        keep[[0, n - 1]] = True
+        count = 2
+
+        while count < budget and len(scaled) != 0:
+            kept = np.flatnonzero(keep)
+            error = np.zeros(n)
+            for v in scaled:
+                error = np.maximum(error, np.abs(np.interp(t, t[kept], v[kept]) - v))
+
+            worst = np.argmax(error)
+            if error[worst] <= self.tolerance:
+                break
+
+            keep[worst] = True
+            count += 1
+
+        return np.flatnonzero(keep)
+
+    def JSON(self) -> dict:
+        return {
+            "Budget": self.budget,
+            "Tolerance": self.tolerance,
+            "Oversample": self.oversample,
+            "Variables": self.variables,
+        }
@@ -1,4 +1,4 @@
-import random
+import numpy as np
 
 def clamper(val, low, high):
     if val < low:
@@ -11,30 +11,45 @@ class Variator:
     ALL = []    
     OVERRIDE = False
 
+    ## every variator draws from this one numpy Generator; see Variator.seed
+    RNG = np.random.default_rng()
+    SEED = None
 
-    def __init__(self, name: str, mean_value: float, func, string: str):
+
+    def __init__(self, name: str, mean_value: float, func, string: str, spec=None):
         self.name = name
         self.mean_value = mean_value
         self.func = func
         self.string = string
+        ## (constructor, *args): full description of the distribution (result hashing)
+        self.spec = spec
         Variator.ALL.append(self)
 
     @classmethod
     def from_percent(cls, name: str, mean: float, percent: float):
         offset = mean * (percent / 100)
-        func = lambda: random.uniform(mean - offset, mean + offset)
-        return cls(name, mean, func, f"Uniform: {percent:.3f}%")
+        func = lambda: Variator.RNG.uniform(mean - offset, mean + offset)
+        return cls(name, mean, func, f"Uniform: {percent:.3f}%", ("from_percent", mean, percent))
 
     @classmethod
     def from_gaussian_percent(cls, name: str, mean: float, percent: float):
         stddev = mean * (percent / 100)
-        func = lambda: random.gauss(mean, stddev)
-        return cls(name, mean, func, f"Gaussian: {percent:.3f}% stddev")
+        func = lambda: Variator.RNG.normal(mean, stddev)
+        return cls(name, mean, func, f"Gaussian: {percent:.3f}% stddev", ("from_gaussian_percent", mean, percent))
 
     @classmethod
     def from_gaussian_stddev(cls, name: str, mean: float, stddev: float, clamp: float):
-        func = lambda: clamper(random.gauss(mean, stddev), mean-clamp, mean+clamp)
-        return cls(name, mean, func, f"Gaussian: {stddev:.3f} stddev")
+        func = lambda: clamper(Variator.RNG.normal(mean, stddev), mean-clamp, mean+clamp)
+        return cls(name, mean, func, f"Gaussian: {stddev:.3f} stddev", ("from_gaussian_stddev", mean, stddev, clamp))
+
+    @classmethod
+    def seed(cls, seed):
+        ## seed: int, or [root, k] for the k-th independent stream spawned from root
+        ##       (same stream as np.random.SeedSequence(root).spawn(k+1)[k]). None -> unseeded
+        cls.SEED = seed
+        if isinstance(seed, (list, tuple)):
+            seed = np.random.SeedSequence(seed[0], spawn_key=tuple(seed[1:]))
+        cls.RNG = np.random.default_rng(seed)
 
     def __str__(self):
         return self.string
@@ -56,5 +71,6 @@ class Variator:
             master[key] = val
 
         d = {}
+        d['Seed'] = cls.SEED
         d['Parameter Variations'] = master
         return d;
@@ -0,0 +1,410 @@
+import numpy as np
+import pandas as pd
+import pybamm
+
+import consts as cc
+import params as p
+from src.pack import Pack
+from src.particle_anode import Anode
+from src.particle_cathode import Cathode
+from src.single_particle import SingleParticle
+
+## one point per cell, dx = 1 -> Integral over this domain is a plain sum over cells
+CELLS = "pack cells"
+
+
+def cells_input(name: str, n: int):
+    ## per-cell array on CELLS, fed through the inputs. No expected_size: discretisation sizes it from the
+    ## CELLS mesh, so it combines with the (still undiscretised) variables while the model is built.
+    ## A single cell is a plain scalar input -- pybamm mis-broadcasts size-1 domain inputs
+    if n == 1:
+        return pybamm.InputParameter(name)
+    return pybamm.InputParameter(name, domain=CELLS)
+
+
+class StackedParticle:
+    """
+    Every particle of one electrode type in the pack as ONE variable:
+    concentration lives on (particle radius x pack cells), everything else on pack cells.
+    Radius is scaled to [0, 1] so cells can have different particle radii on a single submesh.
+    Same equations as SingleParticle/Cathode/Anode, with per-cell parameter arrays.
+    """
+
+    def __init__(self, name: str, charge: int, iapp, values: dict):
+        self.name = name
+        self.domain = name + " stacked particle"
+        self.charge = charge
+        self.values = values
+        self.n = len(values["Particle Radius"])
+
+        self.c0 = cells_input(name + " Initial Concentrations", self.n)
+        self.L = self.parameter("Electrode Thickness")
+        self.eps_n = self.parameter("Electrode Porosity")
+        self.cmax = self.parameter("Max Concentration")
+        self.D = self.parameter("Diffusion Coefficient")
+        self.R = self.parameter("Particle Radius")
+
+        self.iapp = iapp
+
+        self.phi = pybamm.Variable(name + " Phi", domain=CELLS)
+        self.c = pybamm.Variable(name + " Concentration", domain=self.domain, auxiliary_domains={"secondary": CELLS})
+        self.surf_c = pybamm.surf(self.c)
+
+        self.r = pybamm.SpatialVariable(name + " svRadius", domain=self.domain,
+                    auxiliary_domains={"secondary": CELLS}, coord_sys="spherical polar")
+
+        a_term = (3 * (1 - self.eps_n)) / self.R
+        self.j = (self.charge * self.iapp) / (self.L * a_term)
+
+    def parameter(self, label: str):
+        ## constant per-cell parameter, an input like c0 (see inputs())
+        return cells_input(f"{self.name} {label}s", self.n)
+
+    def inputs(self) -> dict:
+        ## constant per-cell parameter arrays (Initial Concentration is the c0 state, set separately)
+        return {
+            symbol.name: self.values[label] for label, symbol in [
+                ("Electrode Thickness", self.L), ("Electrode Porosity", self.eps_n), ("Max Concentration", self.cmax),
+                ("Diffusion Coefficient", self.D), ("Particle Radius", self.R),
+            ]
+        }
+
+    def radial(self, symbol):
+        ## per-cell quantity -> (particle radius x pack cells); a single cell's inputs are scalars (cells_input)
+        if self.n == 1:
+            return pybamm.FullBroadcast(symbol, self.domain, {"secondary": CELLS})
+        return pybamm.PrimaryBroadcast(symbol, self.domain)
+
+    def diffusion(self, model: pybamm.BaseModel, surface_flux):
+        ## dc/dt = D/R^2 * div(grad c) on the scaled radius; dc/dr(r=R) = -flux/(F*D) -> scaled by R
+        k = self.radial(self.D / self.R**2)
+        model.rhs.update({
+            self.c: k * pybamm.div(pybamm.grad(self.c)),
+        })
+
+        model.initial_conditions.update({
+            self.c: self.radial(self.c0),
+        })
+
+        model.boundary_conditions.update({
+            self.c: {
+                "left":  (0, "Neumann"),
+                "right": (-self.R * surface_flux / (cc.F * self.D), "Neumann")
+            },
+        })
+
+        model.variables.update({
+            self.c.name: self.c,
+            self.name + " Average Concentrations": pybamm.r_average(self.c),
+        })
+
+    def process_geometry(self, geo: dict):
+        geo.update({
+            self.domain: {self.r: {"min": 0, "max": 1}}
+        })
+
+
+class StackedCathode(StackedParticle):
+    def __init__(self, iapp, values: dict):
+        super().__init__("Cathode", +1, iapp, values)
+        self.ocp = p.POS_OCP(self.surf_c / self.cmax)
+
+    def process_model(self, model: pybamm.BaseModel):
+        KINT = 1.04e-11
+
+        self.diffusion(model, self.j)
+
+        x = cc.F / (2 * cc.R_GAS * cc.T) * (self.phi - self.ocp)
+        j0 = cc.F * KINT * self.surf_c**0.5 * (self.cmax - self.surf_c)**0.5
+
+        model.algebraic.update({
+            self.phi: j0 * 2 * pybamm.sinh(x) - self.j,
+        })
+
+        model.initial_conditions.update({
+            self.phi: Cathode.OCP_INIT
+        })
+
+        model.variables.update({
+            "Cathode Surface Concentrations": self.surf_c,
+            self.phi.name: self.phi,
+        })
+
+
+class StackedAnode(StackedParticle):
+    def __init__(self, iapp, values: dict):
+        super().__init__("Anode", -1, iapp, values)
+        self.ocp = p.NEG_OCP2(self.surf_c / self.cmax)
+
+        self.i_sei = pybamm.Variable("Anode Side Currents", domain=CELLS)
+        self.i_int = pybamm.Variable("Anode Intercalation Currents", domain=CELLS)
+        self.sei_L = pybamm.Variable("Anode SEI Lengths", domain=CELLS)
+        self.sei0 = cells_input("Anode Initial SEI Lengths", self.n)
+
+    def process_model(self, model: pybamm.BaseModel, charging):
+        ## constants/equations: see Anode.process_model
+        KSEI = 5.0e-6
+        M_SEI = 0.162
+        RHO_SEI = 1690
+        KINT = 2.07e-11
+
+        self.diffusion(model, self.i_int)
+
+        dLdt = (-self.i_sei / (2*cc.F)) * (M_SEI / RHO_SEI)
+        model.rhs.update({
+            self.sei_L: dLdt
+        })
+
+        x = cc.F / (2 * cc.R_GAS * cc.T) * (self.phi - self.ocp - (self.sei_L/KSEI)*self.j)
+
+        kfs = 1.36e-12
+        cec_init = 0.05 * 4541
+        is_rhs = charging * -cc.F*kfs*cec_init * pybamm.exp( (-0.5*cc.F)/(cc.R_GAS*cc.T) * (self.phi - (self.sei_L/KSEI)*self.j) )
+
+        j0 = cc.F * KINT * self.surf_c**0.5 * (self.cmax - self.surf_c)**0.5
+
+        model.algebraic.update({
+            self.phi: j0 * 2*pybamm.sinh(x) - self.i_int,
+            self.i_sei: is_rhs - self.i_sei,
+            self.i_int: -self.i_int - self.i_sei + self.j
+        })
+
+        model.initial_conditions.update({
+            self.phi: Anode.OCP_INIT,
+            self.i_sei: 1e-8,
+            self.i_int: 1e-2,
+            self.sei_L: self.sei0,
+        })
+
+        model.variables.update({
+            "Anode Surface Concentrations": self.surf_c,
+            self.phi.name: self.phi,
+            self.i_sei.name: self.i_sei,
+            self.i_int.name: self.i_int,
+            self.sei_L.name: self.sei_L,
+        })
+
+
+class CellView:
+    ## per-position stand-in for Cell (name + discharge capacity) so Pack's capacity bookkeeping works unchanged
+    def __init__(self, name: str):
+        self.name = name
+        self.capacity_value = 0
+
+
+class VectorPack(Pack):
+    """
+    Drop-in alternative to Pack: same constructor, protocol, cutoffs, cycler and output columns,
+    but all cells are stacked into one cathode and one anode state vector with per-cell
+    parameter arrays. Build time and expression-tree size no longer grow with one
+    domain/submesh/OCP per particle.
+    """
+
+    ## output column suffix (same as Pack's per-cell columns) -> stacked model variable
+    COLUMNS = {
+        "Cathode Concentration":        "Cathode Surface Concentrations",
+        "Anode Concentration":          "Anode Surface Concentrations",
+        "Cathode Average Concentration": "Cathode Average Concentrations",
+        "Anode Average Concentration":  "Anode Average Concentrations",
+        "Anode SEI Length":             "Anode SEI Lengths",
+        "Voltage":                      "Cell Voltages",
+        "Anode Side Current":           "Anode Side Currents",
+        "Anode Intercalation Current":  "Anode Intercalation Currents",
+    }
+
+    def _create_cells(self, model, geo, parameters):
+        if self.lumping is not None:
+            raise ValueError("Cell lumping is only available for the per-object Pack")
+        if self.diffusion != "full":
+            raise ValueError("Reduced-order diffusion is only available for the per-object Pack")
+
+        ## cell k = i*parallel + j (row-major, same order as Pack.flat_cells)
+        n = self.series * self.parallel
+        self.n_cells = n
+
+        self.x_cell = pybamm.SpatialVariable("Pack Cell Index", domain=CELLS, coord_sys="cartesian")
+        ## 1 on the cells of string j, 0 elsewhere (inputs like the cell parameters)
+        self.masks = [cells_input(f"String {j+1} Mask", n) for j in range(self.parallel)]
+        self.i_cells = sum(self.iapps[j] * self.masks[j] for j in range(self.parallel))
+
+        pos_values, neg_values = self.__sample(n)
+        self.pos = StackedCathode(self.i_cells, pos_values)
+        self.neg = StackedAnode(self.i_cells, neg_values)
+
+        self.vcell = self.pos.phi - self.neg.phi
+
+        self.capacity = pybamm.Variable("Cell Capacities", domain=CELLS)
+        model.rhs.update({
+            self.capacity: self.discharging * pybamm.AbsoluteValue(self.i_cells / 3600)
+        })
+        model.initial_conditions.update({
+            self.capacity: 0
+        })
+
+        self.pos.process_model(model)
+        self.neg.process_model(model, self.charging)
+
+        geo.update({
+            CELLS: {self.x_cell: {"min": 0, "max": n}}
+        })
+        self.pos.process_geometry(geo)
+        self.neg.process_geometry(geo)
+
+        model.variables.update({
+            "Cell Voltages": self.vcell,
+            self.capacity.name: self.capacity,
+        })
+
+        ## pybamm.min over the cells: one event per cutoff instead of one per cell
+        model.events.extend([
+            pybamm.Event("Min Anode Concentration Cutoff", pybamm.min(self.neg.surf_c - 10)),
+            pybamm.Event("Max Cathode Concentration Cutoff", pybamm.min(self.pos.cmax - self.pos.surf_c)),
+            pybamm.Event("Max Anode Concentration Cutoff", pybamm.min(self.neg.cmax - self.neg.surf_c)),
+        ])
+
+        cells = np.empty(self.shape, dtype=object)
+        for i in range(self.series):
+            for j in range(self.parallel):
+                cells[i, j] = CellView(self.names[i, j])
+
+        return cells
+
+    def __sample(self, n: int):
+        ## same draw order as Cathode/Anode.attach_parameters, cell by cell -> same values as Pack for a given seed
+        labels = [label for label, _ in SingleParticle.PARAMETERS]
+        pos = {label: np.empty(n) for label in labels}
+        neg = {label: np.empty(n) for label in labels}
+
+        for k in range(n):
+            if self.values is not None:
+                ## given values (src/manifest.py rebuild): nothing is drawn
+                given = self.values[k // self.parallel, k % self.parallel]
+                drawn_values = [(pos, given["pos"]), (neg, given["neg"])]
+            else:
+                drawn_values = [(pos, Cathode.sample()), (neg, Anode.sample())]
+
+            for values, drawn in drawn_values:
+                for label in labels:
+                    values[label][k] = drawn[label]
+
+        return pos, neg
+
+    def _cell_samples(self) -> np.ndarray:
+        samples = np.empty(self.shape, dtype=object)
+        for k in range(self.n_cells):
+            samples[k // self.parallel, k % self.parallel] = {
+                key: {label: float(values[k]) for label, values in electrode.values.items()}
+                for key, electrode in [("pos", self.pos), ("neg", self.neg)]
+            }
+        return samples
+
+    def _string_voltage(self, j: int):
+        return pybamm.Integral(self.masks[j] * self.vcell, self.x_cell)
+
+    def _discretise(self, discrete_pts):
+        domains = [CELLS, self.pos.domain, self.neg.domain]
+
+        with self.metrics.phase("build: meshing"):
+            mesh = pybamm.Mesh(self.geo,
+                { d: pybamm.Uniform1DSubMesh for d in domains },
+                { self.x_cell: self.n_cells, self.pos.r: discrete_pts, self.neg.r: discrete_pts }
+            )
+
+        with self.metrics.phase("build: discretisation"):
+            disc = pybamm.Discretisation(mesh,
+                { d: pybamm.FiniteVolume() for d in domains }
+            )
+            disc.process_model(self.model)
+
+    def _cache_items(self) -> dict:
+        items = super()._cache_items()
+        for electrode in [self.pos, self.neg]:
+            for label, values in electrode.values.items():
+                items[f"{electrode.name} {label}"] = [repr(float(v)) for v in values]
+        return items
+
+    def export_cell_parameters(self):
+        df = pd.DataFrame(
+            {f"{e.name} {label}": values for e in [self.pos, self.neg] for label, values in e.values.items()},
+            index=[cell.name for cell in self.cells.flatten()]
+        )
+        df.index.name = "Cell"
+        df.to_csv(f"{self.folder}/cell_parameters.csv", index=True)
+
+    def _setup_initialization_and_outputs(self, inps: dict):
+        spec = self.output_spec
+        outputs = ["Pack Voltage", "Pack Current"] if spec.pack else []
+        outputs += [iapp.name for j, iapp in enumerate(self.iapps) if spec.records_string(j)]
+
+        inps.update({
+            self.ilock.name: -self.iappt,
+            self.cv_mode.name: 0,
+            self.charging.name: 0,
+
+            self.pos.c0.name: self.pos.values["Initial Concentration"],
+            self.neg.c0.name: self.neg.values["Initial Concentration"],
+            self.neg.sei0.name: np.full(self.n_cells, 5.e-9),
+        })
+        inps.update(self.pos.inputs())
+        inps.update(self.neg.inputs())
+        inps.update({
+            mask.name: (np.arange(self.n_cells) % self.parallel == j).astype(float) for j, mask in enumerate(self.masks)
+        })
+
+        ## (cell k, column suffix) pairs actually written
+        self.recorded = [(k, suffix) for k, cell in enumerate(self.flat_cells) if spec.records_cell(cell.name)
+                            for suffix in spec.cell_variables]
+        outputs.extend([f"{self.flat_cells[k].name} {suffix}" for k, suffix in self.recorded])
+
+        ## one value per cell and time point (see Pack._setup_initialization_and_outputs)
+        for name in self.COLUMNS.values():
+            if self.model.variables[name].domain not in ([CELLS], []):
+                raise ValueError(f"Output source '{name}' is not one value per cell")
+
+        return outputs
+
+    def __stacked(self, solution: pybamm.Solution, name: str):
+        ## (cells, time) -- a single-cell pack comes back 1D
+        return solution[name].entries.reshape(self.n_cells, -1)
+
+    def _extract(self, solution: pybamm.Solution, outputs: list, cycle_data: dict, idx: np.ndarray):
+        for var in ["Pack Voltage", "Pack Current"] + [iapp.name for iapp in self.iapps]:
+            if var in cycle_data:
+                cycle_data[var].extend(solution[var].entries[idx])
+
+        stacked = {}
+        for k, suffix in self.recorded:
+            if suffix not in stacked:
+                stacked[suffix] = self.__stacked(solution, self.COLUMNS[suffix])[:, idx]
+            cycle_data[f"{self.flat_cells[k].name} {suffix}"].extend(stacked[suffix][k])
+
+    def _profiles(self, solution: pybamm.Solution) -> dict:
+        profiles = {}
+        for electrode in [self.pos, self.neg]:
+            if electrode.name in self.output_spec.profiles:
+                ## (radius, cells) at the last time point
+                entries = solution[electrode.c.name].entries[..., -1].reshape(-1, self.n_cells)
+                for k, cell in enumerate(self.flat_cells):
+                    profiles[f"{cell.name} {electrode.name}"] = entries[:, k]
+        return profiles
+
+    def _slow_states(self) -> list:
+        return [self.pos.c0.name, self.neg.c0.name, self.neg.sei0.name]
+
+    def _string_current_entries(self, solution: pybamm.Solution) -> np.ndarray:
+        return np.array([solution[iapp.name].entries for iapp in self.iapps])
+
+    def _cell_final(self, solution: pybamm.Solution, suffix: str) -> np.ndarray:
+        return self.__stacked(solution, self.COLUMNS[suffix])[:, -1]
+
+    def _update_cell_state(self, inps: dict, solution: pybamm.Solution, state: int):
+        inps.update({
+            self.pos.c0.name: self.__stacked(solution, "Cathode Surface Concentrations")[:, -1],
+            self.neg.c0.name: self.__stacked(solution, "Anode Surface Concentrations")[:, -1],
+            self.neg.sei0.name: self.__stacked(solution, self.neg.sei_L.name)[:, -1],
+        })
+
+        if (state == 0):
+            capacity = self.__stacked(solution, self.capacity.name)
+            for k, cell in enumerate(self.flat_cells):
+                cell.capacity_value = capacity[k, -1] - capacity[k, 0]
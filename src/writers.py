@@ -0,0 +1,377 @@
+import io
+import os
+import pandas as pd
+import numpy as np
+
+INDEX_NAMES = ["Cycle", "Protocol", "Stamps"]
+
+## time columns always keep full precision (global time reaches ~1e6 s over long runs)
+TIME_COLUMNS = ["Time", "Global Time"]
+
+## sidecar index: one row per (Cycle, Protocol) segment -> location of its rows in the data file
+##   csv:     Start/Stop are byte offsets
+##   parquet: Part is the part file, Start is the row group (Stop = Start + 1)
+##   hdf5:    Start/Stop are table row numbers
+INDEX_FILENAME = "index.csv"
+INDEX_COLUMNS = ["Cycle", "Protocol", "Part", "Start", "Stop"]
+
+
+def to_frame(data: dict, cycle: int, protocol: str, float32=False) -> pd.DataFrame:
+    subdf = pd.DataFrame(data)
+    if float32:
+        cols = subdf.columns.drop(TIME_COLUMNS, errors='ignore')
+        subdf[cols] = subdf[cols].astype(np.float32)
+
+    ## (cycle, protocol, stamp) index -- same layout the original data.csv used
+    return pd.concat({(cycle, protocol): subdf}, names=INDEX_NAMES)
+
+
+def truncate_file(path: str, size: int):
+    ## drop everything past `size` bytes (a missing file counts as size 0)
+    if not os.path.exists(path):
+        return
+    if size == 0:
+        os.remove(path)
+        return
+    with open(path, 'r+b') as f:
+        f.truncate(size)
+
+
+def fsync_file(path: str):
+    if not os.path.exists(path):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def read_index(folder: str):
+    path = os.path.join(folder, INDEX_FILENAME)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, keep_default_na=False)
+
+
+class Writer:
+    NAME = None
+    FILENAME = None
+
+    def __init__(self, folder: str, float32=False):
+        self.folder = folder
+        self.path = os.path.join(folder, self.FILENAME)
+        self.index_path = os.path.join(folder, INDEX_FILENAME)
+        self.float32 = float32
+
+    def create(self, columns: list):
+        with open(self.index_path, 'w') as f:
+            f.write(",".join(INDEX_COLUMNS) + "\n")
+
+    def write(self, data: dict, cycle: int, protocol: str):
+        self.write_many([(data, cycle, protocol)])
+
+    def write_many(self, segments: list):
+        ## segments: [(data, cycle, protocol), ...] in order -- one batch, one index append
+        frames = [(to_frame(data, cycle, protocol, self.float32), cycle) for data, cycle, protocol in segments]
+        locations = self._write_batch(frames)
+
+        ## index rows go out AFTER the data, so they never point past what is on disk
+        rows = [f"{cycle},{protocol},{part},{start},{stop}\n"
+                    for (_, cycle, protocol), (part, start, stop) in zip(segments, locations)]
+        with open(self.index_path, 'a') as f:
+            f.write("".join(rows))
+
+    def _write_batch(self, frames: list) -> list:
+        ## [(subdf, cycle)] -> [(part, start, stop)]
+        return [self._write(subdf, cycle) for subdf, cycle in frames]
+
+    def _write(self, subdf: pd.DataFrame, cycle: int):
+        raise NotImplementedError
+
+    def sync(self):
+        ## fsync what has been written (BackgroundWriter flush policy)
+        fsync_file(self.index_path)
+
+    def close(self):
+        pass
+
+    def position(self) -> dict:
+        ## everything written so far (checkpointing). Anything open is closed first, so it's on disk
+        self.close()
+        return {"index": file_size(self.index_path)}
+
+    def truncate(self, position: dict):
+        ## back to an earlier position(): segments written after it are dropped
+        truncate_file(self.index_path, position["index"])
+
+    @classmethod
+    def exists(cls, folder: str) -> bool:
+        return os.path.exists(os.path.join(folder, cls.FILENAME))
+
+    @classmethod
+    def read(cls, folder: str, segments=None) -> pd.DataFrame:
+        raise NotImplementedError
+
+
+class CSVWriter(Writer):
+    NAME = "csv"
+    FILENAME = "data.csv"
+
+    def create(self, columns: list):
+        super().create(columns)
+        pd.DataFrame(
+            columns=columns,
+            index=pd.MultiIndex.from_product([[], [], []], names=INDEX_NAMES)
+        ).to_csv(self.path, index=True)
+
+    def _write(self, subdf: pd.DataFrame, cycle: int):
+        return self._write_batch([(subdf, cycle)])[0]
+
+    def _write_batch(self, frames: list) -> list:
+        ## one append for the whole batch
+        chunks = [subdf.to_csv(header=False, index=True, lineterminator="\n").encode() for subdf, _ in frames]
+        locations = []
+        with open(self.path, 'ab') as f:
+            start = f.tell()
+            for chunk in chunks:
+                locations.append(("", start, start + len(chunk)))
+                start += len(chunk)
+            f.write(b"".join(chunks))
+
+        return locations
+
+    def sync(self):
+        fsync_file(self.path)
+        super().sync()
+
+    def position(self) -> dict:
+        position = super().position()
+        position["data"] = file_size(self.path)
+        return position
+
+    def truncate(self, position: dict):
+        super().truncate(position)
+        truncate_file(self.path, position["data"])
+
+    @classmethod
+    def read(cls, folder: str, segments=None) -> pd.DataFrame:
+        path = os.path.join(folder, cls.FILENAME)
+        if segments is None:
+            return pd.read_csv(path, index_col=[0,1,2])
+
+        with open(path, 'rb') as f:
+            buffer = [f.readline()]
+            for start, stop in merge_ranges(segments):
+                f.seek(start)
+                buffer.append(f.read(stop - start))
+
+        return pd.read_csv(io.BytesIO(b"".join(buffer)), index_col=[0,1,2])
+
+
+class ParquetWriter(Writer):
+    """
+    Parquet dataset (folder of part files). One part file per cycle, one row group per protocol segment.
+    Requires pyarrow.
+    """
+    NAME = "parquet"
+    FILENAME = "data.parquet"
+
+    def __init__(self, folder: str, float32=False, compression="zstd"):
+        import pyarrow.parquet
+
+        super().__init__(folder, float32)
+        self.compression = compression
+
+        self.part = None
+        self.part_cycle = None
+        self.row_groups = 0
+        self.unsynced = set()
+
+    def create(self, columns: list):
+        super().create(columns)
+        os.makedirs(self.path, exist_ok=True)
+        for f in os.listdir(self.path):
+            os.remove(os.path.join(self.path, f))
+
+    def _write(self, subdf: pd.DataFrame, cycle: int):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(subdf.reset_index(), preserve_index=False)
+
+        if cycle != self.part_cycle:
+            self.close()
+            self.part = pq.ParquetWriter(
+                os.path.join(self.path, self.part_name(cycle)),
+                table.schema, compression=self.compression
+            )
+            self.unsynced.add(os.path.join(self.path, self.part_name(cycle)))
+            self.part_cycle = cycle
+            self.row_groups = 0
+
+        ## write_table(row_group_size=None) keeps the whole segment in a single row group
+        self.part.write_table(table, row_group_size=max(len(subdf), 1))
+        self.row_groups += 1
+
+        return self.part_name(cycle), self.row_groups - 1, self.row_groups
+
+    def close(self):
+        if self.part is not None:
+            self.part.close()
+            self.part = None
+            self.part_cycle = None
+
+    def sync(self):
+        ## an open part has no footer yet: only finished parts are synced
+        for path in list(self.unsynced):
+            if self.part is None or path != os.path.join(self.path, self.part_name(self.part_cycle)):
+                fsync_file(path)
+                self.unsynced.discard(path)
+        super().sync()
+
+    def position(self) -> dict:
+        ## closing the open part file finishes its footer; the next cycle starts a new part anyway
+        position = super().position()
+        position["parts"] = [os.path.basename(f) for f in self.parts(self.folder)]
+        return position
+
+    def truncate(self, position: dict):
+        super().truncate(position)
+        for f in self.parts(self.folder):
+            if os.path.basename(f) not in position["parts"]:
+                os.remove(f)
+
+    @staticmethod
+    def part_name(cycle: int) -> str:
+        return f"part-{cycle:06d}.parquet"
+
+    @classmethod
+    def exists(cls, folder: str) -> bool:
+        return os.path.isdir(os.path.join(folder, cls.FILENAME))
+
+    @classmethod
+    def parts(cls, folder: str) -> list:
+        path = os.path.join(folder, cls.FILENAME)
+        return [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".parquet")]
+
+    @classmethod
+    def read(cls, folder: str, segments=None) -> pd.DataFrame:
+        import pyarrow.parquet as pq
+
+        if segments is None:
+            frames = [pq.read_table(f).to_pandas() for f in cls.parts(folder)]
+        else:
+            frames = []
+            for part, rows in segments.groupby("Part", sort=False):
+                pfile = pq.ParquetFile(os.path.join(folder, cls.FILENAME, part))
+                frames.append(pfile.read_row_groups(list(rows["Start"])).to_pandas())
+
+        if len(frames) == 0:
+            return pd.DataFrame(index=pd.MultiIndex.from_product([[], [], []], names=INDEX_NAMES))
+        return pd.concat(frames, ignore_index=True).set_index(INDEX_NAMES)
+
+
+class HDF5Writer(Writer):
+    """
+    Appendable HDF5 table (pandas HDFStore). One append per protocol segment.
+    Requires pytables.
+    """
+    NAME = "hdf5"
+    FILENAME = "data.h5"
+    KEY = "data"
+
+    def __init__(self, folder: str, float32=False, complib="blosc", complevel=5):
+        super().__init__(folder, float32)
+        self.complib = complib
+        self.complevel = complevel
+
+    def create(self, columns: list):
+        super().create(columns)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _write(self, subdf: pd.DataFrame, cycle: int):
+        with pd.HDFStore(self.path, mode='a', complib=self.complib, complevel=self.complevel) as store:
+            start = store.get_storer(self.KEY).nrows if self.KEY in store else 0
+            store.append(self.KEY, subdf, format='table', min_itemsize={"Protocol": 16})
+
+        return "", start, start + len(subdf)
+
+    def _write_batch(self, frames: list) -> list:
+        ## one table append for the whole batch
+        if len(frames) == 1:
+            return [self._write(*frames[0])]
+
+        locations = []
+        with pd.HDFStore(self.path, mode='a', complib=self.complib, complevel=self.complevel) as store:
+            start = store.get_storer(self.KEY).nrows if self.KEY in store else 0
+            for subdf, _ in frames:
+                locations.append(("", start, start + len(subdf)))
+                start += len(subdf)
+            store.append(self.KEY, pd.concat([subdf for subdf, _ in frames]), format='table', min_itemsize={"Protocol": 16})
+
+        return locations
+
+    def sync(self):
+        fsync_file(self.path)
+        super().sync()
+
+    def position(self) -> dict:
+        position = super().position()
+        position["rows"] = 0
+        if os.path.exists(self.path):
+            with pd.HDFStore(self.path, mode='r') as store:
+                position["rows"] = store.get_storer(self.KEY).nrows if self.KEY in store else 0
+        return position
+
+    def truncate(self, position: dict):
+        super().truncate(position)
+        if not os.path.exists(self.path):
+            return
+        with pd.HDFStore(self.path, mode='a') as store:
+            if self.KEY in store and store.get_storer(self.KEY).nrows > position["rows"]:
+                store.remove(self.KEY, start=position["rows"])
+
+    @classmethod
+    def read(cls, folder: str, segments=None) -> pd.DataFrame:
+        path = os.path.join(folder, cls.FILENAME)
+        if segments is None:
+            return pd.read_hdf(path, cls.KEY)
+
+        frames = [pd.read_hdf(path, cls.KEY, start=start, stop=stop) for start, stop in merge_ranges(segments)]
+        return pd.concat(frames)
+
+
+def merge_ranges(segments: pd.DataFrame) -> list:
+    ## coalesce back-to-back segments into single reads
+    ranges = []
+    for start, stop in zip(segments["Start"], segments["Stop"]):
+        if len(ranges) != 0 and ranges[-1][1] == start:
+            ranges[-1][1] = stop
+        else:
+            ranges.append([start, stop])
+    return ranges
+
+
+WRITERS = {
+    CSVWriter.NAME: CSVWriter,
+    ParquetWriter.NAME: ParquetWriter,
+    HDF5Writer.NAME: HDF5Writer,
+}
+
+
+def detect(folder: str, name=None):
+    ## profile.json records the backend; fall back to whichever output file exists
+    if name is not None:
+        return WRITERS[name]
+
+    for writer in WRITERS.values():
+        if writer.exists(folder):
+            return writer
+
+    raise FileNotFoundError(f"No simulation data found in {folder}")